@@ -0,0 +1,48 @@
+"""
+Ansible filters building edit-config payloads with the shared builder in
+netconf_payloads.py (repository root), so the playbook sends the same
+escaped, memoized payloads as the Python scripts.
+
+    content: "{{ ip_assignments[inventory_hostname] | ipv4_config(device_interfaces) }}"
+
+ipv4_delta_config diffs against a registered netconf_get reply and yields
+only what differs ('' when the device is already converged):
+
+    content: "{{ ip_assignments[inventory_hostname] | ipv4_delta_config(running.stdout, device_interfaces) }}"
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from config_diff import delta_payload, parse_state
+from netconf_payloads import interfaces_payload
+
+
+def _select(assignments, interfaces=None):
+    selected = {}
+    for name, address in assignments.items():
+        if interfaces is not None and name not in interfaces:
+            continue
+        if isinstance(address, dict):
+            address = f"{address['ip']}/{address['prefix']}"
+        selected[name] = address
+    return selected
+
+
+def ipv4_config(assignments, interfaces=None):
+    """<config> for {interface: {ip, prefix}} or {interface: 'ip/prefix'}
+
+    Only interfaces listed in interfaces (if given) are included.
+    """
+    return interfaces_payload(_select(assignments, interfaces))
+
+
+def ipv4_delta_config(assignments, running_xml, interfaces=None):
+    """Like ipv4_config, but only the changes running_xml lacks ('' if none)"""
+    return delta_payload(_select(assignments, interfaces), parse_state(running_xml)) or ''
+
+
+class FilterModule(object):
+    def filters(self):
+        return {'ipv4_config': ipv4_config, 'ipv4_delta_config': ipv4_delta_config}
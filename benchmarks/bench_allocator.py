@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: link subnet allocation
+Allocates a /30 per backhaul link from a pool and a management address per
+device, first from scratch and then again from the saved state after a few
+links were removed and added (the state file path of ip_allocator.py).
+
+Usage:
+    python benchmarks/bench_allocator.py [--links 50000] [--pool 10.0.0.0/12:30]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ip_allocator import LinkAllocator, parse_pool
+from topology import NetworkLink
+
+
+def make_links(count: int, pool: str, first: int = 0, routers: int = 500):
+    """A backhaul and a management link per RAN device"""
+    links = []
+    for i in range(first, first + count):
+        ran = f"RAN-{i:06d}"
+        links.append(NetworkLink(f"Backhaul {ran}", ran, "backhaul0",
+                                 f"Router-{i % routers:03d}", f"eth{i // routers + 1}", pool, ""))
+        links.append(NetworkLink(f"Management {ran}", ran, "eth0", "Core-001", "eth0", "172.16.0.0/12", ""))
+    return links
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Link allocator benchmark")
+    parser.add_argument("--links", type=int, default=50000, help="Backhaul links (plus as many management links)")
+    parser.add_argument("--pool", default="10.0.0.0/12:30")
+    args = parser.parse_args()
+
+    pools = [parse_pool(args.pool)]
+    links = make_links(args.links, str(pools[0][0]))
+
+    start = time.perf_counter()
+    first = LinkAllocator(pools).allocate(links)
+    elapsed = time.perf_counter() - start
+    print(f"📐 {len(links)} links, {len(first.endpoints)} interfaces from scratch: {elapsed * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    first.config
+    print(f"   NETWORK_CONFIG ({len(first.config)} devices of IPv4Interface): "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Drop every 100th RAN device and add as many new ones
+    changed = [link for link in links if not link.device1.endswith("00")]
+    changed += make_links(args.links // 100, str(pools[0][0]), first=args.links)
+
+    start = time.perf_counter()
+    second = LinkAllocator(pools, first.state).allocate(changed)
+    elapsed = time.perf_counter() - start
+    moved = sum(1 for endpoint, address in second.endpoints.items()
+                if endpoint in first.endpoints and first.endpoints[endpoint] != address)
+    print(f"   rerun from state ({second.kept} kept, {second.allocated} new): {elapsed * 1000:.0f} ms, "
+          f"{moved} existing interfaces moved")
+
+
+if __name__ == "__main__":
+    main()
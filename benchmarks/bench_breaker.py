@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sweeps with unreachable devices
+Blackholes a share of the RAN sites of a simulated fleet (connects and RPCs
+hang until the timeout) and times back-to-back sweeps with the circuit
+breaker and adaptive timeouts of device_health against the previous
+behaviour: the pool's fixed timeout for every device, every sweep. Then
+brings the sites back and counts the sweeps until their probes close the
+circuits again.
+
+Usage:
+    python benchmarks/bench_breaker.py [--ran 100 --down 0.1 --timeout 10 --sweeps 5 --interval 2]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from device_health import HealthTracker
+from netconf_pool import SessionPool
+from netconf_sim import SimulatedFleet
+from network_check import NetworkConsistencyChecker
+
+
+def sweep(checker) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        checker.fetch_all_devices()
+    return time.perf_counter() - start
+
+
+def bench(name, health, args):
+    fleet = SimulatedFleet.scaled(args.ran, args.ran // 2, 1, latency=args.latency, jitter=args.latency / 4)
+    checker = NetworkConsistencyChecker(max_workers=args.workers, topology=fleet.topology(),
+                                        pool=SessionPool(timeout=args.timeout, connect=fleet.connect),
+                                        health=health(args))
+    # Warm sessions and latency samples
+    baseline = statistics.median(sweep(checker) for _ in range(6))
+
+    ran = sorted(n for n in fleet.by_name if n.startswith('RAN'))
+    down = ran[::max(1, round(1 / args.down))] if args.down else []
+    for device in down:
+        fleet.by_name[device].unresponsive = True
+    times = []
+    for _ in range(args.sweeps):
+        times.append(sweep(checker))
+        # Monitoring interval: lets SessionPool's connect backoff expire
+        time.sleep(args.interval)
+    print(f"{name:10} healthy {baseline * 1000:6.0f} ms | {len(down)} RAN down: "
+          + " ".join(f"{t * 1000:6.0f}" for t in times) + " ms")
+
+    for device in down:
+        fleet.by_name[device].unresponsive = False
+    start = time.perf_counter()
+    for recovered in range(1, 100):
+        sweep(checker)
+        if all(checker.devices[device].fetch_status == "ok" for device in down):
+            print(f"{'':10} back up: all polled again after {recovered} sweeps, "
+                  f"{time.perf_counter() - start:.1f}s")
+            break
+    checker.close_sessions()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Circuit breaker benchmark")
+    parser.add_argument("--ran", type=int, default=100, help="RAN sites (plus half as many routers and a core)")
+    parser.add_argument("--down", type=float, default=0.1, help="Share of RAN sites blackholed")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Pool connect/RPC timeout")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated RPC latency")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--sweeps", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=2.0, help="Pause between sweeps")
+    parser.add_argument("--probe-interval", type=float, default=2.0)
+    args = parser.parse_args()
+
+    # Previous behaviour: the fixed timeout, and no device is ever skipped
+    bench("fixed", lambda a: HealthTracker(min_timeout=a.timeout, max_timeout=a.timeout,
+                                           failure_threshold=sys.maxsize), args)
+    bench("breaker", lambda a: HealthTracker(max_timeout=a.timeout, probe_base=a.probe_interval), args)
+
+
+if __name__ == "__main__":
+    main()
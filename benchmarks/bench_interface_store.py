@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Interface dataclasses vs the columnar InterfaceStore
+Measures the memory held by 100k interfaces and the time to check one
+link per interface pair, with and without numpy.
+
+Usage:
+    python benchmarks/bench_interface_store.py [--interfaces 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import interface_store
+from interface_store import InterfaceStore
+from network_check import Interface
+
+DEVICE_SIZE = 100
+
+
+def build_interfaces(count):
+    """Devices of DEVICE_SIZE interfaces, pairwise on /30 subnets"""
+    devices = {}
+    for i in range(count):
+        subnet = i // 2
+        ip = f"10.{subnet >> 14 & 0xFF}.{subnet >> 6 & 0xFF}.{(subnet & 0x3F) * 4 + 1 + i % 2}"
+        interface = Interface(f"eth{i % DEVICE_SIZE}", ip, 30, True,
+                              "Link to peer", [(ip, 30)])
+        devices.setdefault(f"dev{i // DEVICE_SIZE}", {})[interface.name] = interface
+    return devices
+
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interface store benchmark")
+    parser.add_argument("--interfaces", type=int, default=100000)
+    args = parser.parse_args()
+
+    devices, dataclass_bytes = measure(lambda: build_interfaces(args.interfaces))
+    flat = [i for d in devices.values() for i in d.values()]
+    for interface in flat:
+        interface.network  # warm the cached property, as the monitor does
+
+    def build_store():
+        store = InterfaceStore()
+        views = {name: store.assign(name, interfaces) for name, interfaces in devices.items()}
+        return store, views
+
+    (store, views), store_bytes = measure(build_store)
+
+    print(f"📦 {args.interfaces} interfaces")
+    print(f"   dataclasses:    {dataclass_bytes / 1e6:7.1f} MB")
+    print(f"   InterfaceStore: {store_bytes / 1e6:7.1f} MB")
+
+    # One link per pair of consecutive interfaces
+    rows = [view.row(name) for view in views.values() for name in view]
+    rows1, rows2 = rows[0::2], rows[1::2]
+    nets = [store.ip[r] & store.netmask[r] for r in rows1]
+    prefixes = [30] * len(rows1)
+
+    start = time.perf_counter()
+    ok = sum(1 for a, b in zip(flat[0::2], flat[1::2])
+             if a.network == b.network and a.ip_address != b.ip_address)
+    dataclass_time = time.perf_counter() - start
+
+    results = [("dataclasses", dataclass_time, ok)]
+    numpy_module = interface_store.np
+    for label, module in (("store (loop)", None), ("store (numpy)", numpy_module)):
+        if label.endswith("(numpy)") and module is None:
+            continue
+        saved, interface_store.np = interface_store.np, module
+        start = time.perf_counter()
+        codes = store.same_subnet_codes(rows1, rows2, nets, prefixes)
+        results.append((label, time.perf_counter() - start, codes.count(interface_store.LINK_OK)))
+        interface_store.np = saved
+
+    print(f"🔗 {len(rows1)} links")
+    for label, seconds, ok in results:
+        print(f"   {label:15} {seconds * 1000:8.1f} ms  ({ok} ok)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: interface XML parsing
+Compares the single-pass lxml iterparse parser used by
+NetworkConsistencyChecker.parse_interface_config with the previous
+findall()/.// descendant-search implementation on a large synthetic reply.
+
+Usage:
+    python benchmarks/bench_parse_interfaces.py [interfaces] [repeat]
+"""
+
+import os
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from network_check import NetworkConsistencyChecker, Interface
+
+IF_NS = "urn:ietf:params:xml:ns:yang:ietf-interfaces"
+IP_NS = "urn:ietf:params:xml:ns:yang:ietf-ip"
+
+
+def synthetic_reply(count: int, addresses_per_interface: int = 2) -> str:
+    """Build a get-config <data> reply with `count` interfaces"""
+    parts = [f'<data xmlns="urn:ietf:params:xml:ns:netconf:base:1.0"><interfaces xmlns="{IF_NS}">']
+    for i in range(count):
+        addresses = "".join(
+            f"<address><ip>10.{(i >> 8) & 255}.{i & 255}.{a + 1}</ip>"
+            f"<prefix-length>30</prefix-length></address>"
+            for a in range(addresses_per_interface)
+        )
+        parts.append(
+            f"<interface><name>eth{i}</name>"
+            f"<type xmlns:ianaift=\"urn:ietf:params:xml:ns:yang:iana-if-type\">ianaift:ethernetCsmacd</type>"
+            f"<description>Synthetic interface {i}</description><enabled>true</enabled>"
+            f"<ipv4 xmlns=\"{IP_NS}\"><enabled>true</enabled>{addresses}</ipv4>"
+            f"</interface>"
+        )
+    parts.append("</interfaces></data>")
+    return "".join(parts)
+
+
+def legacy_parse(xml_data: str):
+    """Previous parse_interface_config implementation (for comparison)"""
+    interfaces = {}
+    root = ET.fromstring(xml_data)
+    for interface_elem in root.findall(f'.//{{{IF_NS}}}interface'):
+        name_elem = interface_elem.find(f'.//{{{IF_NS}}}name')
+        if name_elem is None:
+            continue
+        name = name_elem.text
+        desc_elem = interface_elem.find(f'.//{{{IF_NS}}}description')
+        description = desc_elem.text if desc_elem is not None else ""
+        enabled_elem = interface_elem.find(f'.//{{{IF_NS}}}enabled')
+        enabled = enabled_elem.text.lower() == 'true' if enabled_elem is not None else False
+        ip_elem = interface_elem.find(f'.//{{{IP_NS}}}ip')
+        prefix_elem = interface_elem.find(f'.//{{{IP_NS}}}prefix-length')
+        interfaces[name] = Interface(
+            name=name,
+            ip_address=ip_elem.text if ip_elem is not None else None,
+            prefix_length=int(prefix_elem.text) if prefix_elem is not None else None,
+            enabled=enabled,
+            description=description
+        )
+    return interfaces
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    checker = NetworkConsistencyChecker()
+    reply = synthetic_reply(count)
+
+    # Sanity check: both parsers agree on the first address of each interface
+    new, old = checker.parse_interface_config(reply), legacy_parse(reply)
+    assert new.keys() == old.keys()
+    assert all(new[n].ip_address == old[n].ip_address for n in new)
+
+    print(f"📦 Synthetic reply: {count} interfaces, {len(reply) / 1024:.0f} KiB")
+    results = {}
+    for label, func in (("legacy findall/.//", legacy_parse),
+                        ("single-pass iterparse", checker.parse_interface_config)):
+        best = min(timeit.repeat(lambda: func(reply), number=1, repeat=repeat))
+        results[label] = best
+        print(f"   {label:22} {best * 1000:8.1f} ms  ({best / count * 1e6:.2f} µs/interface)")
+
+    speedup = results["legacy findall/.//"] / results["single-pass iterparse"]
+    print(f"⚡ Speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: edit-config payload building
+Compares per-interface f-string rendering (the previous network-cfg.py /
+reset_devices.py approach) with the memoized builder in netconf_payloads.py,
+for address pushes and same-role resets across many devices.
+
+Usage:
+    python benchmarks/bench_payloads.py [--devices 2000] [--interfaces 8]
+"""
+
+import argparse
+import copy
+import ipaddress
+import os
+import sys
+import time
+from xml.sax.saxutils import escape
+
+from lxml import etree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import netconf_payloads
+from netconf_payloads import IF_NS, NC_NS, interfaces_payload, reset_payload
+
+
+def fstring_payload(interfaces):
+    """Previous network-cfg.py build_device_config()"""
+    entries = []
+    for iface, ip_interface in interfaces.items():
+        entries.append(f'''
+    <interface>
+      <name>{escape(iface)}</name>
+      <ipv4 xmlns="urn:ietf:params:xml:ns:yang:ietf-ip"
+            xmlns:nc="urn:ietf:params:xml:ns:netconf:base:1.0"
+            nc:operation="replace">
+        <enabled>true</enabled>
+        <address>
+          <ip>{ip_interface.ip}</ip>
+          <prefix-length>{ip_interface.network.prefixlen}</prefix-length>
+        </address>
+      </ipv4>
+    </interface>''')
+    return f'''
+<config xmlns="urn:ietf:params:xml:ns:netconf:base:1.0">
+  <interfaces xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">{"".join(entries)}
+  </interfaces>
+</config>'''
+
+
+def tree_reset_payload(interfaces, mode='ip'):
+    """Previous reset_devices.py build_reset_config(), without its cache"""
+    parser = etree.XMLParser(remove_blank_text=True)
+    path = os.path.join(netconf_payloads.MISC_DIR, netconf_payloads.RESET_TEMPLATES[mode])
+    template = etree.parse(path, parser).getroot().find(f'{{{IF_NS}}}interface')
+    config = etree.Element(f'{{{NC_NS}}}config', nsmap={None: NC_NS})
+    container = etree.SubElement(config, f'{{{IF_NS}}}interfaces', nsmap={None: IF_NS})
+    for iface in sorted(interfaces):
+        entry = copy.deepcopy(template)
+        entry.find(f'{{{IF_NS}}}name').text = iface
+        container.append(entry)
+    return etree.tostring(config, pretty_print=True).decode()
+
+
+def timed(func, fleet):
+    start = time.perf_counter()
+    for interfaces in fleet:
+        func(interfaces)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Payload builder benchmark")
+    parser.add_argument("--devices", type=int, default=2000)
+    parser.add_argument("--interfaces", type=int, default=8)
+    args = parser.parse_args()
+
+    hosts = ipaddress.IPv4Network('10.0.0.0/8').hosts()
+    # Every device has the same interface names (same role), distinct addresses
+    fleet = [{f"eth{i}": ipaddress.IPv4Interface(f"{next(hosts)}/30") for i in range(args.interfaces)}
+             for _ in range(args.devices)]
+    names = [frozenset(interfaces) for interfaces in fleet]
+
+    total = args.devices * args.interfaces
+    print(f"📦 {args.devices} devices x {args.interfaces} interfaces")
+    rows = [
+        ("push: f-string", timed(fstring_payload, fleet)),
+        ("push: builder", timed(interfaces_payload, fleet)),
+        ("reset: lxml tree", timed(tree_reset_payload, names)),
+        ("reset: builder", timed(reset_payload, names)),
+    ]
+    for label, seconds in rows:
+        print(f"   {label:22} {seconds * 1000:8.1f} ms  ({seconds / total * 1e6:5.2f} µs/interface)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Scale benchmark suite
+Times the checker and the configuration scripts against simulated fleets of
+growing size (fractions of 100 RAN / 50 routers / 1 core) using the
+in-process NETCONF simulator, so scaling regressions show up without Docker.
+
+Usage:
+    python benchmarks/bench_scale.py
+    python benchmarks/bench_scale.py --scales 0.1,0.5,1 --latency 0.02 --connect-latency 0.2
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'operations'))
+
+from netconf_pool import SessionPool
+from netconf_sim import SIM_HOST, SimulatedFleet
+from network_check import NetworkConsistencyChecker
+import reset_devices
+
+
+def load_network_cfg():
+    """Import operations/network-cfg.py (not a valid module name)"""
+    spec = importlib.util.spec_from_file_location('network_cfg', os.path.join(ROOT, 'operations', 'network-cfg.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def timed(func, *args, **kwargs):
+    """Run func quietly and return its wall time in seconds"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def bench_fleet(scale, args, network_cfg):
+    ran, router, core = max(1, round(100 * scale)), max(1, round(50 * scale)), 1
+    sim = dict(latency=args.latency, jitter=args.jitter, connect_latency=args.connect_latency)
+    results = {'devices': ran + router + core}
+
+    # Checker: a cold sweep (connects) and a warm sweep (pooled sessions)
+    fleet = SimulatedFleet.scaled(ran, router, core, **sim)
+    pool = SessionPool(connect=fleet.connect)
+    checker = NetworkConsistencyChecker(max_workers=args.workers, topology=fleet.topology(), pool=pool)
+    results['check cold'] = timed(checker.run_single_check)
+    results['check warm'] = timed(checker.run_single_check)
+    pool.close_all()
+
+    config, connections = fleet.assignments, fleet.connections()
+
+    # apply_config: sequential per-interface vs bulk parallel
+    with SessionPool(connect=fleet.connect) as pool:
+        results['apply seq'] = timed(network_cfg.apply_config, pool, config, connections)
+    with SessionPool(connect=fleet.connect) as pool:
+        results['apply bulk'] = timed(network_cfg.apply_config_bulk, config, connections, args.workers, pool)
+
+    # reset_device: one device after another vs all devices concurrently
+    def reset(name, pool):
+        return reset_devices.reset_device(SIM_HOST, connections[name]['port'], name, pool,
+                                          interfaces=config[name])
+
+    with SessionPool(connect=fleet.connect) as pool:
+        results['reset seq'] = timed(lambda: [reset(name, pool) for name in config])
+    with SessionPool(connect=fleet.connect) as pool:
+        def reset_all():
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                list(executor.map(lambda name: reset(name, pool), config))
+        results['reset par'] = timed(reset_all)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scale benchmark on simulated NETCONF fleets")
+    parser.add_argument("--scales", default="0.1,0.25,0.5,1",
+                        help="Comma-separated fractions of 100 RAN / 50 router / 1 core (default: 0.1,0.25,0.5,1)")
+    parser.add_argument("--latency", type=float, default=0.005, help="Per-RPC latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.002, help="Per-RPC/connect jitter in seconds")
+    parser.add_argument("--connect-latency", type=float, default=0.05, help="Session setup latency in seconds")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrency for parallel modes")
+    args = parser.parse_args()
+
+    network_cfg = load_network_cfg()
+    columns = ['check cold', 'check warm', 'apply seq', 'apply bulk', 'reset seq', 'reset par']
+
+    print(f"📊 Simulated latency: rpc {args.latency * 1000:.0f} ms ± {args.jitter * 1000:.0f} ms, "
+          f"connect {args.connect_latency * 1000:.0f} ms, {args.workers} workers")
+    print(f"{'devices':>8} " + " ".join(f"{c:>11}" for c in columns))
+    print("-" * (9 + 12 * len(columns)))
+    for scale in (float(s) for s in args.scales.split(',')):
+        results = bench_fleet(scale, args, network_cfg)
+        print(f"{results['devices']:>8} " + " ".join(f"{results[c]:>10.2f}s" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sharded checker sweeps
+Times warm sweeps of a simulated fleet with 1..N local shard processes,
+then kills one shard and restarts it under the same name to show how many
+devices it has to ship again (only those that changed).
+
+Usage:
+    python benchmarks/bench_shards.py [--shards 1,2,4] [--ran 600 --router 300]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from functools import partial
+from multiprocessing import Process
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from netconf_pool import SessionPool
+from netconf_sim import SimulatedFleet
+from network_shard import ShardCoordinator, default_address, run_shard, subset_checker
+
+# Built before the shards fork, so every process sees the same simulated fleet
+FLEET = None
+
+
+def sim_checker(devices, workers):
+    return subset_checker(devices, topology=FLEET.topology(), max_workers=workers,
+                          pool_factory=lambda timeout: SessionPool(connect=FLEET.connect, timeout=timeout))
+
+
+def quiet(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+
+def main():
+    global FLEET
+    parser = argparse.ArgumentParser(description="Sharded checker benchmark")
+    parser.add_argument("--shards", default="1,2,4")
+    parser.add_argument("--ran", type=int, default=600)
+    parser.add_argument("--router", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent devices per shard")
+    args = parser.parse_args()
+
+    FLEET = SimulatedFleet.scaled(args.ran, args.router, 1, latency=args.latency)
+    make_checker = partial(sim_checker, workers=args.workers)
+    print(f"📦 {len(FLEET.by_name)} devices, {args.latency * 1000:.0f} ms per RPC, "
+          f"{args.workers} concurrent devices per shard")
+
+    for count in (int(c) for c in args.shards.split(',')):
+        coordinator = ShardCoordinator(default_address(), topology=FLEET.topology(), fetch_timeout=120)
+        quiet(coordinator.start_local_shards, count, make_checker)
+        quiet(coordinator.run_single_check)  # cold: connects and first snapshots
+        start = time.perf_counter()
+        ok = quiet(coordinator.run_single_check)
+        warm = time.perf_counter() - start
+        print(f"   {count} shard(s): warm sweep {warm:6.2f}s  (all links checked: {ok})")
+
+        if count > 1:
+            # Kill one shard and restart it under the same name
+            shipped = []
+            apply = coordinator.apply_snapshots
+            coordinator.apply_snapshots = lambda snapshots: (shipped.append(len(snapshots)), apply(snapshots))
+            owned = len(coordinator._assigned.get('local-0', []))
+            victim = coordinator._processes[0]
+            victim.terminate()
+            victim.join()
+            quiet(coordinator.run_single_check)
+            replacement = Process(target=run_shard, args=(coordinator.address, 'local-0', make_checker,
+                                                               coordinator.authkey), daemon=True)
+            replacement.start()
+            coordinator._processes[0] = replacement
+            quiet(coordinator.wait_for_shards, count)
+            shipped.clear()
+            quiet(coordinator.run_single_check)
+            print(f"   rejoin of local-0: {sum(shipped)} device snapshots shipped "
+                  f"({len(coordinator._assigned.get('local-0', []))} devices owned again, {owned} before)")
+        quiet(coordinator.close)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Checker Daemon Socket
+Lets a running monitor (network_check.py INTERVAL --serve) answer queries
+over a local Unix socket from its resident sessions and parsed state, so a
+one-shot question does not pay for imports, SSH handshakes and a sweep.
+
+Protocol: one JSON request per line, one JSON reply per line.
+
+    {"cmd": "links"}                    -> every link with status and details
+    {"cmd": "devices"}                  -> fetch status of every device
+    {"cmd": "device", "name": "RAN"}    -> interfaces of one device
+    {"cmd": "refresh", "name": "RAN"}   -> re-fetch now, then as "device" plus link changes
+                                           (even with an open circuit; not on a sharded checker)
+
+This module only imports the standard library: network_check.py hands
+client commands to client_main() before its own heavy imports.
+
+Usage:
+    python network_check.py links
+    python network_check.py device RAN
+    python network_check.py refresh Router --socket /run/network-check.sock
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+CLIENT_COMMANDS = ('links', 'devices', 'device', 'refresh')
+
+
+def default_socket_path() -> str:
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime:
+        return os.path.join(runtime, 'network-check.sock')
+    return f"/tmp/network-check-{os.getuid()}.sock"
+
+
+# ---------------------------------------------------------------------------
+# Server side (runs inside the monitor)
+
+def _interfaces(device) -> list:
+    return [{
+        'name': name,
+        'enabled': interface.enabled,
+        'address': interface.ip_with_prefix,
+        'extra_addresses': [f"{ip}/{prefix}" for ip, prefix in interface.addresses[1:]],
+        'description': interface.description,
+    } for name, interface in sorted(device.interfaces.items())]
+
+
+def _device_summary(device) -> dict:
+    return {
+        'name': device.name,
+        'host': device.host,
+        'port': device.port,
+        'status': device.fetch_status,
+        'latency_ms': round(device.fetch_latency * 1000, 1) if device.fetch_latency is not None else None,
+        'interfaces': len(device.interfaces),
+        'last_changed': device.last_changed.isoformat(timespec='seconds') if device.last_changed else None,
+    }
+
+
+class CheckerDaemon:
+    """Serve a NetworkConsistencyChecker's state on a Unix socket"""
+
+    def __init__(self, checker, path: str = None):
+        self.checker = checker
+        self.path = path or default_socket_path()
+        self._server = None
+
+    # -- requests ---------------------------------------------------------------
+
+    def handle(self, request: dict) -> dict:
+        cmd = request.get('cmd')
+        checker = self.checker
+        if cmd == 'links':
+            with checker._state_lock:
+                states = dict(checker.link_states)
+                changed_at = dict(checker.link_changed_at)
+            return {'ok': True, 'links': [{
+                'name': link.name,
+                'status': states.get(link.name, ("pending", ""))[0],
+                'details': states.get(link.name, ("pending", ""))[1],
+                'since': changed_at[link.name].isoformat(timespec='seconds') if link.name in changed_at else None,
+            } for link in checker.network_links]}
+        if cmd == 'devices':
+            return {'ok': True, 'devices': [_device_summary(d) for d in checker.devices.values()]}
+        if cmd in ('device', 'refresh'):
+            device = checker.devices.get(request.get('name'))
+            if device is None:
+                return {'ok': False, 'error': f"unknown device {request.get('name')!r}"}
+            reply = {'ok': True}
+            if cmd == 'refresh':
+                if not checker.fetches_locally:
+                    return {'ok': False, 'error': f"{device.name} is polled by shard {checker.owner(device.name)}; "
+                                                  f"refresh is not available on a sharded checker"}
+                # Asked for explicitly: bypasses an open circuit
+                fetched = checker.fetch_device(device, force=True)
+                changes = checker.update_link_states() if fetched and device.config_changed else []
+                if changes:
+                    checker.print_link_changes(changes)
+                reply['fetched'] = fetched
+                reply['changes'] = [{'name': c.link.name, 'old_status': c.old_status,
+                                     'status': c.new_status, 'details': c.details} for c in changes]
+            reply['device'] = _device_summary(device)
+            reply['interfaces'] = _interfaces(device)
+            return reply
+        return {'ok': False, 'error': f"unknown command {cmd!r}"}
+
+    # -- socket -----------------------------------------------------------------
+
+    def start(self):
+        """Listen in a background thread"""
+        if os.path.exists(self.path):
+            try:
+                request(self.path, {'cmd': 'devices'}, timeout=1.0)
+            except OSError:
+                os.unlink(self.path)  # stale socket of a dead daemon
+            else:
+                raise RuntimeError(f"a checker daemon is already serving {self.path}")
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        reply = daemon.handle(json.loads(line))
+                    except Exception as e:
+                        reply = {'ok': False, 'error': str(e)}
+                    self.wfile.write(json.dumps(reply).encode() + b'\n')
+                    self.wfile.flush()
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        umask = os.umask(0o077)  # the socket is only for the monitor's user
+        try:
+            self._server = Server(self.path, Handler)
+        finally:
+            os.umask(umask)
+        threading.Thread(target=self._server.serve_forever, name="checker-daemon", daemon=True).start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+# ---------------------------------------------------------------------------
+# Client side (thin: standard library only)
+
+def request(path: str, message: dict, timeout: float = 60.0) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(json.dumps(message).encode() + b'\n')
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data)
+
+
+def _print_interfaces(reply: dict):
+    device = reply['device']
+    latency = f"{device['latency_ms']:.0f} ms" if device['latency_ms'] is not None else "n/a"
+    print(f"📱 {device['name']} ({device['host']}:{device['port']}): {device['status']} [{latency}]")
+    for interface in reply['interfaces']:
+        enabled = "🟢" if interface['enabled'] else "🔴"
+        address = interface['address']
+        if interface['extra_addresses']:
+            address += f" (+{len(interface['extra_addresses'])})"
+        description = f" ({interface['description']})" if interface['description'] else ""
+        print(f"   {interface['name']:12} {enabled} {address:18} {description}")
+
+
+def client_main(argv) -> int:
+    parser = argparse.ArgumentParser(prog="network_check.py",
+                                     description="Query a running checker daemon (network_check.py INTERVAL --serve)")
+    parser.add_argument("cmd", choices=CLIENT_COMMANDS)
+    parser.add_argument("name", nargs="?", help="Device name (device, refresh)")
+    parser.add_argument("--socket", default=default_socket_path(), help="Daemon socket path")
+    parser.add_argument("--json", action="store_true", help="Print the raw JSON reply")
+    args = parser.parse_args(argv)
+    if args.cmd in ('device', 'refresh') and not args.name:
+        parser.error(f"{args.cmd} needs a device name")
+
+    try:
+        reply = request(args.socket, {'cmd': args.cmd, 'name': args.name})
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"❌ No checker daemon on {args.socket} (start one with: network_check.py 30 --serve)")
+        return 1
+    if args.json:
+        print(json.dumps(reply, indent=2))
+        return 0 if reply.get('ok') else 1
+    if not reply.get('ok'):
+        print(f"❌ {reply.get('error')}")
+        return 1
+
+    if args.cmd == 'links':
+        print("🔗 Network Link Status:")
+        for link in reply['links']:
+            since = f" @ {link['since']}" if link['since'] else ""
+            print(f"   {link['name']:35} {link['status']} {link['details']}{since}")
+    elif args.cmd == 'devices':
+        print("📡 Device Status:")
+        for device in reply['devices']:
+            latency = f"{device['latency_ms']:.0f} ms" if device['latency_ms'] is not None else "n/a"
+            print(f"   {device['name']:8} ({device['host']}:{device['port']}): {device['status']} - "
+                  f"{device['interfaces']} interfaces [{latency}]")
+    else:
+        if args.cmd == 'refresh':
+            print("✅ Refreshed" if reply['fetched'] else "❌ Refresh failed, showing last known state")
+            for change in reply['changes']:
+                print(f"   🔁 {change['name']:35} {change['old_status'] or '(new)'} → {change['status']} "
+                      f"{change['details']}")
+        _print_interfaces(reply)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(client_main(sys.argv[1:]))
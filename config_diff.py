@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Differential Config Push
+Compares the desired interface addresses (NETWORK_CONFIG form) with the
+running state of a device and keeps only the leaves that differ, so a
+re-run against a converged fleet sends no edit-config at all.
+
+- Interface missing (or without ipv4): the full replace entry, as before
+- ipv4 disabled: merge <enabled>true</enabled>
+- Desired address missing or with another prefix: merge that address
+- Other addresses: removed one by one
+
+The running state comes from one small get-config per device (state_filter)
+or from a caller that already has it (e.g. the checker's interfaces, or a
+running checker daemon via checker_state()).
+
+Used by operations/network-cfg.py and ansible/filter_plugins.
+"""
+
+import io
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from ipaddress import IPv4Interface
+from typing import Dict, Mapping, Optional, Tuple, Union
+from xml.sax.saxutils import escape
+
+from lxml import etree
+
+from netconf_payloads import IF_NS, IP_NS, config_payload, ipv4_delta_entry, ipv4_entry
+
+IF_INTERFACE_TAG = f'{{{IF_NS}}}interface'
+IF_NAME_TAG = f'{{{IF_NS}}}name'
+IP_IPV4_TAG = f'{{{IP_NS}}}ipv4'
+IP_ENABLED_TAG = f'{{{IP_NS}}}enabled'
+IP_ADDRESS_TAG = f'{{{IP_NS}}}address'
+IP_IP_TAG = f'{{{IP_NS}}}ip'
+IP_PREFIX_LENGTH_TAG = f'{{{IP_NS}}}prefix-length'
+
+Address = Union[IPv4Interface, str]
+
+
+@dataclass
+class InterfaceState:
+    """The running ipv4 state of one interface that a push can change"""
+    has_ipv4: bool = False
+    ipv4_enabled: bool = True
+    # ip -> prefix length
+    addresses: Dict[str, Optional[int]] = field(default_factory=dict)
+
+
+def state_filter(names) -> Tuple[str, str]:
+    """get-config filter for the ipv4 state of the given interfaces"""
+    entries = "".join(
+        f'<interface><name>{escape(n)}</name><ipv4 xmlns="{IP_NS}"><enabled/><address/></ipv4></interface>'
+        for n in sorted(names)
+    )
+    return ('subtree', f'<interfaces xmlns="{IF_NS}">{entries}</interfaces>')
+
+
+def parse_state(xml_data) -> Dict[str, InterfaceState]:
+    """InterfaceState per interface name from a get-config reply"""
+    if isinstance(xml_data, str):
+        xml_data = xml_data.encode()
+    states = {}
+    for _, elem in etree.iterparse(io.BytesIO(xml_data), events=('end',), tag=IF_INTERFACE_TAG):
+        name = elem.findtext(IF_NAME_TAG)
+        if not name:
+            continue
+        state = InterfaceState()
+        ipv4 = elem.find(IP_IPV4_TAG)
+        if ipv4 is not None:
+            state.has_ipv4 = True
+            state.ipv4_enabled = (ipv4.findtext(IP_ENABLED_TAG) or 'true').strip() == 'true'
+            for address in ipv4.iterchildren(IP_ADDRESS_TAG):
+                ip = (address.findtext(IP_IP_TAG) or '').strip()
+                prefix = address.findtext(IP_PREFIX_LENGTH_TAG)
+                if ip:
+                    state.addresses[ip] = int(prefix) if prefix else None
+        states[name.strip()] = state
+        elem.clear(keep_tail=False)
+    return states
+
+
+def _as_state(current) -> Optional[InterfaceState]:
+    """Accept InterfaceState or any Interface-like object with .addresses"""
+    if current is None or isinstance(current, InterfaceState):
+        return current
+    addresses = dict(current.addresses)
+    return InterfaceState(has_ipv4=bool(addresses), addresses=addresses)
+
+
+def diff_entries(desired: Mapping[str, Address], current: Mapping[str, object]) -> Dict[str, str]:
+    """Serialized <interface> entry for every interface that differs"""
+    entries = {}
+    for name, address in desired.items():
+        address = address if isinstance(address, IPv4Interface) else IPv4Interface(address)
+        ip, prefix_length = str(address.ip), address.network.prefixlen
+        state = _as_state(current.get(name))
+        if state is None or not state.has_ipv4:
+            entries[name] = ipv4_entry(name, ip, prefix_length)
+            continue
+
+        stale = sorted(a for a in state.addresses if a != ip)
+        wrong = state.addresses.get(ip, -1) != prefix_length
+        if stale or wrong or not state.ipv4_enabled:
+            entries[name] = ipv4_delta_entry(
+                name,
+                address=(ip, prefix_length) if wrong else None,
+                remove=stale,
+                enable=not state.ipv4_enabled,
+            )
+    return entries
+
+
+def delta_payload(desired: Mapping[str, Address], current: Mapping[str, object]) -> Optional[str]:
+    """<config> with only the changes a device needs, or None if converged"""
+    entries = diff_entries(desired, current)
+    return config_payload(entries.values()) if entries else None
+
+
+def fetch_state(conn, names) -> Dict[str, InterfaceState]:
+    """Read the state of the given interfaces over a (sync) session"""
+    reply = conn.get_config(source='running', filter=state_filter(names))
+    return parse_state(reply.data_xml)
+
+
+def _cached_interface(interface: dict) -> InterfaceState:
+    addresses = {}
+    for address in ([interface['address']] if '/' in interface['address'] else []) + interface['extra_addresses']:
+        ip, _, prefix = address.partition('/')
+        addresses[ip] = int(prefix)
+    return InterfaceState(has_ipv4=bool(addresses), addresses=addresses)
+
+
+def checker_state(path: str, devices) -> Dict[str, Dict[str, InterfaceState]]:
+    """State of the given devices as a checker daemon last polled them
+
+    Devices the daemon does not know or could not poll are left out, to be
+    read live. The checker does not fetch the ipv4 <enabled> leaf, so
+    cached interfaces count as enabled, and its state is as old as its
+    last poll of the device.
+    """
+    from checker_daemon import request
+
+    states = {}
+    for device in devices:
+        reply = request(path, {'cmd': 'device', 'name': device})
+        if reply.get('ok') and reply['device']['status'] == 'ok':
+            states[device] = {i['name']: _cached_interface(i) for i in reply['interfaces']}
+    return states
+
+
+def plan_fleet(config, connections, pool, max_workers: int = 16,
+               current: Optional[Mapping[str, Mapping[str, object]]] = None) -> Dict[str, Optional[str]]:
+    """Delta payload per device (None when converged)
+
+    Devices found in current are diffed without an RPC; the others are read
+    in parallel through the pool. A device that cannot be read raises.
+    """
+    current = current or {}
+
+    def plan(device):
+        state = current.get(device)
+        if state is None:
+            target = connections[device]
+            with pool.session(target['host'], target['port']) as conn:
+                state = fetch_state(conn, config[device])
+        return delta_payload(config[device], state)
+
+    devices = list(config)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(devices) or 1))) as executor:
+        return dict(zip(devices, executor.map(plan, devices)))
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Datastore Comparison
+Answers the assignment's question "do running, startup and candidate
+differ?" for the whole fleet in one pass (network_check.py --datastores):
+
+- running != startup: unsaved changes, lost when the device restarts
+- candidate != running: uncommitted changes, waiting for a commit
+
+Each device's three get-config replies are requested at once over its one
+session, then canonicalized: whitespace stripped, siblings sorted by name
+and list entries by their YANG keys (from yang_schema when the modules are
+available, else their <name>), and every top-level entry (one interface,
+one other container) serialized with C14N and hashed. Datastores are
+compared by a digest over those hashes; only when they differ are the
+entry hashes compared to name the interfaces that drifted.
+"""
+
+import asyncio
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from lxml import etree
+
+DATASTORES = ('running', 'startup', 'candidate')
+# Capability a server must advertise for each optional datastore
+DATASTORE_CAPABILITIES = {
+    'startup': 'urn:ietf:params:netconf:capability:startup:1.0',
+    'candidate': 'urn:ietf:params:netconf:capability:candidate:1.0',
+}
+IP_NS = 'urn:ietf:params:xml:ns:yang:ietf-ip'
+
+
+def available_datastores(capabilities) -> Tuple[str, ...]:
+    """running plus the startup/candidate datastores a server advertises"""
+    return tuple(ds for ds in DATASTORES
+                 if ds not in DATASTORE_CAPABILITIES or DATASTORE_CAPABILITIES[ds] in capabilities)
+
+
+def _qname(elem) -> str:
+    ns, _, local = elem.tag[1:].partition('}') if elem.tag.startswith('{') else ('', '', elem.tag)
+    return f"{ns}|{local}"
+
+
+def _local(elem) -> str:
+    return etree.QName(elem).localname
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@dataclass
+class DatastoreSnapshot:
+    """Canonical hashes of one datastore of one device"""
+    source: str
+    digest: str
+    # "interfaces/eth0" -> hash of the C14N of that entry
+    subtrees: Dict[str, str] = field(default_factory=dict)
+    # The canonical entries, to describe the ones that differ
+    entries: Dict[str, etree._Element] = field(default_factory=dict)
+
+
+class Canonicalizer:
+    """Turn get-config replies into DatastoreSnapshots"""
+
+    def __init__(self, schema: Optional[dict] = None):
+        self.root = schema['root'] if schema else None
+
+    @classmethod
+    def load(cls) -> 'Canonicalizer':
+        """With list keys from the lab YANG modules, if they compile"""
+        try:
+            from yang_schema import YangError, load_schema
+            return cls(load_schema())
+        except (ImportError, OSError, ValueError, YangError) as e:
+            print(f"⚠️  YANG schema unavailable ({e}), sorting list entries by <name>")
+            return cls()
+
+    def canonicalize(self, elem, node: Optional[dict] = None):
+        """Strip whitespace and sort the children of elem, recursively"""
+        children = [c for c in elem if isinstance(c.tag, str)]
+        for comment in (c for c in elem if not isinstance(c.tag, str)):
+            elem.remove(comment)
+        if not children:
+            elem.text = (elem.text or '').strip() or None
+            elem.tail = None
+            return
+        elem.text = elem.tail = None
+
+        schema_children = (node or {}).get('children', {})
+        keyed = []
+        for child in children:
+            child_node = schema_children.get(_qname(child))
+            self.canonicalize(child, child_node)
+            key = self.list_key(child, child_node)
+            # Entries without a known key are ordered by their whole content
+            content = etree.tostring(child, method='c14n') if not key and len(child) else b''
+            keyed.append(((_qname(child), key, child.text or '', content), child))
+        keyed.sort(key=lambda item: item[0])
+        elem[:] = [child for _, child in keyed]
+
+    def list_key(self, elem, node: Optional[dict]) -> Tuple[str, ...]:
+        """Key leaf values of a list entry (empty for other nodes)"""
+        if node is not None:
+            names = node.get('keys', [])
+        else:
+            names = ['name']
+        values = []
+        for name in names:
+            value = next((c.text for c in elem if isinstance(c.tag, str) and _local(c) == name), None)
+            if value is None and node is None:
+                return ()
+            values.append(value or '')
+        return tuple(values)
+
+    def snapshot(self, source: str, data_xml) -> DatastoreSnapshot:
+        """Canonicalize a <data> reply and hash its top-level entries"""
+        if isinstance(data_xml, str):
+            data_xml = data_xml.encode()
+        data = etree.fromstring(data_xml or b'<data/>', etree.XMLParser(remove_blank_text=True))
+
+        groups: Dict[str, List[etree._Element]] = {}
+        for top in (c for c in data if isinstance(c.tag, str)):
+            top_node = self.root.get(_qname(top)) if self.root else None
+            self.canonicalize(top, top_node)
+            if not len(top):
+                groups.setdefault(_local(top), []).append(top)
+            for entry in top:
+                entry_node = (top_node or {}).get('children', {}).get(_qname(entry))
+                key = self.list_key(entry, entry_node)
+                # Unkeyed siblings share a label and are hashed together
+                groups.setdefault(f"{_local(top)}/{','.join(key) if key else _local(entry)}", []).append(entry)
+
+        snapshot = DatastoreSnapshot(source, '')
+        for label, entries in groups.items():
+            snapshot.subtrees[label] = _digest(b''.join(etree.tostring(e, method='c14n') for e in entries))
+            snapshot.entries[label] = entries[0]
+        snapshot.digest = _digest(''.join(f"{label}={digest};" for label, digest
+                                          in sorted(snapshot.subtrees.items())).encode())
+        return snapshot
+
+
+def describe(entry: Optional[etree._Element]) -> str:
+    """Short form of an entry: its IPv4 addresses for interfaces"""
+    if entry is None:
+        return "(absent)"
+    if _local(entry) != 'interface':
+        return "(differs)"
+    ipv4 = entry.find(f'{{{IP_NS}}}ipv4')
+    if ipv4 is None:
+        return "no ipv4"
+    addresses = [f"{a.findtext(f'{{{IP_NS}}}ip')}/{a.findtext(f'{{{IP_NS}}}prefix-length')}"
+                 for a in ipv4.iterchildren(f'{{{IP_NS}}}address')]
+    disabled = " (disabled)" if ipv4.findtext(f'{{{IP_NS}}}enabled') == 'false' else ""
+    return (", ".join(addresses) or "no address") + disabled
+
+
+@dataclass
+class SubtreeDelta:
+    """One top-level entry that differs between two datastores"""
+    label: str
+    left: str
+    right: str
+
+
+def diff_snapshots(left: DatastoreSnapshot, right: DatastoreSnapshot) -> List[SubtreeDelta]:
+    """Entries whose hashes differ; nothing to walk when the digests match"""
+    if left.digest == right.digest:
+        return []
+    deltas = []
+    for label in sorted(left.subtrees.keys() | right.subtrees.keys()):
+        if left.subtrees.get(label) != right.subtrees.get(label):
+            deltas.append(SubtreeDelta(label, describe(left.entries.get(label)),
+                                       describe(right.entries.get(label))))
+    return deltas
+
+
+@dataclass
+class DatastoreDrift:
+    """Differences between the datastores of one device"""
+    device: str
+    datastores: Tuple[str, ...] = ()
+    # running vs startup: lost on restart
+    unsaved: List[SubtreeDelta] = field(default_factory=list)
+    # candidate vs running: not committed yet
+    uncommitted: List[SubtreeDelta] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def in_sync(self) -> bool:
+        return self.error is None and not (self.unsaved or self.uncommitted)
+
+
+def compare(device: str, snapshots: Dict[str, DatastoreSnapshot]) -> DatastoreDrift:
+    drift = DatastoreDrift(device, tuple(snapshots))
+    running = snapshots['running']
+    if 'startup' in snapshots:
+        drift.unsaved = diff_snapshots(running, snapshots['startup'])
+    if 'candidate' in snapshots:
+        drift.uncommitted = diff_snapshots(snapshots['candidate'], running)
+    return drift
+
+
+def fetch_snapshots(conn, canonicalizer: Canonicalizer, executor=None) -> Dict[str, DatastoreSnapshot]:
+    """Read every datastore of a device over one (sync) session
+
+    With an executor, startup and candidate are requested while running is
+    in flight; ncclient matches the replies by message-id.
+    """
+    def fetch(source):
+        return canonicalizer.snapshot(source, conn.get_config(source=source).data_xml)
+
+    sources = available_datastores(conn.server_capabilities)
+    futures = {s: executor.submit(fetch, s) for s in sources[1:]} if executor else {}
+    snapshots = {s: fetch(s) for s in sources if s not in futures}
+    snapshots.update((s, future.result()) for s, future in futures.items())
+    return snapshots
+
+
+async def fetch_snapshots_async(conn, canonicalizer: Canonicalizer) -> Dict[str, DatastoreSnapshot]:
+    """fetch_snapshots() over an AsyncManager: the requests are pipelined"""
+    sources = available_datastores(conn.server_capabilities)
+    replies = await asyncio.gather(*(conn.get_config(source=s) for s in sources))
+    return {s: canonicalizer.snapshot(s, reply.data_xml) for s, reply in zip(sources, replies)}
+
+
+def print_drift_report(drifts: List[DatastoreDrift], elapsed: float):
+    print(f"💾 Datastore Comparison - {len(drifts)} devices in {elapsed:.2f}s")
+    for drift in drifts:
+        if drift.error:
+            print(f"   {drift.device:8} ❌ {drift.error}")
+            continue
+        missing = [ds for ds in DATASTORES if ds not in drift.datastores]
+        note = f" (no {', '.join(missing)})" if missing else ""
+        if drift.in_sync:
+            print(f"   {drift.device:8} ✅ {' = '.join(drift.datastores)}{note}")
+            continue
+        if drift.unsaved:
+            print(f"   {drift.device:8} ⚠️  unsaved: running ≠ startup, lost on restart{note}")
+            for delta in drift.unsaved:
+                print(f"      {delta.label:24} running {delta.left}, startup {delta.right}")
+        if drift.uncommitted:
+            print(f"   {drift.device:8} ⚠️  uncommitted: candidate ≠ running{note}")
+            for delta in drift.uncommitted:
+                print(f"      {delta.label:24} candidate {delta.left}, running {delta.right}")
+    print()
+
+    unsaved = sum(1 for d in drifts if d.unsaved)
+    uncommitted = sum(1 for d in drifts if d.uncommitted)
+    failed = sum(1 for d in drifts if d.error)
+    print(f"📊 Summary: {sum(1 for d in drifts if d.in_sync)} in sync, {unsaved} with unsaved changes, "
+          f"{uncommitted} with uncommitted changes, {failed} unreachable")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Device Health Tracking
+Per-device latency history, adaptive timeouts and a circuit breaker, so an
+unreachable device neither costs the full connect timeout on every sweep
+nor holds a worker that a healthy device could use.
+
+- Timeouts: a multiple of the device's observed latency percentile,
+  clamped to [min_timeout, max_timeout]; max_timeout until enough samples
+  are known. min_timeout leaves room for an SSH handshake on reconnect.
+- Circuit breaker: after failure_threshold consecutive failures a device
+  is "open" and skipped without any RPC. Once its probe delay has elapsed
+  one fetch is let through ("half-open"). Success closes the circuit; a
+  failure reopens it with the delay doubled (probe_base .. probe_max, with
+  jitter so that devices which failed together are not probed together).
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+@dataclass
+class DeviceHealth:
+    """Latency samples and breaker state of one device"""
+    samples: Deque[float] = field(default_factory=lambda: deque(maxlen=50))
+    # Consecutive failed fetches
+    failures: int = 0
+    state: str = CLOSED
+    # Times the circuit reopened in a row (exponent of the probe delay)
+    reopened: int = 0
+    probe_at: float = 0.0
+    last_error: Optional[str] = None
+
+
+class HealthTracker:
+    """Adaptive timeouts and circuit breakers for a fleet of devices"""
+
+    def __init__(self, min_timeout: float = 2.0, max_timeout: float = 10.0,
+                 multiplier: float = 4.0, percentile: float = 0.95, min_samples: int = 5,
+                 failure_threshold: int = 2, probe_base: float = 30.0, probe_max: float = 600.0,
+                 jitter: float = 0.1, clock: Callable[[], float] = time.monotonic):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.multiplier = multiplier
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.failure_threshold = max(1, failure_threshold)
+        self.probe_base = probe_base
+        self.probe_max = probe_max
+        self.jitter = jitter
+        self.clock = clock
+        self.devices: Dict[str, DeviceHealth] = {}
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    def _health(self, name: str) -> DeviceHealth:
+        health = self.devices.get(name)
+        if health is None:
+            health = self.devices[name] = DeviceHealth()
+        return health
+
+    def latency(self, name: str) -> Optional[float]:
+        """The tracked latency percentile of a device, if enough is known"""
+        with self._lock:
+            samples = sorted(self._health(name).samples)
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(self.percentile * len(samples)))]
+
+    def timeout(self, name: str) -> float:
+        """Connect/RPC timeout for the next fetch of a device"""
+        latency = self.latency(name)
+        if latency is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, latency * self.multiplier))
+
+    def allow(self, name: str) -> bool:
+        """Whether a device should be fetched now; an open one only for its probe"""
+        with self._lock:
+            health = self._health(name)
+            if health.state == CLOSED:
+                return True
+            if health.state == OPEN and self.clock() >= health.probe_at:
+                health.state = HALF_OPEN
+                return True
+            # Open and not due, or a probe is already in flight
+            return False
+
+    def record_success(self, name: str, latency: float) -> bool:
+        """Record a successful fetch; True if it closed an open circuit"""
+        with self._lock:
+            health = self._health(name)
+            health.samples.append(latency)
+            recovered = health.state != CLOSED
+            health.state = CLOSED
+            health.failures = 0
+            health.reopened = 0
+            health.last_error = None
+            return recovered
+
+    def record_failure(self, name: str, error: Optional[str] = None) -> bool:
+        """Record a failed fetch; True if it opened (or reopened) the circuit"""
+        with self._lock:
+            health = self._health(name)
+            health.failures += 1
+            health.last_error = error
+            if health.state == HALF_OPEN:
+                health.reopened += 1
+            elif health.state == OPEN or health.failures < self.failure_threshold:
+                return False
+            delay = min(self.probe_max, self.probe_base * 2 ** health.reopened)
+            delay *= 1 + self._random.uniform(-self.jitter, self.jitter)
+            health.state = OPEN
+            health.probe_at = self.clock() + delay
+            return True
+
+    def state(self, name: str) -> str:
+        with self._lock:
+            return self._health(name).state
+
+    def probe_in(self, name: str) -> Optional[float]:
+        """Seconds until an open device is probed again"""
+        with self._lock:
+            health = self._health(name)
+            if health.state != OPEN:
+                return None
+            return max(0.0, health.probe_at - self.clock())
+
+    def open_devices(self) -> List[str]:
+        with self._lock:
+            return sorted(name for name, health in self.devices.items() if health.state != CLOSED)
@@ -6,25 +6,12 @@ Exercise 2 Solution Script
 - Reference: See 'Reference Commands' section in the project README for equivalent netconf-console2 usage.
 """
 
+from ipaddress import IPv4Interface
+
 from ncclient import manager
 from lxml import etree
 
-# Example XML payload for eth0 IPv4 address (used in edit-config)
-EDIT_CONFIG_TEMPLATE = '''
-<config xmlns="urn:ietf:params:xml:ns:netconf:base:1.0">
-    <interfaces xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">
-        <interface>
-            <name>eth0</name>
-            <ipv4 xmlns="urn:ietf:params:xml:ns:yang:ietf-ip">
-                <address>
-                    <ip>{ip}</ip>
-                    <prefix-length>{netmask}</prefix-length>
-                </address>
-            </ipv4>
-        </interface>
-    </interfaces>
-</config>
-'''
+from netconf_payloads import interfaces_payload
 
 # List of device connection details and eth0 config
 devices = [
@@ -59,7 +46,9 @@ def edit_config_eth0(m, eth0):
     Reference command:
       netconf-console2 --host <host> --port <port> --edit-config <xml-file> --db running
     """
-    config_xml = EDIT_CONFIG_TEMPLATE.format(ip=eth0.get('ip'), netmask=eth0.get('prefix-length'))
+    address = IPv4Interface(f"{eth0.get('ip')}/{eth0.get('prefix-length')}")
+    # Plain merge of the address, as in the netconf-console2 example
+    config_xml = interfaces_payload({'eth0': address}, operation=None, enabled=None)
     try:
         response = m.edit_config(target='running', config=config_xml, operation='replace')
         print("edit-config response:", response)
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Columnar Interface Store
+Keeps the interfaces of the whole fleet in packed columns instead of one
+dataclass per interface, so a long-running monitor over 100k interfaces
+stays small:
+
+- ip / netmask:   array('I') of packed IPv4 addresses
+- prefix length:  array('B')
+- enabled, has IP: bitsets
+- names and descriptions: interned strings
+
+Devices see their interfaces through a read-only mapping of lightweight
+views exposing the same attributes as network_check.Interface.
+same_subnet_codes() checks many links at once, with numpy when it is
+installed and a plain loop over the columns otherwise.
+"""
+
+import ipaddress
+import sys
+import threading
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional, only speeds up same_subnet_codes()
+    np = None
+
+# Result codes of same_subnet_codes(), in order of precedence
+LINK_OK = 0
+MISSING_1 = 1
+MISSING_2 = 2
+DISABLED_1 = 3
+DISABLED_2 = 4
+NO_IP_1 = 5
+NO_IP_2 = 6
+NO_NETWORK = 7
+DIFFERENT_NETWORKS = 8
+UNEXPECTED_NETWORK = 9
+SAME_IP = 10
+
+
+def prefix_mask(prefix_length: int) -> int:
+    return (0xFFFFFFFF << (32 - prefix_length)) & 0xFFFFFFFF if prefix_length else 0
+
+
+class Bitset:
+    """Growable bitset backed by a bytearray"""
+
+    __slots__ = ('bits',)
+
+    def __init__(self):
+        self.bits = bytearray()
+
+    def __getitem__(self, i: int) -> bool:
+        return bool(self.bits[i >> 3] >> (i & 7) & 1)
+
+    def __setitem__(self, i: int, value: bool):
+        byte = i >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte - len(self.bits) + 1))
+        if value:
+            self.bits[byte] |= 1 << (i & 7)
+        else:
+            self.bits[byte] &= ~(1 << (i & 7)) & 0xFF
+
+
+class InterfaceView:
+    """Read-only view of one row, with the attributes of Interface"""
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store: 'InterfaceStore', row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def name(self) -> str:
+        return self._store.names[self._row]
+
+    @property
+    def description(self) -> str:
+        return self._store.descriptions[self._row]
+
+    @property
+    def enabled(self) -> bool:
+        return self._store.enabled[self._row]
+
+    @property
+    def ip_address(self) -> Optional[str]:
+        store, row = self._store, self._row
+        if not store.has_ip[row]:
+            return None
+        raw = store.raw_ips.get(row)
+        return raw if raw is not None else str(ipaddress.IPv4Address(store.ip[row]))
+
+    @property
+    def prefix_length(self) -> Optional[int]:
+        return self._store.prefix[self._row] or None
+
+    @property
+    def addresses(self) -> List[Tuple[str, int]]:
+        if not self._store.has_ip[self._row]:
+            return []
+        first = [(self.ip_address, self.prefix_length)]
+        return first + list(self._store.extra_addresses.get(self._row, ()))
+
+    @property
+    def network(self) -> Optional[ipaddress.IPv4Network]:
+        store, row = self._store, self._row
+        prefix = store.prefix[row]
+        if not store.has_ip[row] or not prefix:
+            return None
+        return ipaddress.IPv4Network((store.ip[row] & store.netmask[row], prefix))
+
+    @property
+    def ip_with_prefix(self) -> str:
+        if self.ip_address and self.prefix_length:
+            return f"{self.ip_address}/{self.prefix_length}"
+        return "No IP"
+
+    def __repr__(self):
+        return f"InterfaceView({self.name!r}, {self.ip_with_prefix!r}, enabled={self.enabled})"
+
+
+class DeviceInterfaces(Mapping):
+    """Interfaces of one device: interface name -> InterfaceView"""
+
+    __slots__ = ('_store', '_rows')
+
+    def __init__(self, store: 'InterfaceStore', rows: Dict[str, int]):
+        self._store = store
+        self._rows = rows
+
+    def __getitem__(self, name: str) -> InterfaceView:
+        return InterfaceView(self._store, self._rows[name])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def row(self, name: str) -> int:
+        """Row of an interface, or -1 if the device does not have it"""
+        return self._rows.get(name, -1)
+
+
+class InterfaceStore:
+    """Packed interface columns for every device of the fleet"""
+
+    def __init__(self):
+        self.ip = array('I')
+        self.netmask = array('I')
+        self.prefix = array('B')
+        self.enabled = Bitset()
+        self.has_ip = Bitset()
+        self.names: List[str] = []
+        self.descriptions: List[str] = []
+        # Rare cases kept out of the columns
+        self.extra_addresses: Dict[int, Tuple[Tuple[str, int], ...]] = {}
+        self.raw_ips: Dict[int, str] = {}
+        self._free: List[int] = []
+        # Rows of a replaced mapping are only reused one assignment later,
+        # so a reader still holding it never sees another device's data
+        self._current: Dict[str, List[int]] = {}
+        self._retired: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names) - len(self._free)
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        self.ip.append(0)
+        self.netmask.append(0)
+        self.prefix.append(0)
+        self.names.append("")
+        self.descriptions.append("")
+        return len(self.names) - 1
+
+    def _release(self, rows: Iterable[int]):
+        for row in rows:
+            self.names[row] = ""
+            self.descriptions[row] = ""
+            self.extra_addresses.pop(row, None)
+            self.raw_ips.pop(row, None)
+            self._free.append(row)
+
+    def _write(self, row: int, name: str, ip_address: Optional[str], prefix_length: Optional[int],
+               enabled: bool, description: str, addresses: Sequence[Tuple[str, int]]):
+        self.names[row] = sys.intern(name)
+        self.descriptions[row] = sys.intern(description or "")
+        self.enabled[row] = bool(enabled)
+        self.has_ip[row] = bool(ip_address)
+        packed = 0
+        if ip_address:
+            try:
+                packed = int(ipaddress.IPv4Address(ip_address))
+            except ValueError:
+                self.raw_ips[row] = ip_address
+                prefix_length = None
+        prefix = prefix_length if prefix_length and 0 < prefix_length <= 32 else 0
+        self.ip[row] = packed
+        self.prefix[row] = prefix
+        self.netmask[row] = prefix_mask(prefix)
+        if len(addresses) > 1:
+            self.extra_addresses[row] = tuple(addresses[1:])
+
+    def assign(self, device: str, interfaces: Mapping) -> DeviceInterfaces:
+        """Store the interfaces of a device and return its new mapping
+
+        interfaces maps names to Interface-like objects (dataclasses or
+        views of this store).
+        """
+        entries = [(name, i.ip_address, i.prefix_length, i.enabled, i.description, list(i.addresses))
+                   for name, i in interfaces.items()]
+        with self._lock:
+            self._release(self._retired.pop(device, ()))
+            if device in self._current:
+                self._retired[device] = self._current.pop(device)
+            rows = {}
+            for entry in entries:
+                row = self._allocate()
+                self._write(row, *entry)
+                rows[sys.intern(entry[0])] = row
+            self._current[device] = list(rows.values())
+        return DeviceInterfaces(self, rows)
+
+    def discard(self, device: str):
+        """Free the rows of a device that is no longer polled"""
+        with self._lock:
+            self._release(self._retired.pop(device, ()))
+            self._release(self._current.pop(device, ()))
+
+    def same_subnet_codes(self, rows1: Sequence[int], rows2: Sequence[int],
+                          expected_networks: Sequence[int], expected_prefixes: Sequence[int]) -> List[int]:
+        """Check many interface pairs at once
+
+        rows are store rows (-1 for a missing interface); the expected
+        network is given as packed address and prefix length. Returns one
+        result code per pair, the first failing check winning, in the
+        order of network_check's per-link checks.
+        """
+        if np is not None and len(rows1) >= 64:
+            return self._same_subnet_numpy(rows1, rows2, expected_networks, expected_prefixes)
+
+        ip, netmask, prefix = self.ip, self.netmask, self.prefix
+        enabled, has_ip = self.enabled.bits, self.has_ip.bits
+
+        def bit(bits, row):
+            byte = row >> 3
+            return byte < len(bits) and bits[byte] >> (row & 7) & 1
+
+        codes = []
+        for r1, r2, expected_net, expected_prefix in zip(rows1, rows2, expected_networks, expected_prefixes):
+            if r1 < 0:
+                codes.append(MISSING_1)
+            elif r2 < 0:
+                codes.append(MISSING_2)
+            elif not bit(enabled, r1):
+                codes.append(DISABLED_1)
+            elif not bit(enabled, r2):
+                codes.append(DISABLED_2)
+            elif not bit(has_ip, r1):
+                codes.append(NO_IP_1)
+            elif not bit(has_ip, r2):
+                codes.append(NO_IP_2)
+            else:
+                p1, p2 = prefix[r1], prefix[r2]
+                net1 = ip[r1] & netmask[r1]
+                if not p1 or not p2:
+                    codes.append(NO_NETWORK)
+                elif p1 != p2 or net1 != ip[r2] & netmask[r2]:
+                    codes.append(DIFFERENT_NETWORKS)
+                elif p1 != expected_prefix or net1 != expected_net:
+                    codes.append(UNEXPECTED_NETWORK)
+                elif ip[r1] == ip[r2]:
+                    codes.append(SAME_IP)
+                else:
+                    codes.append(LINK_OK)
+        return codes
+
+    def _column(self, bitset: Bitset, size: int):
+        bits = np.unpackbits(np.frombuffer(bytes(bitset.bits), dtype=np.uint8), bitorder='little')
+        column = np.zeros(size, dtype=bool)
+        column[:min(size, len(bits))] = bits[:size]
+        return column
+
+    def _same_subnet_numpy(self, rows1, rows2, expected_networks, expected_prefixes) -> List[int]:
+        with self._lock:
+            size = len(self.names)
+            ip = np.frombuffer(self.ip, dtype=np.uint32).copy()
+            netmask = np.frombuffer(self.netmask, dtype=np.uint32).copy()
+            prefix = np.frombuffer(self.prefix, dtype=np.uint8).copy()
+            enabled = self._column(self.enabled, size)
+            has_ip = self._column(self.has_ip, size)
+
+        r1 = np.asarray(rows1, dtype=np.int64)
+        r2 = np.asarray(rows2, dtype=np.int64)
+        missing1, missing2 = r1 < 0, r2 < 0
+        r1, r2 = np.where(missing1, 0, r1), np.where(missing2, 0, r2)
+        net1, net2 = ip[r1] & netmask[r1], ip[r2] & netmask[r2]
+
+        conditions = [
+            missing1,
+            missing2,
+            ~enabled[r1],
+            ~enabled[r2],
+            ~has_ip[r1],
+            ~has_ip[r2],
+            (prefix[r1] == 0) | (prefix[r2] == 0),
+            (prefix[r1] != prefix[r2]) | (net1 != net2),
+            (prefix[r1] != np.asarray(expected_prefixes, dtype=np.uint8))
+            | (net1 != np.asarray(expected_networks, dtype=np.uint32)),
+            ip[r1] == ip[r2],
+        ]
+        choices = [MISSING_1, MISSING_2, DISABLED_1, DISABLED_2, NO_IP_1, NO_IP_2,
+                   NO_NETWORK, DIFFERENT_NETWORKS, UNEXPECTED_NETWORK, SAME_IP]
+        return np.select(conditions, choices, default=LINK_OK).tolist()
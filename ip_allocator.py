@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Link Subnet Allocator
+Derives NETWORK_CONFIG ({device: {interface: IPv4Interface}}, the structure
+operations/network-cfg.py applies) from the topology links and address
+pools, instead of writing every address by hand.
+
+The expected_network of a link decides how its endpoints are addressed:
+- a pool network (10.0.0.0/16 with --pool 10.0.0.0/16:30): the next free
+  /30 of the pool is allocated to the link
+- a point-to-point subnet (/30 or /31): used as is, and reserved in the
+  pool that contains it so no allocation overlaps it
+- a larger subnet (e.g. the 192.168.1.0/24 management network): every
+  endpoint gets its own host address in it
+On point-to-point subnets device1 gets the first host and device2 the second.
+
+Subnets and hosts are tracked in bytearray bitmaps (one byte per block)
+searched with a next-fit cursor, so the scan for a free block runs in C and
+tens of thousands of links allocate in a fraction of a second. With a state
+file, the earlier assignments are reserved before anything new is
+allocated, so they stay stable across runs; those of removed links are freed.
+A first run can be seeded from the addresses already configured (--seed, or
+NETWORK_CONFIG in operations/network-cfg.py) so an existing network is
+adopted as it is instead of renumbered.
+
+Usage:
+    python ip_allocator.py --pool 10.0.0.0/16:30 --state allocations.json
+    python ip_allocator.py --topology big.yml --pool 10.0.0.0/16:30 --format ansible
+    python ip_allocator.py --seed current.json --state allocations.json
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from ipaddress import IPv4Interface, IPv4Network
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from topology import DEFAULT_TOPOLOGY_FILE, NetworkLink, TopologyIndex
+
+Endpoint = Tuple[str, str]
+
+
+class AllocationError(Exception):
+    """Addresses could not be assigned (exhausted pool, conflicting links)"""
+
+
+class BlockBitmap:
+    """Equal-size blocks of a network (subnets or single hosts), one byte each"""
+
+    def __init__(self, network: IPv4Network, prefix_length: int):
+        if not network.prefixlen <= prefix_length <= 32:
+            raise AllocationError(f"cannot split {network} into /{prefix_length} blocks")
+        self.network = network
+        self.prefix_length = prefix_length
+        self.base = int(network.network_address)
+        self.shift = 32 - prefix_length
+        self.used = bytearray(1 << (prefix_length - network.prefixlen))
+        self.free = len(self.used)
+        self._cursor = 0
+
+    def reserve(self, address: int) -> bool:
+        """Mark the block holding address as used; False if it already was"""
+        index = (address - self.base) >> self.shift
+        if self.used[index]:
+            return False
+        self.used[index] = 1
+        self.free -= 1
+        return True
+
+    def allocate(self) -> int:
+        """First address of the next free block after the last one handed out"""
+        index = self.used.find(0, self._cursor)
+        if index < 0:
+            index = self.used.find(0)
+            if index < 0:
+                raise AllocationError(f"{self.network} has no free /{self.prefix_length} left")
+        self.used[index] = 1
+        self.free -= 1
+        self._cursor = index + 1
+        return self.base + (index << self.shift)
+
+
+def host_bitmap(network: IPv4Network) -> BlockBitmap:
+    """Host addresses of a shared network, without network and broadcast"""
+    hosts = BlockBitmap(network, 32)
+    if network.prefixlen < 31:
+        hosts.reserve(int(network.network_address))
+        hosts.reserve(int(network.broadcast_address))
+    return hosts
+
+
+def p2p_hosts(base: int, prefix_length: int) -> Tuple[int, int]:
+    """Addresses of device1 and device2 on a point-to-point subnet"""
+    return (base, base + 1) if prefix_length == 31 else (base + 1, base + 2)
+
+
+def parse_pool(text: str) -> Tuple[IPv4Network, int]:
+    """'10.0.0.0/16:30' -> (IPv4Network('10.0.0.0/16'), 30)"""
+    network, _, prefix_length = text.partition(':')
+    try:
+        return IPv4Network(network.strip()), int(prefix_length or 30)
+    except ValueError as e:
+        raise AllocationError(f"invalid pool {text!r}, expected NETWORK/LEN:PREFIX: {e}")
+
+
+def load_state(path: Optional[str]) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def seed_state(config: Mapping[str, Mapping[str, object]], topology: TopologyIndex) -> dict:
+    """State that keeps the addresses of an existing NETWORK_CONFIG
+
+    Device names are matched to the topology's ignoring case (NETWORK_CONFIG
+    calls the lab's Router 'router'). Addresses outside their link's subnet
+    or pool are allocated anew as usual.
+    """
+    names = {name.lower(): name for name in topology.devices}
+    hosts = {}
+    for device, interfaces in config.items():
+        device = names.get(device.lower(), device)
+        for interface, address in interfaces.items():
+            hosts[f"{device}:{interface}"] = str(IPv4Interface(address).ip)
+    return {'hosts': hosts}
+
+
+def save_state(path: str, state: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def dotted(address: int) -> str:
+    """'10.0.0.1' from an int, without an IPv4Address object"""
+    return socket.inet_ntoa(address.to_bytes(4, 'big'))
+
+
+@dataclass
+class Allocation:
+    """Addresses for every link endpoint"""
+    # (device, interface) -> (ip, prefix length), as ints
+    endpoints: Dict[Endpoint, Tuple[int, int]] = field(default_factory=dict)
+    # Subnet of every link ("10.0.0.4/30"), allocated or as declared
+    link_networks: Dict[str, str] = field(default_factory=dict)
+    # What to keep for the next run (see load_state/save_state)
+    state: dict = field(default_factory=dict)
+    allocated: int = 0
+    kept: int = 0
+
+    @cached_property
+    def config(self) -> Dict[str, Dict[str, IPv4Interface]]:
+        """NETWORK_CONFIG: device -> interface -> address"""
+        config: Dict[str, Dict[str, IPv4Interface]] = {}
+        for (device, interface), address in sorted(self.endpoints.items()):
+            config.setdefault(device, {})[interface] = IPv4Interface(address)
+        return config
+
+    def rows(self):
+        """(device, interface, ip, prefix length) sorted, with dotted IPs"""
+        for (device, interface), (ip, prefix_length) in sorted(self.endpoints.items()):
+            yield device, interface, dotted(ip), prefix_length
+
+
+class LinkAllocator:
+    """Assign link subnets and endpoint addresses from address pools"""
+
+    def __init__(self, pools: Iterable[Tuple[IPv4Network, int]] = (), state: Optional[dict] = None):
+        self.pools: Dict[IPv4Network, BlockBitmap] = {}
+        for network, prefix_length in pools:
+            if any(network.overlaps(other) for other in self.pools):
+                raise AllocationError(f"pool {network} overlaps another pool")
+            self.pools[network] = BlockBitmap(network, prefix_length)
+        state = state or {}
+        self.previous_links: Dict[str, str] = state.get('links', {})
+        self.previous_hosts: Dict[str, str] = state.get('hosts', {})
+
+    def allocate(self, links: Iterable[NetworkLink]) -> Allocation:
+        result = Allocation()
+        # (device, interface) -> (ip, subnet, link name); a subnet is (base, prefix length)
+        addresses: Dict[Endpoint, Tuple[int, Tuple[int, int], str]] = {}
+        auto: List[Tuple[NetworkLink, BlockBitmap]] = []
+        shared: Dict[str, Tuple[IPv4Network, List[Endpoint]]] = {}
+        fixed: Dict[IPv4Network, str] = {}
+        # expected_network -> (pool, network, shared?), so each is resolved once
+        kinds: Dict[str, Tuple[Optional[BlockBitmap], IPv4Network, bool]] = {}
+
+        for link in links:
+            kind = kinds.get(link.expected_network)
+            if kind is None:
+                network = link.network
+                pool = self.pools.get(network)
+                kind = kinds[link.expected_network] = (pool, network, network.prefixlen < 30)
+                if pool is None and kind[2]:
+                    self._reserve_in_pools(network)
+            pool, network, is_shared = kind
+            if pool is not None:
+                auto.append((link, pool))
+                continue
+            if is_shared:
+                endpoints = shared.setdefault(link.expected_network, (network, []))[1]
+                endpoints.extend(((link.device1, link.interface1), (link.device2, link.interface2)))
+            else:
+                if network in fixed:
+                    raise AllocationError(f"links {fixed[network]!r} and {link.name!r} both use {network}")
+                fixed[network] = link.name
+                self._reserve_in_pools(network)
+                self._assign_p2p(addresses, link, int(network.network_address), network.prefixlen)
+            result.link_networks[link.name] = link.expected_network
+
+        # Earlier subnets first, so that no new link can take one of them
+        subnets: Dict[str, int] = {}
+        pending = []
+        for link, pool in auto:
+            base = self._previous_subnet(link, pool)
+            if base is not None and pool.reserve(base):
+                subnets[link.name] = base
+                result.kept += 1
+            else:
+                pending.append((link, pool))
+        for link, pool in pending:
+            subnets[link.name] = pool.allocate()
+            result.allocated += 1
+        links_state = result.state['links'] = {}
+        for link, pool in auto:
+            base = subnets[link.name]
+            self._assign_p2p(addresses, link, base, pool.prefix_length)
+            links_state[link.name] = result.link_networks[link.name] = f"{dotted(base)}/{pool.prefix_length}"
+
+        for network, endpoints in shared.values():
+            self._assign_hosts(addresses, network, endpoints, result)
+
+        # Every endpoint, so point-to-point numbering (device1 first or not) is kept too
+        result.state['hosts'] = {f"{device}:{interface}": dotted(ip)
+                                 for (device, interface), (ip, _, _) in addresses.items()}
+        result.endpoints = {endpoint: (ip, subnet[1]) for endpoint, (ip, subnet, _) in addresses.items()}
+        return result
+
+    # -- helpers ----------------------------------------------------------------
+
+    def _reserve_in_pools(self, network: IPv4Network):
+        """Keep a declared subnet out of the pool that contains it"""
+        for pool in self.pools.values():
+            if network.subnet_of(pool.network):
+                first, last = int(network.network_address), int(network.broadcast_address)
+                for address in range(first, last + 1, 1 << pool.shift):
+                    pool.reserve(address)
+
+    def _previous_ip(self, endpoint: Endpoint) -> Optional[int]:
+        previous = self.previous_hosts.get(f"{endpoint[0]}:{endpoint[1]}")
+        try:
+            return int.from_bytes(socket.inet_aton(previous), 'big') if previous else None
+        except OSError:
+            return None
+
+    def _previous_subnet(self, link: NetworkLink, pool: BlockBitmap) -> Optional[int]:
+        previous = self.previous_links.get(link.name)
+        if previous is None:
+            # Seeded: the block holding device1's configured address
+            ip = self._previous_ip((link.device1, link.interface1))
+            if ip is None:
+                return None
+            previous = f"{dotted(ip & ~((1 << pool.shift) - 1))}/{pool.prefix_length}"
+        address, _, prefix_length = previous.partition('/')
+        try:
+            base = int.from_bytes(socket.inet_aton(address), 'big')
+        except OSError:
+            return None
+        # Dropped if the pool changed since
+        offset = base - pool.base
+        if prefix_length != str(pool.prefix_length) or not 0 <= offset < len(pool.used) << pool.shift \
+                or offset & ((1 << pool.shift) - 1):
+            return None
+        return base
+
+    @staticmethod
+    def _assign(addresses, endpoint: Endpoint, ip: int, subnet: Tuple[int, int], link: str):
+        current = addresses.get(endpoint)
+        if current is None:
+            addresses[endpoint] = (ip, subnet, link)
+        elif current[1] != subnet:
+            raise AllocationError(f"{endpoint[0]}:{endpoint[1]} is on {current[2]!r} "
+                                  f"({dotted(current[1][0])}/{current[1][1]}) and on {link!r} "
+                                  f"({dotted(subnet[0])}/{subnet[1]})")
+
+    def _assign_p2p(self, addresses, link: NetworkLink, base: int, prefix_length: int):
+        first, second = p2p_hosts(base, prefix_length)
+        # Endpoints that were numbered the other way round stay that way
+        if self.previous_hosts and self._previous_ip((link.device1, link.interface1)) == second \
+                and self._previous_ip((link.device2, link.interface2)) == first:
+            first, second = second, first
+        subnet = (base, prefix_length)
+        self._assign(addresses, (link.device1, link.interface1), first, subnet, link.name)
+        self._assign(addresses, (link.device2, link.interface2), second, subnet, link.name)
+
+    def _assign_hosts(self, addresses, network: IPv4Network, endpoints: List[Endpoint], result: Allocation):
+        hosts = host_bitmap(network)
+        subnet = (hosts.base, network.prefixlen)
+        name = str(network)
+        first, last = hosts.base, int(network.broadcast_address)
+        endpoints = list(dict.fromkeys(endpoints))
+        wanted = []
+        for endpoint in endpoints:
+            if endpoint in addresses:
+                self._assign(addresses, endpoint, 0, subnet, name)  # already on a p2p link: conflict
+                continue
+            ip = self._previous_ip(endpoint)
+            if ip is not None and first <= ip <= last and hosts.reserve(ip):
+                addresses[endpoint] = (ip, subnet, name)
+                result.kept += 1
+            else:
+                wanted.append(endpoint)
+        for endpoint in wanted:
+            addresses[endpoint] = (hosts.allocate(), subnet, name)
+            result.allocated += 1
+
+
+def allocate_topology(topology: TopologyIndex, pools: Iterable[Tuple[IPv4Network, int]] = (),
+                      state_file: Optional[str] = None, seed: Optional[Mapping] = None) -> Allocation:
+    """Allocate addresses for a topology, keeping and updating a state file
+
+    Without earlier state, the addresses of the seed config (see seed_state)
+    are kept.
+    """
+    state = load_state(state_file)
+    if not state and seed:
+        state = seed_state(seed, topology)
+    allocation = LinkAllocator(pools, state).allocate(topology.links)
+    if state_file:
+        save_state(state_file, allocation.state)
+    return allocation
+
+
+def connections(topology: TopologyIndex) -> Dict[str, dict]:
+    """CONNECTIONS for network-cfg.py from the topology devices"""
+    return {name: {'host': spec.host, 'port': spec.port} for name, spec in topology.devices.items()}
+
+
+# ---------------------------------------------------------------------------
+# Output
+
+def format_python(allocation: Allocation) -> str:
+    lines = ["NETWORK_CONFIG = {"]
+    device = None
+    for name, interface, ip, prefix_length in allocation.rows():
+        if name != device:
+            if device is not None:
+                lines.append("    },")
+            device = name
+            lines.append(f"    {name!r}: {{")
+        lines.append(f"        {interface!r}: IPv4Interface('{ip}/{prefix_length}'),")
+    if device is not None:
+        lines.append("    },")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def format_json(allocation: Allocation) -> str:
+    config: Dict[str, Dict[str, str]] = {}
+    for device, interface, ip, prefix_length in allocation.rows():
+        config.setdefault(device, {})[interface] = f"{ip}/{prefix_length}"
+    return json.dumps(config, indent=2)
+
+
+def format_ansible(allocation: Allocation) -> str:
+    """ip_assignments as in ansible/network_automation.yml"""
+    lines = ["ip_assignments:"]
+    device = None
+    for name, interface, ip, prefix_length in allocation.rows():
+        if name != device:
+            device = name
+            lines.append(f"  {name}:")
+        lines.extend((f"    {interface}:", f'      ip: "{ip}"', f"      prefix: {prefix_length}"))
+    return "\n".join(lines)
+
+
+FORMATS = {'python': format_python, 'json': format_json, 'ansible': format_ansible}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Allocate link subnets and interface addresses")
+    parser.add_argument("--topology", default=DEFAULT_TOPOLOGY_FILE,
+                        help="Topology file with devices and links (.yml, .json or .csv)")
+    parser.add_argument("--pool", action="append", default=[], metavar="NETWORK:PREFIX",
+                        help="Allocate a /PREFIX to links whose expected_network is NETWORK, "
+                             "e.g. 10.0.0.0/16:30 (repeatable)")
+    parser.add_argument("--state", help="Keep assignments stable across runs in this JSON file")
+    parser.add_argument("--seed", metavar="JSON",
+                        help="Keep the addresses in this config ({device: {interface: 'ip/len'}}, "
+                             "as --format json prints) when there is no earlier state")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="python",
+                        help="NETWORK_CONFIG literal, JSON or Ansible ip_assignments (default: python)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        pools = [parse_pool(p) for p in args.pool]
+        topology = TopologyIndex.from_file(args.topology)
+        seed = None
+        if args.seed:
+            with open(args.seed) as f:
+                seed = json.load(f)
+        allocation = allocate_topology(topology, pools, args.state, seed)
+    except (AllocationError, ValueError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(FORMATS[args.format](allocation))
+    print(f"✅ {len(topology.links)} links, {len(allocation.endpoints)} interfaces: {allocation.allocated} allocated, "
+          f"{allocation.kept} kept ({elapsed * 1000:.0f} ms)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
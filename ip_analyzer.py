@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Fleet-wide IP Analyzer
+Finds addressing problems that a per-link check cannot see:
+duplicate addresses, overlapping prefixes and subnets without a declared link.
+
+All checks are sort-based (O(n log n) in the number of addresses), so the
+analysis stays fast over tens of thousands of interfaces.
+"""
+
+import ipaddress
+from operator import attrgetter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+
+@dataclass(frozen=True)
+class AddressRecord:
+    """One IPv4 address configured on a device interface"""
+    device: str
+    interface: str
+    ip: int
+    prefix_length: int
+    network_start: int
+
+    @property
+    def network_end(self) -> int:
+        return self.network_start | (~_mask(self.prefix_length) & 0xFFFFFFFF)
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.device}:{self.interface}"
+
+    @property
+    def address(self) -> str:
+        return f"{ipaddress.IPv4Address(self.ip)}/{self.prefix_length}"
+
+    @property
+    def network(self) -> ipaddress.IPv4Network:
+        return ipaddress.IPv4Network((self.network_start, self.prefix_length))
+
+
+@dataclass
+class DuplicateAddress:
+    """The same IP configured on more than one interface"""
+    ip: str
+    records: List[AddressRecord]
+
+
+@dataclass
+class PrefixOverlap:
+    """A subnet nested inside a different, larger subnet"""
+    outer: ipaddress.IPv4Network
+    inner: ipaddress.IPv4Network
+    outer_records: List[AddressRecord]
+    inner_records: List[AddressRecord]
+
+
+@dataclass
+class FleetAnalysis:
+    """Result of a fleet-wide address analysis"""
+    address_count: int = 0
+    duplicates: List[DuplicateAddress] = field(default_factory=list)
+    overlaps: List[PrefixOverlap] = field(default_factory=list)
+    unlinked: List[AddressRecord] = field(default_factory=list)
+
+    @property
+    def clean(self) -> bool:
+        return not (self.duplicates or self.overlaps or self.unlinked)
+
+
+def _mask(prefix_length: int) -> int:
+    return (0xFFFFFFFF << (32 - prefix_length)) & 0xFFFFFFFF
+
+
+def collect_addresses(devices: Dict[str, object], include_loopback: bool = False) -> List[AddressRecord]:
+    """Flatten Device.interfaces into address records
+
+    Loopback addresses (127.0.0.0/8) are skipped by default since every
+    device legitimately carries 127.0.0.1.
+    """
+    records = []
+    for device_name, device in devices.items():
+        for interface in device.interfaces.values():
+            addresses = interface.addresses or (
+                [(interface.ip_address, interface.prefix_length)] if interface.ip_address else []
+            )
+            for ip, prefix_length in addresses:
+                if prefix_length is None:
+                    continue
+                try:
+                    address = ipaddress.IPv4Address(ip)
+                except ValueError:
+                    continue
+                if address.is_loopback and not include_loopback:
+                    continue
+                ip_int = int(address)
+                records.append(AddressRecord(device_name, interface.name, ip_int, prefix_length,
+                                             ip_int & _mask(prefix_length)))
+    return records
+
+
+def find_duplicate_addresses(records: Iterable[AddressRecord]) -> List[DuplicateAddress]:
+    """Group records by IP after sorting; any group with 2+ endpoints is a conflict"""
+    duplicates = []
+    ordered = sorted(records, key=attrgetter('ip'))
+    i = 0
+    while i < len(ordered):
+        j = i + 1
+        while j < len(ordered) and ordered[j].ip == ordered[i].ip:
+            j += 1
+        group = ordered[i:j]
+        if len({(r.device, r.interface) for r in group}) > 1:
+            duplicates.append(DuplicateAddress(str(ipaddress.IPv4Address(group[0].ip)), group))
+        i = j
+    return duplicates
+
+
+def find_overlapping_prefixes(records: Iterable[AddressRecord]) -> List[PrefixOverlap]:
+    """Find subnets nested inside a different configured subnet
+
+    CIDR blocks are either disjoint or nested, so after sorting the distinct
+    networks by (start, prefix length) a single sweep with a stack of
+    currently open networks finds every nesting against its innermost
+    container.
+    """
+    by_network: Dict[Tuple[int, int], List[AddressRecord]] = {}
+    for record in records:
+        by_network.setdefault((record.network_start, record.prefix_length), []).append(record)
+
+    overlaps = []
+    stack: List[Tuple[int, int, int]] = []  # (start, end, prefix_length)
+    for start, prefix_length in sorted(by_network):
+        end = start | (~_mask(prefix_length) & 0xFFFFFFFF)
+        while stack and stack[-1][1] < start:
+            stack.pop()
+        if stack:
+            outer_start, _, outer_prefix = stack[-1]
+            overlaps.append(PrefixOverlap(
+                outer=ipaddress.IPv4Network((outer_start, outer_prefix)),
+                inner=ipaddress.IPv4Network((start, prefix_length)),
+                outer_records=by_network[(outer_start, outer_prefix)],
+                inner_records=by_network[(start, prefix_length)]
+            ))
+        stack.append((start, end, prefix_length))
+    return overlaps
+
+
+def find_unlinked_subnets(records: Iterable[AddressRecord], links: Iterable[object]) -> List[AddressRecord]:
+    """Records whose subnet does not match the expected network of any link"""
+    declared = {(int(link.network.network_address), link.network.prefixlen) for link in links}
+    return [r for r in records if (r.network_start, r.prefix_length) not in declared]
+
+
+def analyze_fleet(devices: Dict[str, object], links: Iterable[object],
+                  include_loopback: bool = False) -> FleetAnalysis:
+    """Run every fleet-wide check over the parsed device interfaces"""
+    records = collect_addresses(devices, include_loopback=include_loopback)
+    return FleetAnalysis(
+        address_count=len(records),
+        duplicates=find_duplicate_addresses(records),
+        overlaps=find_overlapping_prefixes(records),
+        unlinked=find_unlinked_subnets(records, links)
+    )
+
+
+def print_fleet_analysis(analysis: FleetAnalysis, limit: int = 20):
+    """Print a fleet analysis in the checker's report style"""
+    print(f"🧮 Fleet IP Analysis ({analysis.address_count} addresses):")
+    if analysis.clean:
+        print("   ✅ No duplicate addresses, overlapping prefixes or unlinked subnets")
+        print()
+        return
+
+    for dup in analysis.duplicates[:limit]:
+        endpoints = ", ".join(r.endpoint for r in dup.records)
+        print(f"   ❌ DUPLICATE {dup.ip:18} on {endpoints}")
+    for overlap in analysis.overlaps[:limit]:
+        outer = ", ".join(r.endpoint for r in overlap.outer_records)
+        inner = ", ".join(r.endpoint for r in overlap.inner_records)
+        print(f"   ❌ OVERLAP   {str(overlap.inner):18} ({inner}) inside {overlap.outer} ({outer})")
+    for record in analysis.unlinked[:limit]:
+        print(f"   ⚠️  UNLINKED  {record.address:18} on {record.endpoint} matches no declared link")
+
+    hidden = sum(max(0, len(items) - limit)
+                 for items in (analysis.duplicates, analysis.overlaps, analysis.unlinked))
+    if hidden:
+        print(f"   ... {hidden} more findings not shown")
+    print()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Monitor Metrics
+Per-phase latency histograms and link-state gauges for the consistency
+checker, rendered in the Prometheus text exposition format. Metrics can be
+served on a local /metrics HTTP endpoint or written to a node_exporter
+textfile-collector file.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Link status codes exported by network_link_status
+LINK_STATUS_CODES = {'OK': 0, 'WARNING': 1, 'ERROR': 2}
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+def link_status_code(status: str) -> int:
+    """Map a checker status string (e.g. '✅ OK') to a numeric code"""
+    for word, code in LINK_STATUS_CODES.items():
+        if word in status:
+            return code
+    return LINK_STATUS_CODES['ERROR']
+
+
+class Histogram:
+    """Cumulative histogram of observations for one label set"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe store of checker metrics"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._phases: Dict[Tuple[str, str], Histogram] = {}
+        self._links: Dict[str, Tuple[Dict[str, str], int]] = {}
+        self._flaps: Dict[str, int] = {}
+        self._device_up: Dict[str, int] = {}
+        self._sweep_seconds = 0.0
+        self._last_sweep = 0.0
+
+    def observe(self, phase: str, device: str, seconds: float):
+        """Record the latency of one phase (connect, get_config, parse, check_links)"""
+        with self._lock:
+            key = (phase, device)
+            histogram = self._phases.get(key)
+            if histogram is None:
+                histogram = self._phases[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, phase: str, device: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, device, time.perf_counter() - start)
+
+    def set_device_up(self, device: str, up: bool):
+        with self._lock:
+            self._device_up[device] = int(up)
+
+    def set_link_status(self, link, status: str, flapped: bool = False):
+        """Update the gauge of a link; flapped counts a state change"""
+        with self._lock:
+            labels = {'link': link.name, 'device1': link.device1, 'interface1': link.interface1,
+                      'device2': link.device2, 'interface2': link.interface2}
+            self._links[link.name] = (labels, link_status_code(status))
+            if flapped:
+                self._flaps[link.name] = self._flaps.get(link.name, 0) + 1
+
+    def set_sweep(self, seconds: float):
+        with self._lock:
+            self._sweep_seconds = seconds
+            self._last_sweep = time.time()
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format"""
+        lines: List[str] = []
+        with self._lock:
+            lines.append("# HELP network_check_phase_seconds Latency of checker phases per device")
+            lines.append("# TYPE network_check_phase_seconds histogram")
+            for (phase, device), h in sorted(self._phases.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'network_check_phase_seconds_bucket{{{_labels(phase=phase, device=device, le=bound)}}} {cumulative}')
+                lines.append(f'network_check_phase_seconds_bucket{{{_labels(phase=phase, device=device, le="+Inf")}}} {h.count}')
+                lines.append(f'network_check_phase_seconds_sum{{{_labels(phase=phase, device=device)}}} {h.sum:.6f}')
+                lines.append(f'network_check_phase_seconds_count{{{_labels(phase=phase, device=device)}}} {h.count}')
+
+            lines.append("# HELP network_device_up Whether the last poll of a device succeeded")
+            lines.append("# TYPE network_device_up gauge")
+            for device, up in sorted(self._device_up.items()):
+                lines.append(f'network_device_up{{{_labels(device=device)}}} {up}')
+
+            lines.append("# HELP network_link_status Link consistency (0=ok, 1=warning, 2=error)")
+            lines.append("# TYPE network_link_status gauge")
+            for _, (labels, code) in sorted(self._links.items()):
+                lines.append(f'network_link_status{{{_labels(**labels)}}} {code}')
+
+            lines.append("# HELP network_link_flaps_total Link status changes since the monitor started")
+            lines.append("# TYPE network_link_flaps_total counter")
+            for name, flaps in sorted(self._flaps.items()):
+                lines.append(f'network_link_flaps_total{{{_labels(link=name)}}} {flaps}')
+
+            lines.append("# HELP network_check_sweep_seconds Duration of the last sweep")
+            lines.append("# TYPE network_check_sweep_seconds gauge")
+            lines.append(f"network_check_sweep_seconds {self._sweep_seconds:.6f}")
+            lines.append("# HELP network_check_last_sweep_timestamp_seconds Unix time of the last sweep")
+            lines.append("# TYPE network_check_last_sweep_timestamp_seconds gauge")
+            lines.append(f"network_check_last_sweep_timestamp_seconds {self._last_sweep:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Atomically write metrics for the node_exporter textfile collector"""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+    def serve(self, port: int, address: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Serve /metrics on a background thread"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((address, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
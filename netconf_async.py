@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+"""
+Async NETCONF Client
+An asyncio NETCONF client exposing the calls the scripts already make on
+ncclient managers (get_config, edit_config, commit, ...) as coroutines, so
+one event loop can drive thousands of sessions instead of one thread each.
+
+- SSH transport: asyncssh (optional, only needed by connect())
+- Framing: end-of-message (base:1.0) until both peers advertise base:1.1,
+  then chunked framing (RFC 6242)
+- Replies are matched by message-id, so RPCs can be pipelined on a session
+- Memory per session is one read buffer plus the message being received
+
+Used by network_check.py (--async) and operations/network-cfg.py (--async).
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lxml import etree
+
+try:
+    import asyncssh
+except ImportError:  # optional, only needed to open SSH sessions
+    asyncssh = None
+
+NC_NS = 'urn:ietf:params:xml:ns:netconf:base:1.0'
+BASE_1_0 = 'urn:ietf:params:netconf:base:1.0'
+BASE_1_1 = 'urn:ietf:params:netconf:base:1.1'
+CLIENT_CAPABILITIES = (
+    BASE_1_0,
+    BASE_1_1,
+    'urn:ietf:params:netconf:capability:candidate:1.0',
+    'urn:ietf:params:netconf:capability:confirmed-commit:1.0',
+    'urn:ietf:params:netconf:capability:validate:1.0',
+    'urn:ietf:params:netconf:capability:xpath:1.0',
+)
+
+EOM = b']]>]]>'
+READ_SIZE = 65536
+# Refuse frames larger than this instead of buffering without bound
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+def _nc(tag: str) -> str:
+    return f'{{{NC_NS}}}{tag}'
+
+
+class FramingError(ConnectionError):
+    """The peer sent a message that violates NETCONF framing"""
+
+
+class RPCError(Exception):
+    """An <rpc-error> in a reply"""
+
+    def __init__(self, errors: List[Dict[str, Optional[str]]]):
+        self.errors = errors
+        first = errors[0]
+        self.tag = first.get('error-tag')
+        self.severity = first.get('error-severity')
+        super().__init__(first.get('error-message') or self.tag or 'rpc-error')
+
+
+# ---------------------------------------------------------------------------
+# Framing
+
+def encode_message(message: bytes, chunked: bool) -> bytes:
+    """Frame one message for the wire"""
+    if chunked:
+        return b'\n#%d\n%s\n##\n' % (len(message), message)
+    return message + EOM
+
+
+class FrameDecoder:
+    """Incremental decoder for end-of-message and chunked framing"""
+
+    def __init__(self):
+        self.chunked = False
+        self._buffer = bytearray()
+        self._message = bytearray()
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """Add received bytes; return the messages completed by them"""
+        self._buffer += data
+        messages = []
+        while True:
+            message = self._next_chunked() if self.chunked else self._next_eom()
+            if message is None:
+                break
+            messages.append(message)
+        if len(self._buffer) + len(self._message) > MAX_MESSAGE_SIZE:
+            raise FramingError("message exceeds the maximum size")
+        return messages
+
+    def _next_eom(self) -> Optional[bytes]:
+        end = self._buffer.find(EOM)
+        if end < 0:
+            return None
+        message = bytes(self._buffer[:end])
+        del self._buffer[:end + len(EOM)]
+        return message
+
+    def _next_chunked(self) -> Optional[bytes]:
+        buffer = self._buffer
+        while True:
+            if len(buffer) < 4:
+                return None
+            if buffer[:4] == b'\n##\n':
+                del buffer[:4]
+                message = bytes(self._message)
+                self._message.clear()
+                return message
+            if buffer[:2] != b'\n#':
+                raise FramingError(f"bad chunk header {bytes(buffer[:12])!r}")
+            header_end = buffer.find(b'\n', 2)
+            if header_end < 0:
+                if len(buffer) > 12:
+                    raise FramingError("chunk size too long")
+                return None
+            try:
+                size = int(buffer[2:header_end])
+            except ValueError:
+                raise FramingError(f"bad chunk size {bytes(buffer[2:header_end])!r}") from None
+            if size <= 0:
+                raise FramingError("chunk size must be positive")
+            if len(buffer) < header_end + 1 + size:
+                return None
+            self._message += buffer[header_end + 1:header_end + 1 + size]
+            del buffer[:header_end + 1 + size]
+
+
+# ---------------------------------------------------------------------------
+# Replies
+
+class RPCReply:
+    """A parsed <rpc-reply>, with the attributes of ncclient's replies"""
+
+    def __init__(self, raw: bytes, root: etree._Element):
+        self.raw = raw
+        self._root = root
+
+    @property
+    def xml(self) -> str:
+        return self.raw.decode()
+
+    @property
+    def ok(self) -> bool:
+        return self._root.find(_nc('ok')) is not None
+
+    @property
+    def data_ele(self) -> Optional[etree._Element]:
+        return self._root.find(_nc('data'))
+
+    @property
+    def data_xml(self) -> Optional[str]:
+        data = self.data_ele
+        return etree.tostring(data).decode() if data is not None else None
+
+    @property
+    def errors(self) -> List[Dict[str, Optional[str]]]:
+        errors = []
+        for error in self._root.iter(_nc('rpc-error')):
+            errors.append({etree.QName(child).localname: (child.text or '').strip()
+                           for child in error if isinstance(child.tag, str)})
+        return errors
+
+
+def _sub(parent, tag: str, text: Optional[str] = None):
+    elem = etree.SubElement(parent, _nc(tag))
+    if text is not None:
+        elem.text = text
+    return elem
+
+
+def _datastore(parent, tag: str, name: str):
+    _sub(_sub(parent, tag), name)
+
+
+def _filter(parent, filter_spec):
+    """<filter> from ncclient's ('subtree', xml) or ('xpath', (nsmap, select))"""
+    if filter_spec is None:
+        return
+    kind, criteria = filter_spec
+    if kind == 'xpath':
+        namespaces, select = criteria if isinstance(criteria, tuple) else (None, criteria)
+        elem = etree.SubElement(parent, _nc('filter'), nsmap=namespaces)
+        elem.set('type', 'xpath')
+        elem.set('select', select)
+    else:
+        elem = _sub(parent, 'filter')
+        elem.set('type', 'subtree')
+        elem.append(criteria if isinstance(criteria, etree._Element) else etree.fromstring(criteria))
+
+
+def _config(parent, config):
+    """<config> from a payload string or element, wrapping it if needed"""
+    element = config if isinstance(config, etree._Element) else etree.fromstring(
+        config.encode() if isinstance(config, str) else config)
+    if element.tag == _nc('config'):
+        parent.append(element)
+    else:
+        _sub(parent, 'config').append(element)
+
+
+# ---------------------------------------------------------------------------
+# Sessions
+
+class AsyncManager:
+    """One NETCONF session over a pair of byte streams
+
+    reader needs read(n) returning b'' at EOF; writer needs write(),
+    drain() and close(). connect() builds one over asyncssh; from_streams()
+    accepts any other transport (TCP test servers, proxies).
+    """
+
+    def __init__(self, reader, writer, timeout: float = 30.0, on_close=None):
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+        self.session_id: Optional[str] = None
+        self.server_capabilities: List[str] = []
+        self._on_close = on_close
+        self._decoder = FrameDecoder()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._next_id = 1
+        self._reader_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self._closed = False
+
+    @classmethod
+    async def from_streams(cls, reader, writer, timeout: float = 30.0, on_close=None) -> 'AsyncManager':
+        session = cls(reader, writer, timeout, on_close)
+        try:
+            await asyncio.wait_for(session._hello(), timeout)
+        except BaseException:
+            await session.close()
+            raise
+        return session
+
+    @property
+    def connected(self) -> bool:
+        return not self._closed
+
+    @property
+    def chunked(self) -> bool:
+        return self._decoder.chunked
+
+    # -- protocol -------------------------------------------------------------
+
+    async def _hello(self):
+        hello = etree.Element(_nc('hello'), nsmap={None: NC_NS})
+        capabilities = _sub(hello, 'capabilities')
+        for capability in CLIENT_CAPABILITIES:
+            _sub(capabilities, 'capability', capability)
+        self.writer.write(encode_message(etree.tostring(hello, xml_declaration=True, encoding='UTF-8'), False))
+        await self._drain()
+
+        message = await self._read_message()
+        root = etree.fromstring(message)
+        if root.tag != _nc('hello'):
+            raise FramingError(f"expected <hello>, got {root.tag}")
+        self.server_capabilities = [(c.text or '').strip() for c in root.iter(_nc('capability'))]
+        self.session_id = root.findtext(_nc('session-id'))
+        # RFC 6242: chunked framing once both sides advertise base:1.1
+        self._decoder.chunked = BASE_1_1 in self.server_capabilities
+        self._reader_task = asyncio.ensure_future(self._read_replies())
+
+    async def _read_message(self) -> bytes:
+        while True:
+            messages = self._decoder.feed(b'')
+            if messages:
+                return messages[0]
+            data = await self.reader.read(READ_SIZE)
+            if not data:
+                raise ConnectionError("session closed by the peer")
+            messages = self._decoder.feed(data)
+            if messages:
+                # Only the hello is read this way, nothing may follow it yet
+                return messages[0]
+
+    async def _read_replies(self):
+        error: BaseException = ConnectionError("session closed by the peer")
+        try:
+            while True:
+                data = await self.reader.read(READ_SIZE)
+                if not data:
+                    break
+                for message in self._decoder.feed(data):
+                    self._dispatch(message)
+        except asyncio.CancelledError:
+            error = ConnectionError("session closed")
+        except Exception as e:
+            error = e
+        self._closed = True
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    def _dispatch(self, message: bytes):
+        root = etree.fromstring(message)
+        if root.tag != _nc('rpc-reply'):
+            return  # notifications are handled by netconf_events
+        future = self._pending.pop(root.get('message-id'), None)
+        if future is not None and not future.done():
+            future.set_result(RPCReply(message, root))
+
+    async def _drain(self):
+        drain = getattr(self.writer, 'drain', None)
+        if drain is not None:
+            await drain()
+
+    async def rpc(self, operation: etree._Element, timeout: Optional[float] = None) -> RPCReply:
+        """Send one operation and wait for its reply; raises RPCError on <rpc-error>"""
+        if self._closed:
+            raise ConnectionError("session is closed")
+        message_id = str(self._next_id)
+        self._next_id += 1
+        rpc = etree.Element(_nc('rpc'), nsmap={None: NC_NS})
+        rpc.set('message-id', message_id)
+        rpc.append(operation)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = future
+        try:
+            async with self._write_lock:
+                self.writer.write(encode_message(etree.tostring(rpc), self._decoder.chunked))
+                await self._drain()
+            reply = await asyncio.wait_for(future, timeout or self.timeout)
+        finally:
+            self._pending.pop(message_id, None)
+        errors = [e for e in reply.errors if e.get('error-severity', 'error') == 'error']
+        if errors:
+            raise RPCError(errors)
+        return reply
+
+    # -- operations, named like ncclient's manager methods --------------------
+
+    async def get_config(self, source: str = 'running', filter=None,
+                         timeout: Optional[float] = None) -> RPCReply:
+        operation = etree.Element(_nc('get-config'))
+        _datastore(operation, 'source', source)
+        _filter(operation, filter)
+        return await self.rpc(operation, timeout)
+
+    async def get(self, filter=None) -> RPCReply:
+        operation = etree.Element(_nc('get'))
+        _filter(operation, filter)
+        return await self.rpc(operation)
+
+    async def edit_config(self, config, target: str = 'running', default_operation: Optional[str] = None,
+                          test_option: Optional[str] = None, error_option: Optional[str] = None) -> RPCReply:
+        operation = etree.Element(_nc('edit-config'))
+        _datastore(operation, 'target', target)
+        for tag, value in (('default-operation', default_operation), ('test-option', test_option),
+                           ('error-option', error_option)):
+            if value:
+                _sub(operation, tag, value)
+        _config(operation, config)
+        return await self.rpc(operation)
+
+    async def commit(self, confirmed: bool = False, timeout: Optional[str] = None,
+                     persist: Optional[str] = None, persist_id: Optional[str] = None) -> RPCReply:
+        operation = etree.Element(_nc('commit'))
+        if confirmed:
+            _sub(operation, 'confirmed')
+            if timeout:
+                _sub(operation, 'confirm-timeout', str(timeout))
+            if persist:
+                _sub(operation, 'persist', persist)
+        if persist_id:
+            _sub(operation, 'persist-id', persist_id)
+        return await self.rpc(operation)
+
+    async def cancel_commit(self, persist_id: Optional[str] = None) -> RPCReply:
+        operation = etree.Element(_nc('cancel-commit'))
+        if persist_id:
+            _sub(operation, 'persist-id', persist_id)
+        return await self.rpc(operation)
+
+    async def discard_changes(self) -> RPCReply:
+        return await self.rpc(etree.Element(_nc('discard-changes')))
+
+    async def validate(self, source: str = 'candidate') -> RPCReply:
+        operation = etree.Element(_nc('validate'))
+        _datastore(operation, 'source', source)
+        return await self.rpc(operation)
+
+    async def lock(self, target: str = 'candidate') -> RPCReply:
+        operation = etree.Element(_nc('lock'))
+        _datastore(operation, 'target', target)
+        return await self.rpc(operation)
+
+    async def unlock(self, target: str = 'candidate') -> RPCReply:
+        operation = etree.Element(_nc('unlock'))
+        _datastore(operation, 'target', target)
+        return await self.rpc(operation)
+
+    async def close_session(self):
+        """Send <close-session> (best effort) and close the transport"""
+        if not self._closed:
+            try:
+                await self.rpc(etree.Element(_nc('close-session')), timeout=min(self.timeout, 5.0))
+            except Exception:
+                pass
+        await self.close()
+
+    async def close(self):
+        self._closed = True
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except BaseException:
+                pass
+            self._reader_task = None
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+        if self._on_close is not None:
+            on_close, self._on_close = self._on_close, None
+            await on_close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close_session()
+
+
+async def connect(host: str, port: int = 830, username: str = 'admin', password: str = 'admin',
+                  hostkey_verify: bool = False, timeout: float = 30.0, **ssh_kwargs) -> AsyncManager:
+    """Open a NETCONF session over SSH (async counterpart of manager.connect)"""
+    if asyncssh is None:
+        raise RuntimeError("asyncssh is required for async NETCONF sessions (pip install asyncssh)")
+    if not hostkey_verify:
+        ssh_kwargs.setdefault('known_hosts', None)
+    conn = await asyncio.wait_for(
+        asyncssh.connect(host, port, username=username, password=password, **ssh_kwargs), timeout)
+    try:
+        writer, reader, _ = await conn.open_session(subsystem='netconf', encoding=None)
+    except BaseException:
+        conn.close()
+        raise
+
+    async def close_connection():
+        conn.close()
+        await conn.wait_closed()
+
+    try:
+        return await AsyncManager.from_streams(reader, writer, timeout, on_close=close_connection)
+    except BaseException:
+        conn.close()
+        raise
+
+
+_ssh_connect = connect
+
+
+# ---------------------------------------------------------------------------
+# Pooling
+
+@dataclass
+class _PoolEntry:
+    conn: Optional[AsyncManager] = None
+    failures: int = 0
+    next_attempt: float = 0.0
+    lock: Optional[asyncio.Lock] = None
+
+
+class AsyncSessionPool:
+    """Async counterpart of netconf_pool.SessionPool, keyed by (host, port)
+
+    Sessions stay open between sweeps; a failed connect backs off
+    exponentially. max_connecting bounds concurrent SSH handshakes, the
+    expensive part of a fleet-wide reconnect.
+    """
+
+    def __init__(self, username: str = 'admin', password: str = 'admin', timeout: float = 10.0,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0, max_connecting: int = 256,
+                 connect=None, **connect_kwargs):
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_connecting = max_connecting
+        self.connect_kwargs = connect_kwargs
+        # Allows benchmarks and test servers to swap the transport
+        self._connect = connect or _ssh_connect
+        self._sessions: Dict[Tuple[str, int], _PoolEntry] = {}
+        self._connecting: Optional[asyncio.Semaphore] = None
+
+    def _entry(self, key) -> _PoolEntry:
+        entry = self._sessions.get(key)
+        if entry is None:
+            entry = self._sessions[key] = _PoolEntry(lock=asyncio.Lock())
+        return entry
+
+    async def get(self, host: str, port: int, timeout: Optional[float] = None) -> AsyncManager:
+        from netconf_pool import SessionUnavailable
+
+        entry = self._entry((host, port))
+        async with entry.lock:
+            if entry.conn is not None and entry.conn.connected:
+                return entry.conn
+            entry.conn = None
+
+            now = time.monotonic()
+            if now < entry.next_attempt:
+                raise SessionUnavailable(
+                    f"{host}:{port} backing off for {entry.next_attempt - now:.1f}s "
+                    f"after {entry.failures} failed attempts"
+                )
+            if self._connecting is None:
+                self._connecting = asyncio.Semaphore(self.max_connecting)
+            try:
+                async with self._connecting:
+                    entry.conn = await self._connect(
+                        host=host, port=port, username=self.username, password=self.password,
+                        hostkey_verify=False, timeout=timeout or self.timeout, **self.connect_kwargs)
+            except Exception as e:
+                entry.failures += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (entry.failures - 1))
+                entry.next_attempt = time.monotonic() + delay
+                raise SessionUnavailable(f"Could not connect to {host}:{port}: {e}") from e
+            entry.failures = 0
+            entry.next_attempt = 0.0
+            return entry.conn
+
+    async def invalidate(self, host: str, port: int):
+        """Drop a session after an RPC failure so the next get() reconnects"""
+        entry = self._sessions.get((host, port))
+        if entry is not None and entry.conn is not None:
+            conn, entry.conn = entry.conn, None
+            await conn.close()
+
+    async def close_all(self):
+        entries = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(e.conn.close_session() for e in entries if e.conn is not None),
+                             return_exceptions=True)
+
+
+async def gather_limited(coroutines: Iterable, limit: int) -> list:
+    """Run coroutines with at most limit in flight, results in order"""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(bounded(c) for c in coroutines))
+
+
+class EventLoopThread:
+    """An event loop in a daemon thread, for driving async sessions from sync code"""
+
+    def __init__(self, name: str = 'netconf-async'):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    def run(self, coroutine, timeout: Optional[float] = None):
+        """Run a coroutine on the loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def stop(self):
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+        if not self.loop.is_running():
+            self.loop.close()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+NETCONF Config-Change Notifications
+Subscribes to RFC 5277 notifications on a dedicated long-lived session per
+device and reports RFC 6470 <netconf-config-change> events, so the checker
+only re-reads interfaces that actually changed instead of polling.
+
+Devices that do not advertise :notification are left to regular polling.
+"""
+
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from lxml import etree
+
+NOTIFICATION_CAPABILITY = "urn:ietf:params:netconf:capability:notification:1.0"
+NETCONF_NOTIFICATIONS_NS = "urn:ietf:params:xml:ns:yang:ietf-netconf-notifications"
+
+# Only ask for config-change events on the NETCONF stream
+CONFIG_CHANGE_FILTER = f'<netconf-config-change xmlns="{NETCONF_NOTIFICATIONS_NS}"/>'
+
+CONFIG_CHANGE_TAG = f"{{{NETCONF_NOTIFICATIONS_NS}}}netconf-config-change"
+DATASTORE_TAG = f"{{{NETCONF_NOTIFICATIONS_NS}}}datastore"
+EDIT_TAG = f"{{{NETCONF_NOTIFICATIONS_NS}}}edit"
+TARGET_TAG = f"{{{NETCONF_NOTIFICATIONS_NS}}}target"
+
+# /if:interfaces/if:interface[if:name='eth1']/... -> eth1
+INTERFACE_KEY_RE = re.compile(r"""interface\[\s*(?:[\w.-]+:)?name\s*=\s*(['"])(.*?)\1\s*\]""")
+
+
+@dataclass
+class ConfigChange:
+    """One netconf-config-change event
+
+    interfaces is None when an edit could not be narrowed down to
+    individual interfaces (e.g. a whole-datastore replace).
+    """
+    device: str
+    datastore: str = "running"
+    interfaces: Optional[Set[str]] = None
+    timestamp: datetime = field(default_factory=datetime.now)
+
+
+def parse_config_change(device: str, notification_xml) -> Optional[ConfigChange]:
+    """Extract the changed interfaces from a notification, if it is a config change"""
+    root = etree.fromstring(notification_xml.encode() if isinstance(notification_xml, str)
+                            else notification_xml)
+    event = root if root.tag == CONFIG_CHANGE_TAG else next(root.iter(CONFIG_CHANGE_TAG), None)
+    if event is None:
+        return None
+
+    datastore = event.findtext(DATASTORE_TAG) or "running"
+    interfaces: Optional[Set[str]] = set()
+    edits = event.findall(EDIT_TAG)
+    if not edits:
+        interfaces = None
+    for edit in edits:
+        names = [m.group(2) for m in INTERFACE_KEY_RE.finditer(edit.findtext(TARGET_TAG) or "")]
+        if not names:
+            interfaces = None
+            break
+        interfaces.update(names)
+    return ConfigChange(device, datastore.strip(), interfaces)
+
+
+class NotificationListener:
+    """One subscription thread per device, reconnecting with backoff"""
+
+    def __init__(self, devices: Dict[str, Tuple[str, int]],
+                 open_session: Callable[[str, int], object],
+                 on_change: Callable[[ConfigChange], None],
+                 on_resync: Optional[Callable[[str], None]] = None,
+                 on_subscribed: Optional[Callable[[str, bool], None]] = None,
+                 poll_timeout: float = 1.0, backoff_base: float = 1.0, backoff_max: float = 60.0):
+        """
+        devices:      (host, port) per device name
+        open_session: opens a dedicated session; it is never shared with
+                      other RPCs, as RFC 5277 sessions are busy once subscribed
+        on_change:    called from the device's thread for every config change
+        on_resync:    called after a re-subscription, to catch up on events
+                      missed while the subscription was down
+        on_subscribed: called with (name, True/False) whenever a device's
+                      subscription comes up or drops
+        """
+        self.devices = dict(devices)
+        self.open_session = open_session
+        self.on_change = on_change
+        self.on_resync = on_resync
+        self.on_subscribed = on_subscribed
+        self.poll_timeout = poll_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.subscribed: Set[str] = set()
+        self.unsupported: Set[str] = set()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._settled: Dict[str, threading.Event] = {name: threading.Event() for name in devices}
+        self._threads = []
+
+    def start(self):
+        for name in self.devices:
+            thread = threading.Thread(target=self._listen, args=(name,),
+                                      name=f"notify-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def wait_ready(self, timeout: float) -> Set[str]:
+        """Wait until every device has subscribed, refused or failed once"""
+        deadline = time.monotonic() + timeout
+        for event in self._settled.values():
+            if not event.wait(max(0.0, deadline - time.monotonic())):
+                break
+        with self._lock:
+            return set(self.subscribed)
+
+    def stop(self):
+        self._stop.set()
+
+    def _set_subscribed(self, name: str, subscribed: bool):
+        with self._lock:
+            changed = subscribed != (name in self.subscribed)
+            if subscribed:
+                self.subscribed.add(name)
+            else:
+                self.subscribed.discard(name)
+        if changed and self.on_subscribed:
+            self.on_subscribed(name, subscribed)
+
+    def _listen(self, name: str):
+        host, port = self.devices[name]
+        failures = 0
+        first = True
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self.open_session(host, port)
+                if NOTIFICATION_CAPABILITY not in conn.server_capabilities:
+                    with self._lock:
+                        self.unsupported.add(name)
+                    return
+                conn.create_subscription(filter=('subtree', CONFIG_CHANGE_FILTER))
+                self._set_subscribed(name, True)
+                self._settled[name].set()
+                failures = 0
+                if not first and self.on_resync:
+                    self.on_resync(name)
+                first = False
+
+                while not self._stop.is_set() and conn.connected:
+                    notification = conn.take_notification(block=True, timeout=self.poll_timeout)
+                    if notification is None:
+                        continue
+                    change = parse_config_change(name, notification.notification_xml)
+                    if change is not None and change.datastore == "running":
+                        self.on_change(change)
+                if not self._stop.is_set():
+                    raise ConnectionError("session closed by peer")
+            except Exception as e:
+                failures += 1
+                if failures == 1:
+                    print(f"⚠️  Notification subscription to {name} unavailable: {e}")
+            finally:
+                self._set_subscribed(name, False)
+                self._settled[name].set()
+                if conn is not None:
+                    try:
+                        conn.close_session()
+                    except Exception:
+                        pass
+            if failures:
+                self._stop.wait(min(self.backoff_max, self.backoff_base * 2 ** (failures - 1)))
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+NETCONF Payload Builder
+Shared <config> payloads for edit-config, used by operations/network-cfg.py,
+operations/reset_devices.py, config_diff.py, exercise2_solution.py and the
+Ansible playbook (through ansible/filter_plugins).
+
+Each kind of <interface> entry is built once with lxml element factories and
+compiled into its serialized static parts; filling it is a join of those
+parts with escaped values, and a payload is only the precompiled envelope
+around a join of entries. Nothing is re-rendered or re-serialized per
+interface. Reset entries, identical for every device of a role, are
+memoized; address entries are not, as addresses are unique per device.
+"""
+
+import os
+from functools import lru_cache
+from ipaddress import IPv4Interface
+from typing import Iterable, Mapping, Optional, Tuple, Union
+from xml.sax.saxutils import escape
+
+from lxml import etree
+from lxml.builder import ElementMaker
+
+NC_NS = 'urn:ietf:params:xml:ns:netconf:base:1.0'
+IF_NS = 'urn:ietf:params:xml:ns:yang:ietf-interfaces'
+IP_NS = 'urn:ietf:params:xml:ns:yang:ietf-ip'
+NC_OPERATION = f'{{{NC_NS}}}operation'
+
+MISC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'misc')
+
+# Reset modes and the misc/ template each one is built from
+RESET_TEMPLATES = {
+    'ip': 'remove-all-ip.xml',                     # drop the ipv4 container
+    'interface': 'remove-interface-template.xml',  # drop the whole interface
+}
+
+IF = ElementMaker(namespace=IF_NS, nsmap={None: IF_NS})
+IP = ElementMaker(namespace=IP_NS, nsmap={None: IP_NS, 'nc': NC_NS})
+
+CONFIG_HEAD = f'<config xmlns="{NC_NS}"><interfaces xmlns="{IF_NS}">'
+CONFIG_TAIL = '</interfaces></config>'
+
+# Placeholder text marking where compile_template() splits a prototype
+SLOT = '__payload_slot_{}__'
+
+
+def compile_template(prototype: etree._Element, slots: int) -> Tuple[str, ...]:
+    """Serialize a prototype once and split it at its SLOT placeholders"""
+    parts = [etree.tostring(prototype).decode()]
+    for i in range(slots):
+        head, tail = parts[-1].split(SLOT.format(i))
+        parts[-1:] = [head, tail]
+    return tuple(parts)
+
+
+def _text(value) -> str:
+    text = str(value)
+    # Most values (names, addresses, numbers) need no escaping at all
+    if '&' in text or '<' in text or '>' in text:
+        return escape(text)
+    return text
+
+
+def fill_template(parts: Tuple[str, ...], *values) -> str:
+    """Join compiled parts with escaped values"""
+    out = [parts[0]]
+    for value, part in zip(values, parts[1:]):
+        out.append(_text(value))
+        out.append(part)
+    return ''.join(out)
+
+
+@lru_cache(maxsize=None)
+def _ipv4_template(operation: Optional[str], enabled: Optional[bool]) -> Tuple[str, ...]:
+    ipv4 = IP.ipv4()
+    if operation:
+        ipv4.set(NC_OPERATION, operation)
+    if enabled is not None:
+        ipv4.append(IP.enabled('true' if enabled else 'false'))
+    ipv4.append(IP.address(IP.ip(SLOT.format(1)), IP('prefix-length', SLOT.format(2))))
+    return compile_template(IF.interface(IF.name(SLOT.format(0)), ipv4), 3)
+
+
+def ipv4_entry(name: str, ip: str, prefix_length: int,
+               operation: Optional[str] = 'replace', enabled: Optional[bool] = True) -> str:
+    """Serialized <interface> entry setting one IPv4 address
+
+    operation=None leaves the default (merge); enabled=None omits the leaf.
+    """
+    head, after_name, after_ip, tail = _ipv4_template(operation, enabled)
+    return f"{head}{_text(name)}{after_name}{_text(ip)}{after_ip}{int(prefix_length)}{tail}"
+
+
+def ipv4_delta_entry(name: str, address: Optional[Tuple[str, int]] = None,
+                     remove: Iterable[str] = (), enable: bool = False) -> str:
+    """Serialized <interface> entry merging only the given IPv4 changes
+
+    address adds or fixes one address, remove drops addresses by IP and
+    enable turns ipv4 back on; other ipv4 leaves (mtu, neighbors, ...) are
+    left untouched. Only built for interfaces that differ, so it is not
+    precompiled.
+    """
+    ipv4 = IP.ipv4()
+    if enable:
+        ipv4.append(IP.enabled('true'))
+    for ip in remove:
+        entry = IP.address(IP.ip(ip))
+        entry.set(NC_OPERATION, 'remove')
+        ipv4.append(entry)
+    if address is not None:
+        ip, prefix_length = address
+        ipv4.append(IP.address(IP.ip(ip), IP('prefix-length', str(int(prefix_length)))))
+    return etree.tostring(IF.interface(IF.name(name), ipv4)).decode()
+
+
+@lru_cache(maxsize=None)
+def _reset_template(mode: str) -> Tuple[str, ...]:
+    """The <interface> entry of a misc/ reset template, compiled"""
+    parser = etree.XMLParser(remove_blank_text=True)
+    tree = etree.parse(os.path.join(MISC_DIR, RESET_TEMPLATES[mode]), parser)
+    template = tree.getroot().find(f'{{{IF_NS}}}interface')
+    # Templates use "delete", which fails on an already clean interface;
+    # "remove" has the same effect but is idempotent
+    for elem in template.iter():
+        if elem.get(NC_OPERATION) is not None:
+            elem.set(NC_OPERATION, 'remove')
+    template.find(f'{{{IF_NS}}}name').text = SLOT.format(0)
+    return compile_template(template, 1)
+
+
+@lru_cache(maxsize=65536)
+def reset_entry(name: str, mode: str = 'ip') -> str:
+    """Serialized <interface> entry removing an interface's IPv4 config (or the interface)"""
+    return fill_template(_reset_template(mode), name)
+
+
+def config_payload(entries: Iterable[str]) -> str:
+    """Wrap serialized <interface> entries into one <config> payload"""
+    return CONFIG_HEAD + ''.join(entries) + CONFIG_TAIL
+
+
+def interfaces_payload(interfaces: Mapping[str, Union[IPv4Interface, str]],
+                       operation: Optional[str] = 'replace', enabled: Optional[bool] = True) -> str:
+    """One <config> setting the address of every given interface"""
+    entries = []
+    for name, address in interfaces.items():
+        address = address if isinstance(address, IPv4Interface) else IPv4Interface(address)
+        entries.append(ipv4_entry(name, str(address.ip), address.network.prefixlen, operation, enabled))
+    return config_payload(entries)
+
+
+def reset_payload(interfaces: Iterable[str], mode: str = 'ip') -> str:
+    """One <config> resetting every given interface"""
+    return config_payload(reset_entry(name, mode) for name in sorted(interfaces))
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+NETCONF Session Pool
+Keeps NETCONF sessions alive between operations so that repeated sweeps
+do not pay an SSH key exchange and NETCONF hello per device per cycle.
+
+Used by network_check.py, operations/network-cfg.py and
+operations/reset_devices.py.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from ncclient import manager
+
+# Cheap health-check RPC: a get-config filtered on an interface that never
+# exists returns an empty <data/> without walking the datastore
+HEALTH_CHECK_FILTER = '''
+<interfaces xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">
+  <interface>
+    <name>__session-pool-health-check__</name>
+  </interface>
+</interfaces>'''
+
+SessionKey = Tuple[str, int]
+
+
+def with_timeout(conn: manager.Manager, timeout: float) -> manager.Manager:
+    """A handle on conn's session whose RPCs time out after timeout seconds
+
+    ncclient only has a per-Manager timeout. This shallow copy shares the
+    session but not the timeout, so the other users of a pooled session
+    keep theirs. (copy.copy() would hit Manager.__getattr__, which turns
+    any unknown name into an RPC.)
+    """
+    view = object.__new__(type(conn))
+    view.__dict__.update(vars(conn))
+    view.timeout = timeout
+    return view
+
+
+class SessionUnavailable(ConnectionError):
+    """Raised when a device cannot be reached or is still backing off"""
+
+
+@dataclass
+class PooledSession:
+    """A NETCONF session and its reconnect bookkeeping"""
+    conn: Optional[manager.Manager] = None
+    last_used: float = 0.0
+    failures: int = 0
+    next_attempt: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class SessionPool:
+    """Pool of long-lived NETCONF sessions keyed by (host, port)"""
+
+    def __init__(self, username: str = 'admin', password: str = 'admin',
+                 timeout: int = 10, health_check_interval: float = 15.0,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 connect: Optional[Callable[..., manager.Manager]] = None,
+                 **connect_kwargs):
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.connect_kwargs = connect_kwargs
+        # Allows tests, benchmarks and simulators to swap the transport
+        self._connect = connect or manager.connect
+        self._sessions: Dict[SessionKey, PooledSession] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key: SessionKey) -> PooledSession:
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None:
+                entry = self._sessions[key] = PooledSession()
+            return entry
+
+    def open(self, host: str, port: int, timeout: Optional[float] = None) -> manager.Manager:
+        """Open a dedicated session that is not managed by the pool
+
+        timeout only bounds the connect: the session's RPCs get the pool's
+        timeout, not a caller's adaptive one (see with_timeout).
+        """
+        conn = self._connect(
+            host=host,
+            port=port,
+            username=self.username,
+            password=self.password,
+            hostkey_verify=False,
+            timeout=timeout or self.timeout,
+            **self.connect_kwargs
+        )
+        conn.timeout = self.timeout
+        return conn
+
+    def _is_healthy(self, entry: PooledSession) -> bool:
+        """Check a cached session, issuing an RPC only if it has been idle"""
+        if entry.conn is None or not entry.conn.connected:
+            return False
+        if time.monotonic() - entry.last_used < self.health_check_interval:
+            return True
+        try:
+            entry.conn.get_config(source='running', filter=('subtree', HEALTH_CHECK_FILTER))
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, entry: PooledSession):
+        if entry.conn is not None:
+            try:
+                entry.conn.close_session()
+            except Exception:
+                pass
+        entry.conn = None
+
+    def get(self, host: str, port: int, timeout: Optional[float] = None) -> manager.Manager:
+        """Return a live session, reconnecting lazily with backoff
+
+        timeout overrides the pool's connect timeout for this attempt.
+        """
+        key = (host, port)
+        entry = self._entry(key)
+
+        with entry.lock:
+            if self._is_healthy(entry):
+                entry.last_used = time.monotonic()
+                return entry.conn
+
+            self._discard(entry)
+
+            now = time.monotonic()
+            if now < entry.next_attempt:
+                raise SessionUnavailable(
+                    f"{host}:{port} backing off for {entry.next_attempt - now:.1f}s "
+                    f"after {entry.failures} failed attempts"
+                )
+
+            try:
+                entry.conn = self.open(host, port, timeout)
+            except Exception as e:
+                entry.failures += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (entry.failures - 1))
+                entry.next_attempt = time.monotonic() + delay
+                raise SessionUnavailable(f"Could not connect to {host}:{port}: {e}") from e
+
+            entry.failures = 0
+            entry.next_attempt = 0.0
+            entry.last_used = time.monotonic()
+            return entry.conn
+
+    def invalidate(self, host: str, port: int):
+        """Drop a session after an RPC failure so the next get() reconnects"""
+        entry = self._entry((host, port))
+        with entry.lock:
+            self._discard(entry)
+
+    @contextmanager
+    def session(self, host: str, port: int):
+        """Borrow a session; it is invalidated if the block raises"""
+        conn = self.get(host, port)
+        try:
+            yield conn
+        except Exception:
+            self.invalidate(host, port)
+            raise
+
+    def close_all(self):
+        """Close every pooled session"""
+        with self._lock:
+            entries = list(self._sessions.values())
+            self._sessions.clear()
+        for entry in entries:
+            with entry.lock:
+                self._discard(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close_all()
@@ -0,0 +1,605 @@
+#!/usr/bin/env python3
+"""
+In-process NETCONF Device Simulator
+Stands in for ncclient's manager.connect() so the checker and the config
+scripts can be exercised against hundreds of devices without Docker.
+
+Each simulated device is seeded from yang-models/<role>/startup/*.xml and
+keeps its own running, candidate and startup datastores. Connects and RPCs
+sleep for a configurable latency with jitter to mimic SSH handshakes and
+round trips. Every change to running is published as an RFC 6470
+<netconf-config-change> notification to subscribed sessions.
+
+Example:
+    fleet = SimulatedFleet.scaled(ran=100, router=50, core=1, latency=0.02)
+    pool = SessionPool(connect=fleet.connect)
+"""
+
+import copy
+import ipaddress
+import itertools
+import os
+import queue
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from lxml import etree
+
+from topology import DeviceSpec, NetworkLink, TopologyIndex
+
+YANG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'yang-models')
+NC_NS = 'urn:ietf:params:xml:ns:netconf:base:1.0'
+IF_NS = 'urn:ietf:params:xml:ns:yang:ietf-interfaces'
+IP_NS = 'urn:ietf:params:xml:ns:yang:ietf-ip'
+IANA_IF_NS = 'urn:ietf:params:xml:ns:yang:iana-if-type'
+NOTIFICATION_NS = 'urn:ietf:params:xml:ns:netconf:notification:1.0'
+NC_NOTIFICATIONS_NS = 'urn:ietf:params:xml:ns:yang:ietf-netconf-notifications'
+NC_OPERATION = f'{{{NC_NS}}}operation'
+
+SIM_HOST = 'netconf-sim'
+
+BASE_CAPABILITIES = (
+    'urn:ietf:params:netconf:base:1.0',
+    'urn:ietf:params:netconf:base:1.1',
+    'urn:ietf:params:netconf:capability:writable-running:1.0',
+    'urn:ietf:params:netconf:capability:candidate:1.0',
+    'urn:ietf:params:netconf:capability:confirmed-commit:1.1',
+    'urn:ietf:params:netconf:capability:validate:1.1',
+    'urn:ietf:params:netconf:capability:startup:1.0',
+    'urn:ietf:params:netconf:capability:notification:1.0',
+)
+
+
+class SimulatedRPCError(Exception):
+    """An <rpc-error> returned by a simulated device"""
+
+    def __init__(self, tag: str, message: str):
+        super().__init__(f"{tag}: {message}")
+        self.tag = tag
+
+
+class SimCapabilities:
+    """Capability set accepting both full URIs and ':name' shorthands"""
+
+    def __init__(self, uris):
+        self._uris = set(uris)
+        self._short = set()
+        for uri in self._uris:
+            match = re.match(r'urn:ietf:params:netconf:capability:([^:]+):', uri)
+            if match:
+                self._short.add(f':{match.group(1)}')
+
+    def __contains__(self, item) -> bool:
+        return item in self._uris or item in self._short
+
+    def __iter__(self):
+        return iter(sorted(self._uris))
+
+
+@dataclass
+class SimReply:
+    """Minimal stand-in for ncclient's RPCReply/GetReply"""
+    data_ele: Optional[etree._Element] = None
+    ok: bool = True
+
+    @property
+    def data_xml(self) -> str:
+        return etree.tostring(self.data_ele).decode() if self.data_ele is not None else ""
+
+    @property
+    def xml(self) -> str:
+        body = self.data_xml or '<ok/>'
+        return f'<rpc-reply xmlns="{NC_NS}">{body}</rpc-reply>'
+
+
+@dataclass
+class SimNotification:
+    """Minimal stand-in for ncclient's Notification"""
+    notification_xml: str
+
+    @property
+    def notification_ele(self) -> etree._Element:
+        return etree.fromstring(self.notification_xml.encode())
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+# Key leaf of the YANG lists whose key is not <name> (ietf-ip)
+LIST_KEYS = {'address': 'ip', 'neighbor': 'ip'}
+
+
+def _key_of(elem) -> Optional[str]:
+    """List key of an entry: the text of its key child (<name> by default), if any"""
+    ns = elem.tag[1:].split('}')[0] if elem.tag.startswith('{') else ''
+    leaf = LIST_KEYS.get(_local(elem.tag), 'name')
+    key = elem.find(f'{{{ns}}}{leaf}') if ns else elem.find(leaf)
+    return key.text.strip() if key is not None and key.text else None
+
+
+def _find_match(parent, elem):
+    key = _key_of(elem)
+    for candidate in parent.iterchildren(elem.tag):
+        if key is None or _key_of(candidate) == key:
+            return candidate
+    return None
+
+
+def _strip_operations(elem):
+    for node in elem.iter():
+        node.attrib.pop(NC_OPERATION, None)
+    return elem
+
+
+def _apply_edit(target_parent, source_parent, default_operation: str):
+    """Apply <config> children onto a datastore following RFC 6241 semantics"""
+    for child in source_parent:
+        if not isinstance(child.tag, str):
+            continue
+        operation = child.get(NC_OPERATION, default_operation)
+        match = _find_match(target_parent, child)
+
+        if operation in ('delete', 'remove'):
+            if match is None:
+                if operation == 'delete':
+                    raise SimulatedRPCError('data-missing', f'{_local(child.tag)} does not exist')
+                continue
+            target_parent.remove(match)
+        elif operation == 'create' and match is not None:
+            raise SimulatedRPCError('data-exists', f'{_local(child.tag)} already exists')
+        elif operation == 'replace':
+            new = _strip_operations(copy.deepcopy(child))
+            if match is not None:
+                target_parent.replace(match, new)
+            else:
+                target_parent.append(new)
+        elif len(child) == 0:
+            if match is None:
+                match = etree.SubElement(target_parent, child.tag, nsmap=child.nsmap)
+            match.text = child.text
+        else:
+            if match is None:
+                match = etree.SubElement(target_parent, child.tag, nsmap=child.nsmap)
+            _apply_edit(match, child, 'merge' if operation == 'create' else operation)
+
+
+def _apply_filter(data, flt) -> Optional[etree._Element]:
+    """Subtree filtering (RFC 6241 section 6) of one data node"""
+    children = [c for c in flt if isinstance(c.tag, str)]
+    if not children:
+        return copy.deepcopy(data)
+
+    content_match = [c for c in children if len(c) == 0 and c.text and c.text.strip()]
+    others = [c for c in children if c not in content_match]
+
+    for cm in content_match:
+        if not any((d.text or '').strip() == cm.text.strip() for d in data.iterchildren(cm.tag)):
+            return None
+
+    result = etree.Element(data.tag, nsmap=data.nsmap)
+    result.text = data.text
+    if not others:
+        for child in data:
+            result.append(copy.deepcopy(child))
+        return result
+
+    for cm in content_match:
+        for d in data.iterchildren(cm.tag):
+            result.append(copy.deepcopy(d))
+    for f in others:
+        for d in data.iterchildren(f.tag):
+            selected = _apply_filter(d, f)
+            if selected is not None:
+                result.append(selected)
+    return result
+
+
+def _interface_entries(interfaces) -> Dict[str, bytes]:
+    """Serialized <interface> entries of a datastore, by name"""
+    return {_key_of(entry): etree.tostring(entry) for entry in interfaces
+            if isinstance(entry.tag, str) and _local(entry.tag) == 'interface'}
+
+
+def _parse_fragment(xml) -> etree._Element:
+    if isinstance(xml, etree._Element):
+        return xml
+    return etree.fromstring(xml.encode() if isinstance(xml, str) else xml)
+
+
+class SimulatedDevice:
+    """Datastores and behaviour of one simulated NETCONF server"""
+
+    def __init__(self, name: str, role: str, port: int, interfaces: etree._Element):
+        self.name = name
+        self.role = role
+        self.port = port
+        self.lock = threading.RLock()
+        self.datastores: Dict[str, etree._Element] = {
+            'running': interfaces,
+            'startup': copy.deepcopy(interfaces),
+            'candidate': copy.deepcopy(interfaces),
+        }
+        self.locks: Dict[str, Optional[int]] = {'running': None, 'candidate': None, 'startup': None}
+        self.down = False
+        # Blackholed: connects and RPCs hang until the caller's timeout
+        self.unresponsive = False
+        self.rpc_count = 0
+        self.subscribers: Dict[int, queue.Queue] = {}
+        self._confirm_timer: Optional[threading.Timer] = None
+        self._rollback: Optional[etree._Element] = None
+
+    def data(self, source: str) -> etree._Element:
+        data = etree.Element(f'{{{NC_NS}}}data', nsmap={None: NC_NS})
+        data.append(copy.deepcopy(self.datastores[source]))
+        return data
+
+    def set_running(self, interfaces: etree._Element, session_id: int = 0):
+        """Replace running and notify subscribers of the interfaces that changed"""
+        with self.lock:
+            old = _interface_entries(self.datastores['running'])
+            new = _interface_entries(interfaces)
+            self.datastores['running'] = interfaces
+            changed = sorted(name for name in old.keys() | new.keys() if old.get(name) != new.get(name))
+            if changed and self.subscribers:
+                notification = SimNotification(self._config_change_xml(changed, session_id))
+                for subscriber in self.subscribers.values():
+                    subscriber.put(notification)
+
+    @staticmethod
+    def _config_change_xml(interfaces: List[str], session_id: int) -> str:
+        edits = "".join(
+            f"<edit><target xmlns:if=\"{IF_NS}\">/if:interfaces/if:interface[if:name='{name}']</target>"
+            f"<operation>merge</operation></edit>"
+            for name in interfaces
+        )
+        changed_by = f"<session-id>{session_id}</session-id>" if session_id else "<server/>"
+        event_time = datetime.now(timezone.utc).isoformat()
+        return (
+            f'<notification xmlns="{NOTIFICATION_NS}"><eventTime>{event_time}</eventTime>'
+            f'<netconf-config-change xmlns="{NC_NOTIFICATIONS_NS}">'
+            f'<changed-by>{changed_by}</changed-by><datastore>running</datastore>{edits}'
+            f'</netconf-config-change></notification>'
+        )
+
+
+class SimulatedSession:
+    """ncclient Manager look-alike bound to one SimulatedDevice"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, fleet: 'SimulatedFleet', device: SimulatedDevice, timeout: float = 30.0):
+        self.fleet = fleet
+        self.device = device
+        self.session_id = next(self._ids)
+        self.server_capabilities = SimCapabilities(BASE_CAPABILITIES)
+        self.connected = True
+        # RPC timeout, settable per request like Manager.timeout
+        self.timeout = timeout
+
+    # ------------------------------------------------------------------
+
+    def _rpc(self):
+        if not self.connected:
+            raise SimulatedRPCError('transport', 'session closed')
+        if self.device.down:
+            self.connected = False
+            raise SimulatedRPCError('transport', f'{self.device.name} is unreachable')
+        if self.device.unresponsive:
+            time.sleep(self.timeout)
+            self.connected = False
+            raise TimeoutError(f'{self.device.name} did not reply within {self.timeout}s')
+        self.fleet.sleep()
+        self.device.rpc_count += 1
+
+    def _check_lock(self, target: str):
+        owner = self.device.locks.get(target)
+        if owner is not None and owner != self.session_id:
+            raise SimulatedRPCError('in-use', f'{target} locked by session {owner}')
+
+    # ------------------------------------------------------------------
+
+    def get_config(self, source='running', filter=None):
+        self._rpc()
+        with self.device.lock:
+            data = self.device.data(source)
+        if filter is None:
+            return SimReply(data)
+
+        if isinstance(filter, tuple):
+            kind, criteria = filter
+            if kind != 'subtree':
+                raise SimulatedRPCError('operation-not-supported', f'{kind} filters are not supported')
+        else:
+            criteria = filter
+        flt = _parse_fragment(criteria)
+        roots = list(flt) if _local(flt.tag) == 'filter' else [flt]
+
+        result = etree.Element(f'{{{NC_NS}}}data', nsmap={None: NC_NS})
+        for f in roots:
+            for d in data.iterchildren(f.tag):
+                selected = _apply_filter(d, f)
+                if selected is not None:
+                    result.append(selected)
+        return SimReply(result)
+
+    def get(self, filter=None):
+        return self.get_config('running', filter)
+
+    def edit_config(self, config, target='candidate', default_operation=None, **kwargs):
+        self._rpc()
+        root = _parse_fragment(config)
+        source = root if _local(root.tag) == 'config' else etree.Element('config')
+        if source is not root:
+            source.append(copy.deepcopy(root))
+        with self.device.lock:
+            self._check_lock(target)
+            working = etree.Element('root')
+            working.append(copy.deepcopy(self.device.datastores[target]))
+            _apply_edit(working, source, default_operation or 'merge')
+            result = working[0] if len(working) else \
+                etree.Element(f'{{{IF_NS}}}interfaces', nsmap={None: IF_NS})
+            if target == 'running':
+                self.device.set_running(result, self.session_id)
+            else:
+                self.device.datastores[target] = result
+        return SimReply()
+
+    def lock(self, target='running'):
+        self._rpc()
+        with self.device.lock:
+            self._check_lock(target)
+            self.device.locks[target] = self.session_id
+        return SimReply()
+
+    def unlock(self, target='running'):
+        self._rpc()
+        with self.device.lock:
+            if self.device.locks.get(target) == self.session_id:
+                self.device.locks[target] = None
+        return SimReply()
+
+    def discard_changes(self):
+        self._rpc()
+        with self.device.lock:
+            self.device.datastores['candidate'] = copy.deepcopy(self.device.datastores['running'])
+        return SimReply()
+
+    def validate(self, source='candidate'):
+        self._rpc()
+        return SimReply()
+
+    def commit(self, confirmed=False, timeout=None, persist=None, persist_id=None):
+        self._rpc()
+        device = self.device
+        with device.lock:
+            if device._confirm_timer is not None:
+                device._confirm_timer.cancel()
+                device._confirm_timer = None
+            if confirmed:
+                device._rollback = copy.deepcopy(device.datastores['running'])
+                device._confirm_timer = threading.Timer(float(timeout or 600), self._revert)
+                device._confirm_timer.daemon = True
+                device._confirm_timer.start()
+            else:
+                device._rollback = None
+            device.set_running(copy.deepcopy(device.datastores['candidate']), self.session_id)
+        return SimReply()
+
+    def _revert(self):
+        device = self.device
+        with device.lock:
+            if device._rollback is not None:
+                device.set_running(device._rollback)
+                device.datastores['candidate'] = copy.deepcopy(device._rollback)
+                device._rollback = None
+            device._confirm_timer = None
+
+    def cancel_commit(self, persist_id=None):
+        self._rpc()
+        with self.device.lock:
+            if self.device._confirm_timer is None:
+                raise SimulatedRPCError('operation-failed', 'no confirmed commit in progress')
+            self.device._confirm_timer.cancel()
+        self._revert()
+        return SimReply()
+
+    def copy_config(self, source, target):
+        self._rpc()
+        with self.device.lock:
+            result = copy.deepcopy(self.device.datastores[source])
+            if target == 'running':
+                self.device.set_running(result, self.session_id)
+            else:
+                self.device.datastores[target] = result
+        return SimReply()
+
+    def create_subscription(self, filter=None, stream_name=None, start_time=None, stop_time=None):
+        """Subscribe to the NETCONF stream (config-change events only)"""
+        self._rpc()
+        with self.device.lock:
+            if self.session_id in self.device.subscribers:
+                raise SimulatedRPCError('in-use', 'subscription already active')
+            self.device.subscribers[self.session_id] = queue.Queue()
+        return SimReply()
+
+    def take_notification(self, block=True, timeout=None) -> Optional[SimNotification]:
+        subscriber = self.device.subscribers.get(self.session_id)
+        if self.device.down:
+            self.close_session()
+        if not self.connected or subscriber is None:
+            return None
+        try:
+            return subscriber.get(block, timeout)
+        except queue.Empty:
+            return None
+
+    # ------------------------------------------------------------------
+
+    def close_session(self):
+        if self.connected:
+            self.connected = False
+            with self.device.lock:
+                self.device.subscribers.pop(self.session_id, None)
+                for ds, owner in self.device.locks.items():
+                    if owner == self.session_id:
+                        self.device.locks[ds] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close_session()
+
+
+class SimulatedFleet:
+    """A set of simulated devices reachable through connect(host, port, ...)"""
+
+    ROLE_STARTUP = {
+        'ran': os.path.join(YANG_DIR, 'ran', 'startup', 'ran-config.xml'),
+        'router': os.path.join(YANG_DIR, 'router', 'startup', 'router-config.xml'),
+        'core': os.path.join(YANG_DIR, 'core', 'startup', 'core-config.xml'),
+    }
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0,
+                 connect_latency: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.connect_latency = connect_latency
+        self.devices: Dict[int, SimulatedDevice] = {}
+        self.by_name: Dict[str, SimulatedDevice] = {}
+        self.links: List[NetworkLink] = []
+        # Addresses assigned by scaled(), in NETWORK_CONFIG form
+        self.assignments: Dict[str, Dict[str, ipaddress.IPv4Interface]] = {}
+        self.connect_count = 0
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._parser = etree.XMLParser(remove_blank_text=True)
+        self._ports = itertools.count(20000)
+
+    def sleep(self, base: Optional[float] = None):
+        base = self.latency if base is None else base
+        if base <= 0 and self.jitter <= 0:
+            return
+        with self._random_lock:
+            delay = base + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def add_device(self, name: str, role: str) -> SimulatedDevice:
+        """Create a device seeded from its role's startup configuration"""
+        seed = etree.parse(self.ROLE_STARTUP[role], self._parser).getroot()
+        device = SimulatedDevice(name, role, next(self._ports), seed)
+        self.devices[device.port] = device
+        self.by_name[name] = device
+        return device
+
+    def connect(self, host=SIM_HOST, port=830, **kwargs) -> SimulatedSession:
+        """Drop-in replacement for ncclient.manager.connect"""
+        device = self.devices.get(port)
+        self.sleep(self.connect_latency)
+        if device is None or device.down:
+            raise ConnectionRefusedError(f"Could not open socket to {host}:{port}")
+        timeout = kwargs.get('timeout') or 30.0
+        if device.unresponsive:
+            time.sleep(timeout)
+            raise TimeoutError(f"Could not open socket to {host}:{port}: timed out after {timeout}s")
+        self.connect_count += 1
+        return SimulatedSession(self, device, timeout)
+
+    def device_specs(self) -> List[DeviceSpec]:
+        return [DeviceSpec(d.name, SIM_HOST, d.port) for d in self.by_name.values()]
+
+    def topology(self) -> TopologyIndex:
+        return TopologyIndex(self.links, self.device_specs())
+
+    def connections(self) -> Dict[str, dict]:
+        """CONNECTIONS mapping as used by operations/network-cfg.py"""
+        return {d.name: {'host': SIM_HOST, 'port': d.port} for d in self.by_name.values()}
+
+    def set_address(self, device_name: str, interface: str, address: str):
+        """Set (or create) an interface with a single IPv4 address in every datastore"""
+        device = self.by_name[device_name]
+        ip = ipaddress.IPv4Interface(address)
+        self.assignments.setdefault(device_name, {})[interface] = ip
+        config = (
+            f'<config xmlns="{NC_NS}"><interfaces xmlns="{IF_NS}"><interface>'
+            f'<name>{interface}</name>'
+            f'<type xmlns:ianaift="{IANA_IF_NS}">ianaift:ethernetCsmacd</type>'
+            f'<enabled>true</enabled>'
+            f'<ipv4 xmlns="{IP_NS}" xmlns:nc="{NC_NS}" nc:operation="replace"><enabled>true</enabled>'
+            f'<address><ip>{ip.ip}</ip><prefix-length>{ip.network.prefixlen}</prefix-length></address>'
+            f'</ipv4></interface></interfaces></config>'
+        )
+        source = _parse_fragment(config)
+        with device.lock:
+            for ds in ('running', 'candidate', 'startup'):
+                working = etree.Element('root')
+                working.append(copy.deepcopy(device.datastores[ds]))
+                _apply_edit(working, source, 'merge')
+                if ds == 'running':
+                    device.set_running(working[0])
+                else:
+                    device.datastores[ds] = working[0]
+
+    @classmethod
+    def lab(cls, **kwargs) -> 'SimulatedFleet':
+        """The three-device lab from docker-compose.yml, as seeded on startup"""
+        fleet = cls(**kwargs)
+        for name, role in (('RAN', 'ran'), ('Router', 'router'), ('Core', 'core')):
+            fleet.add_device(name, role)
+        return fleet
+
+    @classmethod
+    def scaled(cls, ran: int = 100, router: int = 50, core: int = 1, **kwargs) -> 'SimulatedFleet':
+        """A fleet of ran/router/core devices with consistent addressing
+
+        Every RAN backhaul0 links to a router, every router links to a core,
+        and all eth0 interfaces share one management network, mirroring the
+        lab topology at scale.
+        """
+        fleet = cls(**kwargs)
+        rans = [fleet.add_device(f"RAN-{i:03d}", 'ran').name for i in range(1, ran + 1)]
+        routers = [fleet.add_device(f"Router-{i:03d}", 'router').name for i in range(1, router + 1)]
+        cores = [fleet.add_device(f"Core-{i:03d}", 'core').name for i in range(1, core + 1)]
+
+        backhaul = ipaddress.IPv4Network('10.1.0.0/16').subnets(new_prefix=30)
+        transport = ipaddress.IPv4Network('10.2.0.0/16').subnets(new_prefix=30)
+        mgmt_net = ipaddress.IPv4Network('192.168.0.0/16')
+        mgmt_hosts = mgmt_net.hosts()
+
+        for name in itertools.chain(rans, routers, cores):
+            fleet.set_address(name, 'eth0', f"{next(mgmt_hosts)}/{mgmt_net.prefixlen}")
+
+        def connect_pair(name, a, a_iface, b, b_iface, subnet, description):
+            hosts = subnet.hosts()
+            fleet.set_address(a, a_iface, f"{next(hosts)}/{subnet.prefixlen}")
+            fleet.set_address(b, b_iface, f"{next(hosts)}/{subnet.prefixlen}")
+            fleet.links.append(NetworkLink(name, a, a_iface, b, b_iface, str(subnet), description))
+
+        router_ports: Dict[str, int] = {}
+        for i, ran_name in enumerate(rans if routers else []):
+            router_name = routers[i % len(routers)]
+            port = router_ports[router_name] = router_ports.get(router_name, 0) + 1
+            iface = 'eth1' if port == 1 else f'ran{port}'
+            connect_pair(f"{ran_name} backhaul", ran_name, 'backhaul0', router_name, iface,
+                         next(backhaul), "RAN backhaul to Router")
+            fleet.links.append(NetworkLink(f"{ran_name} mgmt", ran_name, 'eth0', router_name, 'eth0',
+                                           str(mgmt_net), "Management network"))
+
+        core_ports: Dict[str, int] = {}
+        for j, router_name in enumerate(routers if cores else []):
+            core_name = cores[j % len(cores)]
+            port = core_ports[core_name] = core_ports.get(core_name, 0) + 1
+            iface = 'eth1' if port == 1 else f'rtr{port}'
+            connect_pair(f"{router_name} transport", router_name, 'eth2', core_name, iface,
+                         next(transport), "Router to Core network")
+            fleet.links.append(NetworkLink(f"{router_name} mgmt", router_name, 'eth0', core_name, 'eth0',
+                                           str(mgmt_net), "Management network"))
+
+        return fleet
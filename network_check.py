@@ -4,14 +4,63 @@ Network Consistency Checker for Telco Lab
 Continuously monitors network link consistency between devices
 """
 
+import sys
+
+# Queries to a running daemon (links, device X, refresh Y) are answered by
+# the thin client before any of the heavy imports below
+if __name__ == "__main__" and len(sys.argv) > 1:
+    from checker_daemon import CLIENT_COMMANDS, client_main
+    if sys.argv[1] in CLIENT_COMMANDS:
+        sys.exit(client_main(sys.argv[1:]))
+
+import io
+import asyncio
 import time
+import hashlib
+import threading
 import ipaddress
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from ncclient import manager
-import xml.etree.ElementTree as ET
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
-import sys
+from netconf_pool import SessionPool, with_timeout
+from topology import DEFAULT_TOPOLOGY_FILE, NetworkLink, TopologyIndex
+from ip_analyzer import analyze_fleet, print_fleet_analysis
+from monitor_metrics import MetricsRegistry
+from poll_scheduler import PollScheduler
+from netconf_async import AsyncSessionPool, EventLoopThread
+from netconf_events import ConfigChange, NotificationListener
+from state_journal import StateJournal, main as query_journal, parse_age
+from device_health import HALF_OPEN, HealthTracker
+from datastore_check import (
+    Canonicalizer, DatastoreDrift, compare, fetch_snapshots, fetch_snapshots_async, print_drift_report
+)
+from interface_store import (
+    InterfaceStore, LINK_OK, MISSING_1, MISSING_2, DISABLED_1, DISABLED_2,
+    NO_IP_1, NO_IP_2, NO_NETWORK, DIFFERENT_NETWORKS, UNEXPECTED_NETWORK,
+)
+from lxml import etree
+from xml.sax.saxutils import escape
+from dataclasses import dataclass, field
+from functools import cached_property, partial
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+IETF_INTERFACES_NS = "urn:ietf:params:xml:ns:yang:ietf-interfaces"
+IETF_IP_NS = "urn:ietf:params:xml:ns:yang:ietf-ip"
+XPATH_CAPABILITY = "urn:ietf:params:netconf:capability:xpath:1.0"
+
+def xpath_literal(value: str) -> str:
+    """Quote a string for use as an XPath 1.0 literal
+
+    XPath 1.0 has no escapes: a value with both quote kinds becomes a
+    concat() of pieces split at its single quotes.
+    """
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    parts = value.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in parts) + ")"
 
 @dataclass
 class Interface:
@@ -21,10 +70,12 @@ class Interface:
     prefix_length: Optional[int] = None
     enabled: bool = False
     description: str = ""
+    # All (ip, prefix_length) pairs; ip_address/prefix_length hold the first
+    addresses: List[Tuple[str, int]] = field(default_factory=list)
     
-    @property
+    @cached_property
     def network(self) -> Optional[ipaddress.IPv4Network]:
-        """Get the network this interface belongs to"""
+        """Get the network this interface belongs to (computed once)"""
         if self.ip_address and self.prefix_length:
             try:
                 return ipaddress.IPv4Network(f"{self.ip_address}/{self.prefix_length}", strict=False)
@@ -39,192 +90,672 @@ class Interface:
             return f"{self.ip_address}/{self.prefix_length}"
         return "No IP"
 
+# Precompiled qualified names for the single-pass interface parser
+IF_INTERFACES_TAG = f"{{{IETF_INTERFACES_NS}}}interfaces"
+IF_INTERFACE_TAG = f"{{{IETF_INTERFACES_NS}}}interface"
+IF_NAME_TAG = f"{{{IETF_INTERFACES_NS}}}name"
+IF_DESCRIPTION_TAG = f"{{{IETF_INTERFACES_NS}}}description"
+IF_ENABLED_TAG = f"{{{IETF_INTERFACES_NS}}}enabled"
+IP_IPV4_TAG = f"{{{IETF_IP_NS}}}ipv4"
+IP_ADDRESS_TAG = f"{{{IETF_IP_NS}}}address"
+IP_IP_TAG = f"{{{IETF_IP_NS}}}ip"
+IP_PREFIX_LENGTH_TAG = f"{{{IETF_IP_NS}}}prefix-length"
+IP_NETMASK_TAG = f"{{{IETF_IP_NS}}}netmask"
+
+def parse_interface_element(interface_elem) -> Optional[Interface]:
+    """Build an Interface from the direct children of an <interface> element
+    
+    Leaves are matched by parent, so the interface-level <enabled> is never
+    confused with the nested ipv4 <enabled>, and every ipv4 <address> entry
+    is kept.
+    """
+    name = None
+    description = ""
+    enabled = False
+    addresses = []
+    
+    for child in interface_elem:
+        tag = child.tag
+        if tag == IF_NAME_TAG:
+            name = (child.text or "").strip()
+        elif tag == IF_DESCRIPTION_TAG:
+            description = child.text or ""
+        elif tag == IF_ENABLED_TAG:
+            enabled = (child.text or "").strip().lower() == 'true'
+        elif tag == IP_IPV4_TAG:
+            for address_elem in child.iterchildren(IP_ADDRESS_TAG):
+                ip = prefix_length = None
+                for leaf in address_elem:
+                    if leaf.tag == IP_IP_TAG:
+                        ip = (leaf.text or "").strip()
+                    elif leaf.tag == IP_PREFIX_LENGTH_TAG:
+                        prefix_length = int(leaf.text)
+                    elif leaf.tag == IP_NETMASK_TAG and prefix_length is None:
+                        prefix_length = ipaddress.IPv4Network(f"0.0.0.0/{leaf.text.strip()}").prefixlen
+                if ip:
+                    addresses.append((ip, prefix_length))
+    
+    if not name:
+        return None
+    
+    ip_address, prefix_length = addresses[0] if addresses else (None, None)
+    return Interface(
+        name=name,
+        ip_address=ip_address,
+        prefix_length=prefix_length,
+        enabled=enabled,
+        description=description,
+        addresses=addresses
+    )
+
+def parse_interfaces_xml(xml_data) -> Dict[str, Interface]:
+    """Parse every ietf-interfaces <interface> from a reply in one pass
+    
+    lxml's iterparse only surfaces <interface> end events; each one is
+    converted from its direct children and then freed, so cost is linear
+    in the reply size and memory stays bounded by a single interface.
+    """
+    if isinstance(xml_data, str):
+        xml_data = xml_data.encode()
+    
+    interfaces = {}
+    for _, elem in etree.iterparse(io.BytesIO(xml_data), events=('end',), tag=IF_INTERFACE_TAG):
+        parent = elem.getparent()
+        if parent is None or parent.tag != IF_INTERFACES_TAG:
+            continue
+        interface = parse_interface_element(elem)
+        if interface is not None:
+            interfaces[interface.name] = interface
+        # Drop the processed subtree and any already-handled siblings
+        elem.clear(keep_tail=False)
+        while elem.getprevious() is not None:
+            del parent[0]
+    return interfaces
+
+# config_hash of a device whose interfaces were partly refreshed: matches no
+# reply digest, so the next full poll re-parses even a reply equal to the last
+PARTIAL_HASH = 'partial'
+
 @dataclass
 class Device:
     """Represents a network device"""
     name: str
     host: str
     port: int
-    interfaces: Dict[str, Interface]
+    # Read-only view into the checker's InterfaceStore
+    interfaces: Mapping[str, Interface]
+    role: str = ""
+    poll_interval: Optional[float] = None
+    fetch_latency: Optional[float] = None
+    fetch_status: str = "pending"
+    # Change detection: digest of the last parsed reply (PARTIAL_HASH after
+    # a refresh of some interfaces; None until first fetched)
+    config_hash: Optional[str] = None
+    config_changed: bool = False
+    last_changed: Optional[datetime] = None
     
     def __post_init__(self):
         if not hasattr(self, 'interfaces'):
             self.interfaces = {}
 
 @dataclass
-class NetworkLink:
-    """Represents a network link between two devices"""
-    name: str
-    device1: str
-    interface1: str
-    device2: str
-    interface2: str
-    expected_network: str
-    description: str
+class LinkChange:
+    """A link whose consistency status flipped between two sweeps"""
+    link: NetworkLink
+    old_status: Optional[str]
+    new_status: str
+    details: str
+    timestamp: datetime
 
 class NetworkConsistencyChecker:
-    def __init__(self):
+    # Whether fetch_device() can poll a single device from this process
+    # (not on a ShardCoordinator, whose shards fetch)
+    fetches_locally = True
+    
+    def __init__(self, max_workers: int = 16, fetch_timeout: float = 30.0,
+                 topology_file: Optional[str] = None, analyze: bool = False,
+                 topology: Optional[TopologyIndex] = None, pool: Optional[SessionPool] = None,
+                 role_intervals: Optional[Dict[str, float]] = None,
+                 async_pool: Optional[AsyncSessionPool] = None,
+                 health: Optional[HealthTracker] = None):
+        # Concurrent collection settings: at most max_workers devices are
+        # polled at the same time, and a sweep waits at most fetch_timeout
+        # seconds for the slowest device before evaluating links
+        self.max_workers = max(1, max_workers)
+        self.fetch_timeout = fetch_timeout
+        # Run the fleet-wide IP conflict analysis after link evaluation
+        self.analyze = analyze
+        
+        # Sessions are kept open between sweeps and reused
+        self.pool = pool or SessionPool(timeout=10)
+        # With an AsyncSessionPool, polls run as coroutines on one event loop
+        # thread instead of one blocking session per worker thread
+        self.async_pool = async_pool
+        self._loop: Optional[EventLoopThread] = None
+        # Per-device timeouts from observed latency, and circuit breakers
+        # that stop unreachable devices from costing a timeout every sweep
+        self.health = health or HealthTracker(max_timeout=self.pool.timeout)
+        # Probes of open circuits still running after their sweep returned
+        self._probes: set = set()
+        # Token of the fetch in flight per device; a late fetch whose
+        # token was dropped by a sweep timeout does not record its result
+        self._fetches: Dict[str, object] = {}
+        # Packed storage for the interfaces of every device
+        self.store = InterfaceStore()
+        
+        # Per-phase latency histograms and link gauges (see monitor_metrics)
+        self.metrics = MetricsRegistry()
+        self.metrics_textfile: Optional[str] = None
+        # Optional StateJournal recording interface, device and link deltas
+        self.journal = None
+        
+        # Devices and expected links come from an indexed topology file
+        self.topology = (topology if topology is not None
+                         else TopologyIndex.from_file(topology_file or DEFAULT_TOPOLOGY_FILE))
         self.devices = {
-            'RAN': Device('RAN', 'localhost', 830, {}),
-            'Router': Device('Router', 'localhost', 831, {}),
-            'Core': Device('Core', 'localhost', 832, {})
+            name: Device(name, spec.host, spec.port, self.store.assign(name, {}),
+                         role=spec.role, poll_interval=spec.poll_interval)
+            for name, spec in self.topology.devices.items()
         }
+        self.network_links = self.topology.links
+        
+        # Last evaluated (status, details) per link name, and when it last flipped
+        self.link_states: Dict[str, Tuple[str, str]] = {}
+        self.link_changed_at: Dict[str, datetime] = {}
+        # Devices whose config changed since links were last evaluated
+        self._dirty_devices: set = set()
+        # Link evaluation can be triggered from scheduler worker threads
+        self._state_lock = threading.Lock()
+        
+        # Poll interval per device class (e.g. {'core': 10, 'ran': 60})
+        self.role_intervals = role_intervals or {}
+        self._last_textfile_write = 0.0
         
-        # Define expected network links
-        self.network_links = [
-            NetworkLink(
-                name="Network A (RAN-Router Backhaul)",
-                device1="RAN", interface1="backhaul0",
-                device2="Router", interface2="eth1", 
-                expected_network="10.0.1.0/30",
-                description="RAN backhaul to Router"
-            ),
-            NetworkLink(
-                name="Network B (Router-Core)",
-                device1="Router", interface1="eth2",
-                device2="Core", interface2="eth1",
-                expected_network="10.0.2.0/30", 
-                description="Router to Core network"
-            ),
-            NetworkLink(
-                name="Management Network",
-                device1="RAN", interface1="eth0",
-                device2="Router", interface2="eth0",
-                expected_network="192.168.1.0/24",
-                description="Management network"
-            ),
-            NetworkLink(
-                name="Management Network (Router-Core)",
-                device1="Router", interface1="eth0", 
-                device2="Core", interface2="eth0",
-                expected_network="192.168.1.0/24",
-                description="Management network"
-            )
-        ]
+        # get-config filters per (device, xpath?) built from network_links
+        self._filter_cache: Dict[Tuple[str, bool], Tuple[str, object]] = {}
     
     def connect_device(self, device: Device) -> Optional[manager.Manager]:
-        """Connect to a NETCONF device"""
+        """Get a (pooled) session to a NETCONF device"""
         try:
-            conn = manager.connect(
-                host=device.host,
-                port=device.port,
-                username='admin',
-                password='admin',
-                hostkey_verify=False,
-                timeout=10
-            )
-            return conn
+            with self.metrics.timer('connect', device.name):
+                return self.pool.get(device.host, device.port, self.health.timeout(device.name))
         except Exception as e:
             print(f"❌ Failed to connect to {device.name}: {e}")
             return None
     
-    def parse_interface_config(self, xml_data: str) -> Dict[str, Interface]:
-        """Parse interface configuration from NETCONF XML"""
-        interfaces = {}
-        
+    def parse_interface_config(self, xml_data) -> Dict[str, Interface]:
+        """Parse interface configuration from NETCONF XML in a single pass"""
         try:
-            root = ET.fromstring(xml_data)
-            
-            # Find all interfaces
-            for interface_elem in root.findall('.//{urn:ietf:params:xml:ns:yang:ietf-interfaces}interface'):
-                name_elem = interface_elem.find('.//{urn:ietf:params:xml:ns:yang:ietf-interfaces}name')
-                if name_elem is None:
-                    continue
-                    
-                name = name_elem.text
-                
-                # Get description
-                desc_elem = interface_elem.find('.//{urn:ietf:params:xml:ns:yang:ietf-interfaces}description')
-                description = desc_elem.text if desc_elem is not None else ""
-                
-                # Get enabled status
-                enabled_elem = interface_elem.find('.//{urn:ietf:params:xml:ns:yang:ietf-interfaces}enabled')
-                enabled = enabled_elem.text.lower() == 'true' if enabled_elem is not None else False
-                
-                # Get IP address
-                ip_elem = interface_elem.find('.//{urn:ietf:params:xml:ns:yang:ietf-ip}ip')
-                prefix_elem = interface_elem.find('.//{urn:ietf:params:xml:ns:yang:ietf-ip}prefix-length')
-                
-                ip_address = ip_elem.text if ip_elem is not None else None
-                prefix_length = int(prefix_elem.text) if prefix_elem is not None else None
-                
-                interfaces[name] = Interface(
-                    name=name,
-                    ip_address=ip_address,
-                    prefix_length=prefix_length,
-                    enabled=enabled,
-                    description=description
-                )
-                
+            return parse_interfaces_xml(xml_data)
         except Exception as e:
             print(f"Error parsing XML: {e}")
             
-        return interfaces
+        return {}
+    
+    def interfaces_of_interest(self, device_name: str) -> List[str]:
+        """Names of the interfaces of a device referenced by network_links"""
+        return self.topology.interfaces_for_device(device_name)
+    
+    def build_interface_filter(self, device_name: str, use_xpath: bool = False,
+                               names: Optional[List[str]] = None) -> Tuple[str, object]:
+        """Build a get-config filter selecting only the leaves the checker uses
+        
+        Only name, description, enabled and the ipv4 address list of the
+        interfaces referenced by network_links (or of the given names) are
+        requested; with analyze, of every interface, since the fleet analysis
+        looks for addresses outside the declared links. Returns a filter
+        tuple suitable for ncclient's get_config().
+        """
+        cache_key = (device_name, use_xpath)
+        if names is None and cache_key in self._filter_cache:
+            return self._filter_cache[cache_key]
+        
+        cacheable = names is None
+        if names is None:
+            names = [] if self.analyze else self.interfaces_of_interest(device_name)
+        
+        if use_xpath:
+            namespaces = {'if': IETF_INTERFACES_NS, 'ip': IETF_IP_NS}
+            base = "/if:interfaces/if:interface"
+            if names:
+                base += "[" + " or ".join(f"if:name={xpath_literal(n)}" for n in names) + "]"
+            leaves = ("if:name", "if:description", "if:enabled", "ip:ipv4/ip:address")
+            select = " | ".join(f"{base}/{leaf}" for leaf in leaves)
+            result = ('xpath', (namespaces, select))
+        else:
+            leaves = f'''
+    <description/>
+    <enabled/>
+    <ipv4 xmlns="{IETF_IP_NS}">
+      <address>
+        <ip/>
+        <prefix-length/>
+      </address>
+    </ipv4>'''
+            if names:
+                entries = "".join(f'''
+  <interface>
+    <name>{escape(n)}</name>{leaves}
+  </interface>''' for n in names)
+            else:
+                # Every interface (no link references this device, or analyze):
+                # still keep the reply small
+                entries = f'''
+  <interface>
+    <name/>{leaves}
+  </interface>'''
+            result = ('subtree', f'<interfaces xmlns="{IETF_INTERFACES_NS}">{entries}\n</interfaces>')
+        
+        if cacheable:
+            self._filter_cache[cache_key] = result
+        return result
     
     def get_device_interfaces(self, device: Device) -> bool:
         """Get interface configuration from a device"""
+        # Only a reply that differs from the last one marks a change
+        device.config_changed = False
         conn = self.connect_device(device)
         if not conn:
             return False
             
         try:
-            config = conn.get_config(source='running')
-            device.interfaces = self.parse_interface_config(config.data_xml)
-            conn.close_session()
+            use_xpath = XPATH_CAPABILITY in conn.server_capabilities
+            # The adaptive timeout applies to this request only: refreshes and
+            # compares share the pooled session
+            with self.metrics.timer('get_config', device.name):
+                config = with_timeout(conn, self.health.timeout(device.name)).get_config(
+                    source='running', filter=self.build_interface_filter(device.name, use_xpath))
+            self.store_device_config(device, config.data_xml)
+            return True
+        except Exception as e:
+            print(f"❌ Failed to get interfaces from {device.name}: {e}")
+            # Force a reconnect on the next sweep
+            self.pool.invalidate(device.host, device.port)
+            return False
+    
+    def store_device_config(self, device: Device, data_xml: str):
+        """Parse and store a get-config reply, unless it is unchanged"""
+        # Identical reply: keep the parsed interfaces and skip parsing
+        digest = hashlib.blake2b(data_xml.encode(), digest_size=16).hexdigest()
+        if digest == device.config_hash:
+            device.config_changed = False
+            return
+        
+        with self.metrics.timer('parse', device.name):
+            interfaces = self.parse_interface_config(data_xml)
+        self.set_device_interfaces(device, interfaces, digest)
+    
+    def set_device_interfaces(self, device: Device, interfaces: Mapping[str, Interface], digest: str):
+        """Store new interfaces of a device and mark its links for re-evaluation"""
+        device.interfaces = self.store.assign(device.name, interfaces)
+        if self.journal:
+            self.journal.record_device(device.name, device.interfaces)
+        device.config_hash = digest
+        device.config_changed = True
+        device.last_changed = datetime.now()
+        self._dirty_devices.add(device.name)
+    
+    async def get_device_interfaces_async(self, device: Device) -> bool:
+        """get_device_interfaces() over an async session"""
+        device.config_changed = False
+        timeout = self.health.timeout(device.name)
+        try:
+            with self.metrics.timer('connect', device.name):
+                conn = await self.async_pool.get(device.host, device.port, timeout)
+        except Exception as e:
+            print(f"❌ Failed to connect to {device.name}: {e}")
+            return False
+        
+        try:
+            use_xpath = XPATH_CAPABILITY in conn.server_capabilities
+            with self.metrics.timer('get_config', device.name):
+                config = await conn.get_config(source='running',
+                                               filter=self.build_interface_filter(device.name, use_xpath),
+                                               timeout=timeout)
+            self.store_device_config(device, config.data_xml)
             return True
         except Exception as e:
             print(f"❌ Failed to get interfaces from {device.name}: {e}")
-            if conn:
-                conn.close_session()
+            await self.async_pool.invalidate(device.host, device.port)
+            return False
+    
+    def refresh_interfaces(self, device: Device, names: List[str]) -> bool:
+        """Re-read only the given interfaces of a device after a change event"""
+        try:
+            if self.async_pool is not None:
+                # Over the async sessions, not a second set of ncclient ones
+                data_xml = self.event_loop().run(self._read_interfaces_async(device, names))
+            else:
+                with self.pool.session(device.host, device.port) as conn:
+                    use_xpath = XPATH_CAPABILITY in conn.server_capabilities
+                    with self.metrics.timer('get_config', device.name):
+                        data_xml = conn.get_config(source='running', filter=self.build_interface_filter(
+                            device.name, use_xpath, names)).data_xml
+            with self.metrics.timer('parse', device.name):
+                interfaces = self.parse_interface_config(data_xml)
+        except Exception as e:
+            print(f"❌ Failed to refresh {', '.join(names)} on {device.name}: {e}")
+            return False
+        
+        updated = dict(device.interfaces)
+        for name in names:
+            if name in interfaces:
+                updated[name] = interfaces[name]
+            else:
+                updated.pop(name, None)
+        device.interfaces = self.store.assign(device.name, updated)
+        if self.journal:
+            self.journal.record_device(device.name, device.interfaces)
+        # No longer what the last full reply said: a full poll whose reply
+        # equals it (a reverted change) must still be parsed
+        device.config_hash = PARTIAL_HASH
+        device.config_changed = True
+        device.last_changed = datetime.now()
+        self._dirty_devices.add(device.name)
+        return True
+    
+    async def _read_interfaces_async(self, device: Device, names: List[str]) -> str:
+        conn = await self.async_pool.get(device.host, device.port)
+        try:
+            use_xpath = XPATH_CAPABILITY in conn.server_capabilities
+            with self.metrics.timer('get_config', device.name):
+                reply = await conn.get_config(source='running',
+                                              filter=self.build_interface_filter(device.name, use_xpath, names))
+            return reply.data_xml
+        except Exception:
+            await self.async_pool.invalidate(device.host, device.port)
+            raise
+    
+    def fetch_device(self, device: Device, force: bool = False) -> bool:
+        """Fetch interfaces from a single device and record its latency
+
+        force fetches even while the device's circuit is open (an explicit
+        refresh); the result still counts for the breaker.
+        """
+        if self.async_pool is not None:
+            return self.event_loop().run(self.fetch_device_async(device, force))
+        if not force and not self.admit(device):
             return False
+        return self._fetch_admitted(device)
+    
+    async def fetch_device_async(self, device: Device, force: bool = False) -> bool:
+        if not force and not self.admit(device):
+            return False
+        return await self._fetch_admitted_async(device)
+    
+    def _fetch_admitted(self, device: Device) -> bool:
+        token = self._fetches[device.name] = object()
+        start = time.perf_counter()
+        ok = self.get_device_interfaces(device)
+        self._record_result(device, token, ok, time.perf_counter() - start)
+        return ok
+    
+    async def _fetch_admitted_async(self, device: Device) -> bool:
+        token = self._fetches[device.name] = object()
+        start = time.perf_counter()
+        ok = await self.get_device_interfaces_async(device)
+        self._record_result(device, token, ok, time.perf_counter() - start)
+        return ok
+    
+    def _record_result(self, device: Device, token: object, ok: bool, latency: float):
+        # A fetch the sweep gave up on was already recorded as a timeout
+        if self._fetches.get(device.name) is not token:
+            return
+        self._record_fetch(device, ok, latency)
+        self._record_health(device, ok)
+    
+    def admit(self, device: Device) -> bool:
+        """Whether to poll a device now: not while its circuit is open"""
+        if self.health.allow(device.name):
+            return True
+        device.fetch_status = "circuit open"
+        device.config_changed = False
+        return False
+    
+    def _record_health(self, device: Device, ok: bool):
+        name = device.name
+        if ok:
+            if self.health.record_success(name, device.fetch_latency):
+                print(f"✅ {name} is reachable again, circuit closed")
+        elif self.health.record_failure(name, device.fetch_status):
+            print(f"⛔ {name} unreachable, circuit open: skipped until a probe "
+                  f"in {self.health.probe_in(name):.0f}s")
+    
+    def _record_fetch(self, device: Device, ok: bool, latency: Optional[float]):
+        device.fetch_latency = latency
+        device.fetch_status = "ok" if ok else "failed"
+        self.metrics.set_device_up(device.name, ok)
+        if self.journal:
+            self.journal.record_device_status(device.name, ok)
+    
+    def _record_timeout(self, device: Device):
+        print(f"❌ Timed out waiting for {device.name} after {self.fetch_timeout}s")
+        self._fetches.pop(device.name, None)
+        self._record_fetch(device, False, None)
+        device.fetch_status = "timeout"
+        self._record_health(device, False)
+    
+    def event_loop(self) -> EventLoopThread:
+        """The event loop thread driving async sessions, started on first use"""
+        with self._state_lock:
+            if self._loop is None:
+                self._loop = EventLoopThread()
+            return self._loop
+    
+    def fetch_all_devices(self) -> Dict[str, bool]:
+        """Fetch interfaces from all devices in parallel
+        
+        Returns once every device has answered, failed or exceeded
+        fetch_timeout, so link evaluation always sees a complete sweep.
+        Devices with an open circuit are skipped; those due for a probe are
+        polled last and not waited for.
+        """
+        if self.async_pool is not None:
+            return self.event_loop().run(self.fetch_all_devices_async())
+        
+        results = {}
+        devices, probes = self._sweep_devices(results)
+        pool = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(self.devices)) or 1,
+            thread_name_prefix="netconf-fetch"
+        )
+        try:
+            futures = {pool.submit(self._fetch_admitted, device): device for device in devices}
+            for device in probes:
+                pool.submit(self._fetch_admitted, device)
+            done, not_done = wait(futures, timeout=self.fetch_timeout)
+            
+            for future in done:
+                device = futures[future]
+                try:
+                    results[device.name] = future.result()
+                except Exception as e:
+                    print(f"❌ Unexpected error polling {device.name}: {e}")
+                    device.fetch_status = "failed"
+                    results[device.name] = False
+            
+            for future in not_done:
+                device = futures[future]
+                future.cancel()
+                self._record_timeout(device)
+                results[device.name] = False
+        finally:
+            # Do not block the sweep on threads stuck in a dead session;
+            # queued probes still run and record their own result
+            pool.shutdown(wait=False)
+        
+        return results
+    
+    def _sweep_devices(self, results: Dict[str, bool]) -> Tuple[List[Device], List[Device]]:
+        """Split a sweep into devices to poll and probes of open circuits"""
+        devices, probes = [], []
+        for device in self.devices.values():
+            if not self.admit(device):
+                results[device.name] = False
+            elif self.health.state(device.name) == HALF_OPEN:
+                device.fetch_status = "probing"
+                results[device.name] = False
+                probes.append(device)
+            else:
+                devices.append(device)
+        return devices, probes
+    
+    async def fetch_all_devices_async(self) -> Dict[str, bool]:
+        """fetch_all_devices() as coroutines, max_workers sessions in flight"""
+        limit = asyncio.Semaphore(self.max_workers)
+        
+        async def fetch(device):
+            async with limit:
+                return await self._fetch_admitted_async(device)
+        
+        results = {}
+        devices, probes = self._sweep_devices(results)
+        tasks = {asyncio.ensure_future(fetch(device)): device for device in devices}
+        for device in probes:
+            probe = asyncio.ensure_future(fetch(device))
+            self._probes.add(probe)
+            probe.add_done_callback(self._probes.discard)
+        if not tasks:
+            return results
+        done, not_done = await asyncio.wait(tasks, timeout=self.fetch_timeout)
+        
+        for task in done:
+            device = tasks[task]
+            try:
+                results[device.name] = task.result()
+            except Exception as e:
+                print(f"❌ Unexpected error polling {device.name}: {e}")
+                device.fetch_status = "failed"
+                results[device.name] = False
+        for task in not_done:
+            device = tasks[task]
+            task.cancel()
+            self._record_timeout(device)
+            results[device.name] = False
+            await self.async_pool.invalidate(device.host, device.port)
+        return results
     
     def check_link_consistency(self, link: NetworkLink) -> Tuple[str, str]:
         """Check if a network link is consistent"""
-        device1 = self.devices.get(link.device1)
-        device2 = self.devices.get(link.device2)
-        
-        if not device1 or not device2:
-            return "❌ ERROR", "Device not found"
+        return self.check_links([link])[0]
+    
+    def check_links(self, links: Sequence[NetworkLink]) -> List[Tuple[str, str]]:
+        """Check many links at once against the interface store
         
-        interface1 = device1.interfaces.get(link.interface1)
-        interface2 = device2.interfaces.get(link.interface2)
+        The subnet comparison runs over the packed columns for all links in
+        one pass; only the status details are formatted per link.
+        """
+        rows1, rows2, expected_networks, expected_prefixes = [], [], [], []
+        for link in links:
+            device1 = self.devices.get(link.device1)
+            device2 = self.devices.get(link.device2)
+            rows1.append(self._store_row(device1, link.interface1))
+            rows2.append(self._store_row(device2, link.interface2))
+            expected_networks.append(int(link.network.network_address) if link.network else 0)
+            expected_prefixes.append(link.network.prefixlen if link.network else 0)
         
-        if not interface1:
+        codes = self.store.same_subnet_codes(rows1, rows2, expected_networks, expected_prefixes)
+        return [self._link_result(link, code) for link, code in zip(links, codes)]
+    
+    def _store_row(self, device: Optional[Device], interface: str) -> int:
+        return device.interfaces.row(interface) if device is not None else -1
+    
+    def _link_result(self, link: NetworkLink, code: int) -> Tuple[str, str]:
+        if link.device1 not in self.devices or link.device2 not in self.devices:
+            return "❌ ERROR", "Device not found"
+        if code == MISSING_1:
             return "❌ ERROR", f"{link.device1}:{link.interface1} not found"
-        if not interface2:
+        if code == MISSING_2:
             return "❌ ERROR", f"{link.device2}:{link.interface2} not found"
-        
-        # Check if both interfaces are enabled
-        if not interface1.enabled:
+        if code == DISABLED_1:
             return "⚠️  WARNING", f"{link.device1}:{link.interface1} disabled"
-        if not interface2.enabled:
+        if code == DISABLED_2:
             return "⚠️  WARNING", f"{link.device2}:{link.interface2} disabled"
-        
-        # Check if both have IP addresses
-        if not interface1.ip_address:
+        if code == NO_IP_1:
             return "⚠️  WARNING", f"{link.device1}:{link.interface1} has no IP"
-        if not interface2.ip_address:
+        if code == NO_IP_2:
             return "⚠️  WARNING", f"{link.device2}:{link.interface2} has no IP"
-        
-        # Check if they're in the same network
-        network1 = interface1.network
-        network2 = interface2.network
-        expected_network = ipaddress.IPv4Network(link.expected_network)
-        
-        if not network1 or not network2:
+        if code == NO_NETWORK:
             return "❌ ERROR", "Cannot determine network"
         
-        if network1 != network2:
-            return "❌ ERROR", f"Different networks: {network1} vs {network2}"
+        interface1 = self.devices[link.device1].interfaces[link.interface1]
+        interface2 = self.devices[link.device2].interfaces[link.interface2]
+        if code == DIFFERENT_NETWORKS:
+            return "❌ ERROR", f"Different networks: {interface1.network} vs {interface2.network}"
+        if code == UNEXPECTED_NETWORK:
+            return "⚠️  WARNING", f"Unexpected network: {interface1.network} (expected {link.network})"
+        if code != LINK_OK:
+            return "❌ ERROR", f"Same IP address: {interface1.ip_address}"
+        return "✅ OK", f"{interface1.ip_with_prefix} ↔ {interface2.ip_with_prefix}"
+    
+    def update_link_states(self) -> List[LinkChange]:
+        """Re-evaluate only the links touching devices whose config changed
         
-        if network1 != expected_network:
-            return "⚠️  WARNING", f"Unexpected network: {network1} (expected {expected_network})"
+        Returns the links whose status flipped since the previous sweep.
+        Links with an endpoint device that has never been fetched are left
+        for a later call.
+        """
+        with self._state_lock:
+            return self._update_link_states()
+    
+    def _update_link_states(self) -> List[LinkChange]:
+        if not self.link_states:
+            links = self.network_links
+        else:
+            links = {}
+            for device_name in self._dirty_devices:
+                for link in self.topology.links_for_device(device_name):
+                    links[link.name] = link
+            links = links.values()
+        self._dirty_devices.clear()
         
-        # Check IP addresses are different (not the same IP)
-        if interface1.ip_address == interface2.ip_address:
-            return "❌ ERROR", f"Same IP address: {interface1.ip_address}"
+        now = datetime.now()
+        changes = []
+        links = [link for link in links if not self._has_unfetched_endpoint(link)]
+        # Links are evaluated in one batch, so that is what is timed
+        with self.metrics.timer('check_links', 'all'):
+            results = self.check_links(links) if links else []
+        for link, (status, details) in zip(links, results):
+            previous = self.link_states.get(link.name)
+            self.link_states[link.name] = (status, details)
+            self.metrics.set_link_status(link, status,
+                                         flapped=previous is not None and previous[0] != status)
+            if previous is None or previous != (status, details):
+                self.link_changed_at[link.name] = now
+                changes.append(LinkChange(
+                    link=link,
+                    old_status=previous[0] if previous else None,
+                    new_status=status,
+                    details=details,
+                    timestamp=now
+                ))
+        if self.journal:
+            if changes:
+                self.journal.record_link_changes(changes)
+            self.journal.prune_if_due()
+        return changes
+    
+    def _has_unfetched_endpoint(self, link: NetworkLink) -> bool:
+        for name in (link.device1, link.device2):
+            device = self.devices.get(name)
+            if device is not None and device.config_hash is None:
+                self._dirty_devices.add(name)
+                return True
+        return False
+    
+    def print_link_changes(self, changes: List[LinkChange]):
+        """Print only the links that flipped state in this sweep"""
+        if not changes:
+            print(f"💤 No link changes ({len(self.network_links)} links unchanged)")
+            print()
+            return
         
-        return "✅ OK", f"{interface1.ip_with_prefix} ↔ {interface2.ip_with_prefix}"
+        print("🔁 Link Changes:")
+        for change in changes:
+            old = change.old_status or "(new)"
+            print(f"   {change.link.name:35} {old} → {change.new_status} {change.details} "
+                  f"@ {change.timestamp.strftime('%H:%M:%S')}")
+        print()
     
     def print_status_header(self):
         """Print status header"""
@@ -238,7 +769,16 @@ class NetworkConsistencyChecker:
         for name, device in self.devices.items():
             status = "✅ Connected" if device.interfaces else "❌ Disconnected"
             interface_count = len(device.interfaces)
-            print(f"   {name:8} ({device.host}:{device.port}): {status} - {interface_count} interfaces")
+            probe_in = self.health.probe_in(name)
+            if probe_in is not None:
+                latency = f"circuit open, probe in {probe_in:.0f}s"
+            elif device.fetch_status in ("timeout", "circuit open", "probing"):
+                latency = device.fetch_status
+            elif device.fetch_latency is not None:
+                latency = f"{device.fetch_latency * 1000:.0f} ms"
+            else:
+                latency = "n/a"
+            print(f"   {name:8} ({device.host}:{device.port}): {status} - {interface_count} interfaces [{latency}]")
         print()
     
     def print_link_status(self):
@@ -246,7 +786,7 @@ class NetworkConsistencyChecker:
         print("🔗 Network Link Status:")
         
         for link in self.network_links:
-            status, details = self.check_link_consistency(link)
+            status, details = self.link_states.get(link.name) or self.check_link_consistency(link)
             print(f"   {link.name:35} {status} {details}")
         
         print()
@@ -263,62 +803,428 @@ class NetworkConsistencyChecker:
             for interface_name, interface in sorted(device.interfaces.items()):
                 enabled_str = "🟢" if interface.enabled else "🔴"
                 ip_str = interface.ip_with_prefix if interface.ip_address else "No IP"
+                if len(interface.addresses) > 1:
+                    ip_str += f" (+{len(interface.addresses) - 1})"
                 desc_str = f" ({interface.description})" if interface.description else ""
                 print(f"      {interface_name:12} {enabled_str} {ip_str:18} {desc_str}")
         print()
     
-    def run_single_check(self) -> bool:
-        """Run a single consistency check"""
+    def run_single_check(self, full_report: bool = True) -> bool:
+        """Run a single consistency check
+        
+        With full_report=False only changed devices and flipped links are
+        printed, which keeps the log quiet when a sweep is a no-op.
+        """
         self.print_status_header()
         
-        # Get interface data from all devices
-        all_connected = True
-        for device in self.devices.values():
-            if not self.get_device_interfaces(device):
-                all_connected = False
+        # Get interface data from all devices in parallel
+        start = time.perf_counter()
+        results = self.fetch_all_devices()
+        all_connected = all(results.values())
+        print(f"⏱️  Collected {len(results)} devices in {time.perf_counter() - start:.2f}s "
+              f"({self.max_workers} workers)")
+        print()
+        
+        changed = [d.name for d in self.devices.values() if d.config_changed]
         
         # Print status
-        self.print_device_status()
+        if full_report:
+            self.print_device_status()
+        else:
+            failed = [name for name, ok in results.items() if not ok]
+            if failed:
+                print(f"📡 Unreachable: {', '.join(failed)}")
+            unchanged = len(results) - len(failed) - len(changed)
+            print(f"📡 Changed: {', '.join(changed) or 'none'} ({unchanged} devices unchanged)")
+            print()
         
         if all_connected:
-            self.print_link_status()
-            self.print_interface_details()
+            changes = self.update_link_states()
+            if full_report:
+                self.print_link_status()
+                self.print_interface_details()
+            else:
+                self.print_link_changes(changes)
+            if self.analyze and (full_report or changes or changed):
+                print_fleet_analysis(analyze_fleet(self.devices, self.network_links))
         else:
             print("⚠️  Cannot perform full consistency check - some devices disconnected")
         
+        self.metrics.set_sweep(time.perf_counter() - start)
+        if self.metrics_textfile:
+            self.metrics.write_textfile(self.metrics_textfile)
+        
         return all_connected
     
-    def run_continuous_monitoring(self, interval: int = 30):
-        """Run continuous network monitoring"""
+    def compare_datastores(self) -> List[DatastoreDrift]:
+        """Compare running, startup and candidate on every device in parallel"""
+        canonicalizer = Canonicalizer.load()
+        if self.async_pool is not None:
+            return self.event_loop().run(self.compare_datastores_async(canonicalizer))
+        
+        def compare_device(device):
+            try:
+                with self.pool.session(device.host, device.port) as conn:
+                    with self.metrics.timer('get_config', device.name):
+                        return compare(device.name, fetch_snapshots(conn, canonicalizer, rpcs))
+            except Exception as e:
+                return DatastoreDrift(device.name, error=str(e))
+        
+        workers = min(self.max_workers, len(self.devices)) or 1
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="datastore-compare")
+        # startup/candidate requests run beside each device's running request
+        rpcs = ThreadPoolExecutor(max_workers=2 * workers, thread_name_prefix="datastore-rpc")
+        try:
+            futures = {pool.submit(compare_device, device): device for device in self.devices.values()}
+            wait(futures, timeout=self.fetch_timeout)
+            return [future.result() if future.done()
+                    else DatastoreDrift(device.name, error=f"timed out after {self.fetch_timeout}s")
+                    for future, device in futures.items()]
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            rpcs.shutdown(wait=False, cancel_futures=True)
+    
+    async def compare_datastores_async(self, canonicalizer: Canonicalizer) -> List[DatastoreDrift]:
+        """compare_datastores() as coroutines, max_workers sessions in flight"""
+        limit = asyncio.Semaphore(self.max_workers)
+        
+        async def compare_device(device):
+            async with limit:
+                try:
+                    conn = await self.async_pool.get(device.host, device.port)
+                    with self.metrics.timer('get_config', device.name):
+                        return compare(device.name, await fetch_snapshots_async(conn, canonicalizer))
+                except Exception as e:
+                    await self.async_pool.invalidate(device.host, device.port)
+                    return DatastoreDrift(device.name, error=str(e) or type(e).__name__)
+        
+        async def bounded(device):
+            try:
+                return await asyncio.wait_for(compare_device(device), self.fetch_timeout)
+            except asyncio.TimeoutError:
+                return DatastoreDrift(device.name, error=f"timed out after {self.fetch_timeout}s")
+        
+        return list(await asyncio.gather(*(bounded(d) for d in self.devices.values())))
+    
+    def run_datastore_check(self) -> bool:
+        """Report unsaved and uncommitted changes fleet-wide; True if all in sync"""
+        self.print_status_header()
+        start = time.perf_counter()
+        drifts = self.compare_datastores()
+        print_drift_report(drifts, time.perf_counter() - start)
+        return all(drift.in_sync for drift in drifts)
+    
+    def poll_intervals(self, default: float) -> Dict[str, float]:
+        """Poll interval per device: device override, then class, then default"""
+        return {
+            name: device.poll_interval or self.role_intervals.get(device.role) or default
+            for name, device in self.devices.items()
+        }
+    
+    def poll_device(self, name: str) -> bool:
+        """Scheduler callback: fetch one device"""
+        return self.fetch_device(self.devices[name])
+    
+    async def poll_device_async(self, name: str) -> bool:
+        """poll_device() as a task on the event loop (async sessions)"""
+        return await self.fetch_device_async(self.devices[name])
+    
+    def after_poll(self, name: str, ok: bool):
+        """Scheduler callback: re-check links of a device whose config changed"""
+        device = self.devices[name]
+        if ok and device.config_changed:
+            changes = self.update_link_states()
+            if changes:
+                print(f"🔄 {datetime.now().strftime('%H:%M:%S')} {name} config changed")
+                self.print_link_changes(changes)
+        
+        # Keep the textfile fresh without rewriting it on every single poll
+        now = time.monotonic()
+        if self.metrics_textfile and now - self._last_textfile_write >= 1.0:
+            self._last_textfile_write = now
+            self.metrics.write_textfile(self.metrics_textfile)
+    
+    def handle_config_change(self, change: ConfigChange):
+        """Notification callback: refresh the changed interfaces and their links"""
+        device = self.devices.get(change.device)
+        if device is None:
+            return
+        
+        if change.interfaces is None:
+            ok = self.fetch_device(device)
+        else:
+            # Edits to interfaces no link refers to cost no RPC at all
+            wanted = set(self.interfaces_of_interest(device.name))
+            names = sorted(change.interfaces & wanted)
+            if not names:
+                return
+            ok = self.refresh_interfaces(device, names)
+        self.after_poll(device.name, ok)
+    
+    def subscribe_config_changes(self, timeout: float = 10.0,
+                                 on_subscribed=None) -> NotificationListener:
+        """Start notification listeners and wait for the initial subscriptions"""
+        listener = NotificationListener(
+            {name: (d.host, d.port) for name, d in self.devices.items()},
+            open_session=self.pool.open,
+            on_change=self.handle_config_change,
+            on_resync=lambda name: self.after_poll(name, self.poll_device(name)),
+            on_subscribed=on_subscribed,
+        )
+        listener.start()
+        listener.wait_ready(timeout)
+        return listener
+    
+    def run_continuous_monitoring(self, interval: int = 30, notifications: bool = False,
+                                  reconcile_interval: float = 300.0):
+        """Run continuous network monitoring
+        
+        After an initial full check, every device is polled on its own
+        drift-free schedule (see poll_scheduler) and only link changes
+        are reported. With notifications=True, devices that accept a
+        config-change subscription are updated from events and only polled
+        every reconcile_interval seconds as a fallback.
+        """
+        intervals = self.poll_intervals(interval)
         print("🚀 Starting Network Consistency Monitor")
         print(f"📊 Checking every {interval} seconds (Press Ctrl+C to stop)")
-        print()
+        for role, role_interval in sorted(self.role_intervals.items()):
+            print(f"   {role}: every {role_interval} seconds")
         
+        if self.async_pool is not None:
+            # Polls are tasks on the loop, not a thread each blocked on one
+            scheduler = PollScheduler(intervals, self.poll_device_async, on_result=self.after_poll,
+                                      max_workers=self.max_workers, loop=self.event_loop().loop)
+        else:
+            scheduler = PollScheduler(intervals, self.poll_device, on_result=self.after_poll,
+                                      max_workers=self.max_workers)
+        listener = None
+        if notifications:
+            # Subscribed devices fall back to reconcile polls, and back to
+            # their own interval while their subscription is down
+            def on_subscribed(name: str, subscribed: bool):
+                scheduler.set_interval(name, max(intervals[name], reconcile_interval)
+                                       if subscribed else intervals[name])
+            
+            listener = self.subscribe_config_changes(self.fetch_timeout, on_subscribed)
+            print(f"📡 Config-change notifications from {len(listener.subscribed)}/{len(self.devices)} "
+                  f"devices (reconciling every {reconcile_interval:g} seconds)")
+        print()
         try:
-            while True:
-                self.run_single_check()
-                print(f"⏰ Next check in {interval} seconds...")
-                print("─" * 80)
-                time.sleep(interval)
+            self.run_single_check()
+            print("─" * 80)
+            scheduler.run()
                 
         except KeyboardInterrupt:
             print("\n🛑 Monitoring stopped by user")
         except Exception as e:
             print(f"\n❌ Error during monitoring: {e}")
+        finally:
+            scheduler.stop()
+            if listener:
+                listener.stop()
+            self.close_sessions()
+    
+    def retarget(self, topology: TopologyIndex):
+        """Poll another set of devices, keeping what the ones that stay have
+
+        Sessions, health state and the last interfaces of devices in both
+        sets are kept; sessions of devices that left are closed.
+        """
+        with self._state_lock:
+            old = self.devices
+            self.topology = topology
+            self.network_links = topology.links
+            self.devices = {}
+            for name, spec in topology.devices.items():
+                device = old.get(name)
+                if device is None or (device.host, device.port) != (spec.host, spec.port):
+                    device = Device(name, spec.host, spec.port, self.store.assign(name, {}),
+                                    role=spec.role, poll_interval=spec.poll_interval)
+                self.devices[name] = device
+            for name, device in old.items():
+                if self.devices.get(name) is device:
+                    continue
+                self.pool.invalidate(device.host, device.port)
+                if self.async_pool is not None and self._loop is not None:
+                    self._loop.run(self.async_pool.invalidate(device.host, device.port))
+                if name not in self.devices:
+                    self.store.discard(name)
+            names = {link.name for link in self.network_links}
+            self.link_states = {k: v for k, v in self.link_states.items() if k in names}
+            self._filter_cache.clear()
+    
+    def close_sessions(self):
+        """Close pooled sessions, sync and async"""
+        self.pool.close_all()
+        if self._loop is not None:
+            if self.async_pool is not None:
+                self._loop.run(self.async_pool.close_all(), timeout=10)
+            self._loop.stop()
+            self._loop = None
 
 def main():
-    checker = NetworkConsistencyChecker()
+    if sys.argv[1:2] == ["query"]:
+        return query_journal(sys.argv[2:])
+    if sys.argv[1:2] == ["shard"]:
+        # Imported here: network_shard builds on this module
+        from network_shard import shard_main
+        return shard_main(sys.argv[2:])
+    
+    parser = argparse.ArgumentParser(description="Network Consistency Checker")
+    parser.add_argument("interval", nargs="?",
+                        help="Monitoring interval in seconds (omit for a single check)")
+    parser.add_argument("--workers", type=int, default=16,
+                        help="Maximum number of devices polled concurrently (default: 16)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Poll over asyncio sessions from one event loop (needs asyncssh); "
+                             "use with a large --workers, e.g. 1000")
+    parser.add_argument("--poll-interval", action="append", default=[], metavar="ROLE=SECONDS",
+                        help="Poll interval for a device class in monitoring mode, e.g. core=10 (repeatable)")
+    parser.add_argument("--notifications", action="store_true",
+                        help="In monitoring mode, follow config-change notifications where devices support them")
+    parser.add_argument("--reconcile-interval", type=float, default=300.0,
+                        help="Fallback poll interval for devices sending notifications (default: 300)")
+    parser.add_argument("--topology", default=DEFAULT_TOPOLOGY_FILE,
+                        help="Topology file with devices and links (.yml, .json or .csv)")
+    parser.add_argument("--analyze", action="store_true",
+                        help="Also report duplicate IPs, overlapping prefixes and unlinked subnets fleet-wide "
+                             "(fetches every interface, not only linked ones; remote shards need --analyze too)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-textfile",
+                        help="Write Prometheus metrics to this file after every sweep (textfile collector)")
+    parser.add_argument("--journal",
+                        help="Record interface, device and link changes in this SQLite journal "
+                             "(query it with: network_check.py query JOURNAL ...)")
+    parser.add_argument("--journal-retention", type=journal_age, metavar="AGE",
+                        help="Prune journal history older than AGE (e.g. 180d), hourly; "
+                             "the state as of then is kept")
+    parser.add_argument("--fetch-timeout", type=float, default=30.0,
+                        help="Seconds to wait for the slowest device in a sweep (default: 30)")
+    parser.add_argument("--failure-threshold", type=int, default=2,
+                        help="Consecutive failed polls before a device is skipped (circuit open, default: 2)")
+    parser.add_argument("--probe-interval", type=float, default=30.0,
+                        help="Seconds before an unreachable device is probed again, doubling per "
+                             "failed probe up to 20x (default: 30)")
+    parser.add_argument("--datastores", action="store_true",
+                        help="Compare running, startup and candidate on every device and report "
+                             "unsaved or uncommitted changes, then exit")
+    parser.add_argument("--serve", nargs="?", const="", metavar="SOCKET",
+                        help="Keep running (every 30s unless an interval is given) and answer "
+                             "'network_check.py links|devices|device X|refresh X' on a Unix socket")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="Split devices across this many local worker processes")
+    parser.add_argument("--listen", metavar="HOST:PORT",
+                        help="Coordinate shards started elsewhere with: network_check.py shard HOST:PORT "
+                             "(both with the same secret in NETWORK_CHECK_SHARD_KEY)")
+    args = parser.parse_args()
+    
+    role_intervals = {}
+    for item in args.poll_interval:
+        role, _, seconds = item.partition('=')
+        try:
+            role_intervals[role.strip().lower()] = float(seconds)
+        except ValueError:
+            parser.error(f"Invalid --poll-interval {item!r}, expected ROLE=SECONDS")
+    
+    sharded = args.shards > 0 or args.listen
+    if sharded:
+        for option, given, reason in (
+                ("--datastores", args.datastores, "it compares from this process"),
+                ("--notifications", args.notifications, "shards sweep every device on one interval"),
+                ("--poll-interval", args.poll_interval, "shards sweep every device on one interval"),
+                ("--async", args.use_async, "shards fetch over their own sync sessions")):
+            if given:
+                parser.error(f"{option} is not supported with --shards/--listen: {reason}")
+    if sharded:
+        from network_shard import (SHARD_KEY_ENV, ShardCoordinator, default_address, parse_address,
+                                   shard_key, subset_checker)
+        if args.listen and shard_key() is None:
+            parser.error(f"--listen needs a shared secret for the shards in {SHARD_KEY_ENV}")
+        checker = ShardCoordinator(parse_address(args.listen) if args.listen else default_address(),
+                                   authkey=shard_key() if args.listen else None,
+                                   max_workers=args.workers,
+                                   fetch_timeout=args.fetch_timeout,
+                                   topology_file=args.topology,
+                                   analyze=args.analyze)
+    else:
+        checker = NetworkConsistencyChecker(max_workers=args.workers,
+                                            fetch_timeout=args.fetch_timeout,
+                                            topology_file=args.topology,
+                                            analyze=args.analyze,
+                                            role_intervals=role_intervals,
+                                            async_pool=AsyncSessionPool(timeout=10) if args.use_async else None,
+                                            health=health_tracker(args))
+    checker.metrics_textfile = args.metrics_textfile
+    if args.journal:
+        checker.journal = StateJournal(args.journal, retention=args.journal_retention)
+    if args.metrics_port:
+        checker.metrics.serve(args.metrics_port)
+        print(f"📈 Metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+    
+    if sharded:
+        if args.shards:
+            checker.start_local_shards(args.shards, partial(subset_checker, topology_file=args.topology,
+                                                            max_workers=args.workers,
+                                                            fetch_timeout=args.fetch_timeout,
+                                                            health_factory=partial(health_tracker, args),
+                                                            analyze=args.analyze))
+        else:
+            print(f"🧩 Waiting for shards on {args.listen}...")
+            checker.wait_for_shards(1, timeout=float('inf'))
     
-    if len(sys.argv) > 1:
+    daemon = None
+    if args.serve is not None:
+        from checker_daemon import CheckerDaemon
+        daemon = CheckerDaemon(checker, args.serve or None)
+        daemon.start()
+        print(f"🔌 Answering queries on {daemon.path}")
+        if args.interval is None:
+            args.interval = "30"
+    
+    try:
+        run_checker(checker, args, sharded)
+    finally:
+        if daemon:
+            daemon.stop()
+
+def journal_age(value: str) -> float:
+    """argparse type of --journal-retention: an age like 90d, in seconds"""
+    age = parse_age(value)
+    if not age:
+        raise argparse.ArgumentTypeError(f"expected an age like 12h, 90d or 26w, not {value!r}")
+    return age
+
+def health_tracker(args) -> HealthTracker:
+    """HealthTracker from the --failure-threshold/--probe-interval options"""
+    return HealthTracker(failure_threshold=args.failure_threshold, probe_base=args.probe_interval,
+                         probe_max=args.probe_interval * 20)
+
+def run_checker(checker, args, sharded):
+    """Single check, datastore comparison or continuous monitoring, as selected on the command line"""
+    if args.datastores:
+        checker.run_datastore_check()
+        checker.close_sessions()
+        return
+    if args.interval is not None:
         try:
-            interval = int(sys.argv[1])
-            checker.run_continuous_monitoring(interval)
+            interval = int(args.interval)
         except ValueError:
             print("Invalid interval. Using default 30 seconds.")
-            checker.run_continuous_monitoring()
+            interval = 30
+        if sharded:
+            checker.run_sharded_monitoring(interval)
+            return
+        checker.run_continuous_monitoring(interval, notifications=args.notifications,
+                                          reconcile_interval=args.reconcile_interval)
     else:
         # Single check mode
         checker.run_single_check()
+        if sharded:
+            checker.close()
+        else:
+            checker.close_sessions()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
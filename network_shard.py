@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Sharded Network Consistency Checker
+Splits the device inventory across worker processes, on this host or on
+other checker hosts, by consistent hashing. Each shard fetches and parses
+its own devices and ships compact interface snapshots to a coordinator,
+which evaluates every link (including cross-shard ones) and reports.
+
+- Ring: ShardRing places each shard at many virtual points, so adding or
+  losing a shard only moves the devices it owned
+- Transport: multiprocessing.connection (pickled tuples, authkey), over a
+  Unix socket for local workers or TCP for remote ones. Unpickling runs
+  code, so the key is random per run for local workers and must be given
+  in NETWORK_CHECK_SHARD_KEY for remote ones
+- Deltas: a device is shipped only when its config digest differs from the
+  one the coordinator holds; a shard (re)joining is given those digests,
+  so rejoining costs its fetches but not a full resync
+
+Usage:
+    python network_check.py --shards 4                 # local worker processes
+    NETWORK_CHECK_SHARD_KEY=... python network_check.py --listen 0.0.0.0:7000
+    NETWORK_CHECK_SHARD_KEY=... python network_check.py shard COORDINATOR:7000 --name host-b
+"""
+
+import argparse
+import bisect
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from functools import partial
+from multiprocessing import Process
+from multiprocessing.connection import Client, Listener, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from device_health import HealthTracker
+from netconf_pool import SessionPool
+from network_check import Interface, NetworkConsistencyChecker, health_tracker
+from topology import DEFAULT_TOPOLOGY_FILE, TopologyIndex
+
+# Shared secret of a coordinator and its remote shards
+SHARD_KEY_ENV = 'NETWORK_CHECK_SHARD_KEY'
+
+# (name, ip_address, prefix_length, enabled, description, addresses): the
+# Interface fields in order, as plain tuples so snapshots pickle compactly
+InterfaceRow = Tuple[str, Optional[str], Optional[int], bool, str, List[Tuple[str, int]]]
+
+
+class ShardRing:
+    """Consistent hash ring of shard names"""
+
+    def __init__(self, shards: Iterable[str] = (), replicas: int = 128):
+        self.replicas = replicas
+        self._points: List[Tuple[int, str]] = []
+        for shard in shards:
+            self.add(shard)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+    def add(self, shard: str):
+        for i in range(self.replicas):
+            bisect.insort(self._points, (self._hash(f"{shard}#{i}"), shard))
+
+    def remove(self, shard: str):
+        self._points = [p for p in self._points if p[1] != shard]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        i = bisect.bisect(self._points, (self._hash(key), ''))
+        return self._points[i % len(self._points)][1]
+
+    def assign(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """Keys owned by each shard"""
+        owned: Dict[str, List[str]] = {}
+        for key in keys:
+            owner = self.owner(key)
+            if owner is not None:
+                owned.setdefault(owner, []).append(key)
+        return owned
+
+
+def shard_key() -> Optional[bytes]:
+    """The remote shard secret from the environment, if set"""
+    key = os.environ.get(SHARD_KEY_ENV)
+    return key.encode() if key else None
+
+
+def parse_address(value: str):
+    """HOST:PORT for TCP, anything else is a Unix socket path"""
+    host, sep, port = value.rpartition(':')
+    if sep and port.isdigit():
+        return (host or '127.0.0.1', int(port))
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Shard side
+
+def subset_checker(devices: List[str], topology_file: str = DEFAULT_TOPOLOGY_FILE,
+                   max_workers: int = 16, fetch_timeout: float = 30.0,
+                   topology: Optional[TopologyIndex] = None, pool_factory: Callable = SessionPool,
+                   health_factory: Optional[Callable[[], HealthTracker]] = None,
+                   analyze: bool = False) -> NetworkConsistencyChecker:
+    """A checker polling only the given devices
+
+    It keeps every link touching them, so its get-config filters still
+    select each link endpoint; links are evaluated by the coordinator.
+    With analyze it fetches every interface for the coordinator's analysis.
+    """
+    full = topology if topology is not None else TopologyIndex.from_file(topology_file)
+    wanted = set(devices)
+    links = [l for l in full.links if l.device1 in wanted or l.device2 in wanted]
+    specs = [full.devices[name] for name in devices if name in full.devices]
+    return NetworkConsistencyChecker(max_workers=max_workers, fetch_timeout=fetch_timeout,
+                                     topology=TopologyIndex(links, specs), pool=pool_factory(timeout=10),
+                                     health=health_factory() if health_factory else None,
+                                     analyze=analyze)
+
+
+def snapshot(checker: NetworkConsistencyChecker, name: str) -> List[InterfaceRow]:
+    return [(i.name, i.ip_address, i.prefix_length, i.enabled, i.description, list(i.addresses))
+            for i in checker.devices[name].interfaces.values()]
+
+
+def run_shard(address, name: str, make_checker: Callable[[List[str]], NetworkConsistencyChecker],
+              authkey: bytes):
+    """Serve sweeps for the coordinator at address until it goes away"""
+    conn = Client(address, authkey=authkey)
+    conn.send(('hello', name))
+    checker: Optional[NetworkConsistencyChecker] = None
+    # Digest of each device as the coordinator last received it
+    shipped: Dict[str, str] = {}
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = message[0]
+            if kind == 'assign':
+                _, devices, digests = message
+                if checker is None:
+                    checker = make_checker(devices)
+                else:
+                    # Only the devices that moved reconnect or lose their state
+                    # (the new checker is only built for its topology)
+                    checker.retarget(make_checker(devices).topology)
+                shipped = dict(digests)
+            elif kind == 'sweep':
+                _, seq = message
+                statuses: Dict[str, Tuple[str, Optional[float]]] = {}
+                snapshots: Dict[str, Tuple[str, List[InterfaceRow]]] = {}
+                if checker is not None and checker.devices:
+                    checker.fetch_all_devices()
+                    for device in checker.devices.values():
+                        statuses[device.name] = (device.fetch_status, device.fetch_latency)
+                        digest = device.config_hash
+                        if device.fetch_status == "ok" and digest != shipped.get(device.name):
+                            snapshots[device.name] = (digest, snapshot(checker, device.name))
+                            shipped[device.name] = digest
+                conn.send(('result', seq, statuses, snapshots))
+            elif kind == 'stop':
+                break
+    finally:
+        if checker is not None:
+            checker.close_sessions()
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Coordinator side
+
+class ShardCoordinator(NetworkConsistencyChecker):
+    """A checker whose sweeps are fetched by shards instead of locally
+
+    Link evaluation, reporting, metrics and the journal are the ones of
+    NetworkConsistencyChecker; only fetch_all_devices() is distributed.
+    Single devices are not fetched from here (fetches_locally).
+    """
+    fetches_locally = False
+
+    def __init__(self, address, authkey: Optional[bytes] = None, shard_grace: float = 5.0, **kwargs):
+        super().__init__(**kwargs)
+        # Without a shared key only local shards, given this random one, can join
+        self.authkey = authkey or os.urandom(32)
+        self.listener = Listener(address, authkey=self.authkey)
+        self.address = self.listener.address
+        # Extra time on top of fetch_timeout for shards to report back
+        self.shard_grace = shard_grace
+        self.ring = ShardRing()
+        self._shards: Dict[str, object] = {}
+        self._assigned: Dict[str, List[str]] = {}
+        self._joined: List[Tuple[str, object]] = []
+        self._members_lock = threading.Lock()
+        self._seq = 0
+        # Devices whose snapshot arrived since the previous sweep
+        self._applied: set = set()
+        self._processes: List[Process] = []
+        self._accepting = True
+        threading.Thread(target=self._accept_loop, name="shard-accept", daemon=True).start()
+
+    def _accept_loop(self):
+        while self._accepting:
+            try:
+                conn = self.listener.accept()
+                kind, name = conn.recv()
+            except Exception:
+                if not self._accepting:
+                    return
+                continue
+            if kind == 'hello':
+                with self._members_lock:
+                    self._joined.append((name, conn))
+
+    def start_local_shards(self, count: int, make_checker: Callable[[List[str]], NetworkConsistencyChecker],
+                           timeout: float = 30.0):
+        """Spawn count worker processes on this host and wait for them to join"""
+        for i in range(count):
+            process = Process(target=run_shard, args=(self.address, f"local-{i}", make_checker, self.authkey),
+                              name=f"shard-{i}", daemon=True)
+            process.start()
+            self._processes.append(process)
+        self.wait_for_shards(count, timeout)
+
+    def wait_for_shards(self, count: int, timeout: float = 30.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self._rebalance()
+            if len(self._shards) >= count:
+                return True
+            time.sleep(0.05)
+        return False
+
+    @property
+    def shards(self) -> List[str]:
+        return sorted(self._shards)
+
+    def _drop(self, name: str):
+        conn = self._shards.pop(name, None)
+        self._assigned.pop(name, None)
+        self.ring.remove(name)
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+        print(f"⚠️  Shard {name} left, its devices move to the remaining shards")
+
+    def _rebalance(self):
+        """Admit joined shards and send new assignments where they changed"""
+        with self._members_lock:
+            joined, self._joined = self._joined, []
+        for name, conn in joined:
+            if name in self._shards:
+                # A restarted shard under the same name replaces the old one
+                self._drop(name)
+            self._shards[name] = conn
+            self.ring.add(name)
+            print(f"🧩 Shard {name} joined ({len(self._shards)} shards)")
+
+        owned = self.ring.assign(self.devices)
+        for name in list(self._shards):
+            devices = sorted(owned.get(name, []))
+            if self._assigned.get(name) == devices:
+                continue
+            # The digests let the shard skip devices the coordinator already has
+            digests = {d: self.devices[d].config_hash for d in devices if self.devices[d].config_hash}
+            try:
+                self._shards[name].send(('assign', devices, digests))
+                self._assigned[name] = devices
+            except OSError:
+                self._drop(name)
+
+    def fetch_all_devices(self) -> Dict[str, bool]:
+        """One sweep across all shards, applying the snapshots they ship"""
+        self._rebalance()
+        self._seq += 1
+        seq = self._seq
+        for name in list(self._shards):
+            try:
+                self._shards[name].send(('sweep', seq))
+            except OSError:
+                self._drop(name)
+
+        waiting = {conn: name for name, conn in self._shards.items()}
+        reported: Dict[str, Tuple[str, Optional[float]]] = {}
+        deadline = time.monotonic() + self.fetch_timeout + self.shard_grace
+        while waiting:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for conn in wait(list(waiting), timeout=remaining):
+                name = waiting[conn]
+                try:
+                    kind, result_seq, statuses, snapshots = conn.recv()
+                except (EOFError, OSError):
+                    del waiting[conn]
+                    self._drop(name)
+                    continue
+                # Late results of an earlier sweep still carry valid snapshots
+                self.apply_snapshots(snapshots)
+                if result_seq == seq:
+                    reported.update(statuses)
+                    del waiting[conn]
+
+        results = {}
+        for device in self.devices.values():
+            status, latency = reported.get(device.name, ("timeout", None))
+            if device.name not in reported:
+                print(f"❌ No shard reported {device.name} within {self.fetch_timeout + self.shard_grace:g}s")
+            ok = status == "ok"
+            self._record_fetch(device, ok, latency)
+            device.fetch_status = status
+            device.config_changed = device.name in self._applied
+            results[device.name] = ok
+        self._applied = set()
+        return results
+
+    def owner(self, name: str) -> Optional[str]:
+        """Shard polling a device"""
+        return self.ring.owner(name)
+
+    def apply_snapshots(self, snapshots: Dict[str, Tuple[str, List[InterfaceRow]]]):
+        for name, (digest, rows) in snapshots.items():
+            device = self.devices.get(name)
+            if device is not None:
+                self.set_device_interfaces(device, {row[0]: Interface(*row) for row in rows}, digest)
+                self._applied.add(name)
+
+    def run_sharded_monitoring(self, interval: int = 30):
+        """Sweep every interval seconds, reporting only changes"""
+        print(f"🚀 Starting sharded Network Consistency Monitor ({len(self._shards)} shards)")
+        print(f"📊 Checking every {interval} seconds (Press Ctrl+C to stop)")
+        print()
+        next_run = time.monotonic()
+        first = True
+        try:
+            while True:
+                self.run_single_check(full_report=first)
+                first = False
+                print("─" * 80)
+                next_run += interval
+                time.sleep(max(0.0, next_run - time.monotonic()))
+        except KeyboardInterrupt:
+            print("\n🛑 Monitoring stopped by user")
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop the shards and the listener"""
+        self._accepting = False
+        for name in list(self._shards):
+            try:
+                self._shards[name].send(('stop',))
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._shards.values():
+            try:
+                conn.close()
+            except OSError:
+                pass
+        self._shards.clear()
+        self.listener.close()
+        self.close_sessions()
+
+
+def default_address() -> str:
+    """A private Unix socket for local shards"""
+    return os.path.join(tempfile.mkdtemp(prefix='network-check-'), 'shards.sock')
+
+
+def shard_main(argv: Optional[List[str]] = None):
+    """network_check.py shard COORDINATOR [--name NAME]"""
+    parser = argparse.ArgumentParser(prog="network_check.py shard",
+                                     description="Fetch a share of the devices for a coordinator")
+    parser.add_argument("coordinator", help="Coordinator address, HOST:PORT or a Unix socket path")
+    parser.add_argument("--name", default=f"{os.uname().nodename}-{os.getpid()}",
+                        help="Shard name, stable across restarts to keep the same devices")
+    parser.add_argument("--workers", type=int, default=16,
+                        help="Maximum number of devices polled concurrently (default: 16)")
+    parser.add_argument("--fetch-timeout", type=float, default=30.0)
+    parser.add_argument("--topology", default=DEFAULT_TOPOLOGY_FILE)
+    parser.add_argument("--analyze", action="store_true",
+                        help="Fetch every interface, for a coordinator started with --analyze")
+    parser.add_argument("--failure-threshold", type=int, default=2,
+                        help="Consecutive failed polls before a device is skipped (circuit open, default: 2)")
+    parser.add_argument("--probe-interval", type=float, default=30.0,
+                        help="Seconds before an unreachable device is probed again (default: 30)")
+    args = parser.parse_args(argv)
+    authkey = shard_key()
+    if authkey is None:
+        parser.error(f"set {SHARD_KEY_ENV} to the coordinator's shared secret")
+
+    print(f"🧩 Shard {args.name} serving {args.coordinator}")
+    run_shard(parse_address(args.coordinator), args.name,
+              partial(subset_checker, topology_file=args.topology, max_workers=args.workers,
+                      fetch_timeout=args.fetch_timeout, analyze=args.analyze,
+                      health_factory=partial(health_tracker, args)), authkey)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Transactional Candidate Deploy
+Stages every device's full change in the candidate datastore in parallel,
+validates all of them, then confirmed-commits the whole fleet in parallel.
+If any device fails to stage or validate, candidate changes are discarded
+everywhere, so the fleet is never left partially configured. Confirms that
+fail after others succeeded cannot be undone on the confirmed devices: the
+failed ones are cancel-committed and the split is reported.
+
+Used by operations/network-cfg.py --candidate.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+
+@dataclass
+class DeployStatus:
+    """Per-device progress through the deploy phases"""
+    device: str
+    phase: str = "pending"
+    ok: bool = True
+    error: Optional[str] = None
+    confirmed: bool = False
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+class CandidateDeployment:
+    """Fleet-wide candidate -> validate -> confirmed-commit -> confirm"""
+
+    def __init__(self, config, connections, build_payload: Callable, pool,
+                 max_workers: int = 16, confirm_timeout: int = 120):
+        self.config = config
+        self.connections = connections
+        self.build_payload = build_payload
+        self.pool = pool
+        self.max_workers = max(1, min(max_workers, len(config) or 1))
+        self.confirm_timeout = confirm_timeout
+        self.status = {device: DeployStatus(device) for device in config}
+        self._locked = set()
+
+    def _conn(self, device):
+        return self.pool.get(self.connections[device]['host'], self.connections[device]['port'])
+
+    def _run_phase(self, phase: str, func: Callable, devices) -> bool:
+        """Run func(device) for every device in parallel, recording failures"""
+        def run(device):
+            status = self.status[device]
+            start = time.perf_counter()
+            try:
+                func(device)
+                status.phase = phase
+            except Exception as e:
+                status.ok = False
+                status.error = f"{phase}: {e}"
+            status.timings[phase] = time.perf_counter() - start
+
+        devices = list(devices)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(run, devices))
+        return all(self.status[d].ok for d in devices)
+
+    # ------------------------------------------------------------------
+    # Phases
+    # ------------------------------------------------------------------
+
+    def _stage(self, device):
+        conn = self._conn(device)
+        conn.lock(target='candidate')
+        self._locked.add(device)
+        # Start from running so leftovers from other sessions are not committed
+        conn.discard_changes()
+        conn.edit_config(target='candidate', config=self.build_payload(self.config[device]))
+        if ':validate' in conn.server_capabilities:
+            conn.validate(source='candidate')
+
+    def _confirmed_commit(self, device):
+        conn = self._conn(device)
+        if ':confirmed-commit' in conn.server_capabilities:
+            conn.commit(confirmed=True, timeout=str(self.confirm_timeout))
+            self.status[device].confirmed = True
+        else:
+            conn.commit()
+
+    def _confirm(self, device):
+        self._conn(device).commit()
+
+    def _cancel(self, device):
+        self._conn(device).cancel_commit()
+        self.status[device].phase = "cancelled"
+
+    def _rollback(self, device):
+        conn = self._conn(device)
+        if self.status[device].confirmed:
+            conn.cancel_commit()
+            self.status[device].confirmed = False
+        conn.discard_changes()
+
+    def _unlock(self, device):
+        self._conn(device).unlock(target='candidate')
+
+    # ------------------------------------------------------------------
+
+    def run(self) -> bool:
+        """Deploy to the whole fleet; returns True only if every device committed"""
+        devices = list(self.config)
+        try:
+            print(f"🧪 Staging {len(devices)} devices in candidate...")
+            if not self._run_phase("staged", self._stage, devices):
+                print("❌ Staging/validation failed - discarding candidate changes everywhere")
+                self._run_phase("discarded", self._rollback, self._locked)
+                return False
+
+            print(f"📝 Confirmed commit (timeout {self.confirm_timeout}s)...")
+            if not self._run_phase("committed", self._confirmed_commit, devices):
+                print("❌ Commit failed - cancelling confirmed commits")
+                # Committed without :confirmed-commit: final, so left out of the rollback
+                unconfirmed = [d for d in devices
+                               if self.status[d].phase == "committed" and not self.status[d].confirmed]
+                self._run_phase("rolled-back", self._rollback, [d for d in devices if d not in unconfirmed])
+                if unconfirmed:
+                    print(f"⚠️  No :confirmed-commit support, cannot roll back: {', '.join(unconfirmed)}")
+                return False
+
+            print("✅ Confirming commits...")
+            pending = [d for d in devices if self.status[d].confirmed]
+            if self._run_phase("confirmed", self._confirm, pending):
+                return True
+            self._report_partial_confirm(devices, [d for d in pending if not self.status[d].ok])
+            return False
+        finally:
+            self._run_phase_quietly(self._unlock, self._locked)
+
+    def _report_partial_confirm(self, devices, failed):
+        """Roll back what is still pending and say which devices kept the change"""
+        print(f"❌ Confirm failed on {len(failed)} devices - the fleet is partially committed")
+        # Back now rather than at the confirm timeout
+        self._run_phase_quietly(self._cancel, failed)
+        committed = [d for d in devices if d not in failed]
+        cancelled = [d for d in failed if self.status[d].phase == "cancelled"]
+        expiring = [d for d in failed if d not in cancelled]
+        if committed:
+            print(f"   ✅ Committed: {', '.join(committed)}")
+        if cancelled:
+            print(f"   ↩️  Rolled back: {', '.join(cancelled)}")
+        if expiring:
+            print(f"   ⏳ Roll back when the confirmed commit times out ({self.confirm_timeout}s) "
+                  f"or their session closes: {', '.join(expiring)}")
+
+    def _run_phase_quietly(self, func, devices):
+        """Best-effort cleanup that never changes the recorded outcome"""
+        def run(device):
+            try:
+                func(device)
+            except Exception:
+                pass
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(run, list(devices)))
+
+    def print_summary(self):
+        """Print a per-device phase/timing table"""
+        print(f"\n{'Device':12} {'Phase':12} {'Stage':>8} {'Commit':>8} {'Confirm':>8}  Details")
+        print("-" * 75)
+        for device, status in sorted(self.status.items()):
+            t = status.timings
+            cells = [f"{t[p] * 1000:6.0f}ms" if p in t else f"{'-':>8}"
+                     for p in ("staged", "committed", "confirmed")]
+            details = status.error or ("confirmed" if status.confirmed else "")
+            print(f"{device:12} {status.phase:12} {' '.join(cells)}  {details}")
+        print("-" * 75)
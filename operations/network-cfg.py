@@ -4,8 +4,21 @@ Minimal Network Auto-Configuration Script
 Just define your config and run!
 """
 
-from ncclient import manager
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from ipaddress import IPv4Interface
+from typing import List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from netconf_pool import SessionPool
+from netconf_payloads import config_payload, interfaces_payload
+from config_diff import diff_entries, fetch_state, parse_state, state_filter
+# The modules of the other modes (--async, --candidate, --from-checker,
+# --topology) and the YANG validator are imported where they are used
 
 # ============================================================================
 # STEP 1: Define your network configuration
@@ -38,52 +51,330 @@ CONNECTIONS = {
 # STEP 2: Run the configuration
 # ============================================================================
 
-def apply_config():
-    """Apply configuration to all devices"""
+def apply_config(pool=None, config=NETWORK_CONFIG, connections=CONNECTIONS, diff=True,
+                 current=None, validator=None):
+    """Apply configuration to all devices
+    
+    With diff=True only interfaces that differ from running (or from the
+    state in current, per device) are pushed. With a validator every
+    payload is checked against the YANG modules before it is sent.
+    Returns False if any interface was not sent.
+    """
     
-    for device, interfaces in NETWORK_CONFIG.items():
+    own_pool = pool is None
+    if own_pool:
+        pool = SessionPool(timeout=10, device_params={'name': 'default'})
+    
+    rejected = []
+    for device, interfaces in config.items():
         print(f"\nConfiguring {device}...")
         
-        # Connect to device
-        conn = manager.connect(
-            host=CONNECTIONS[device]['host'],
-            port=CONNECTIONS[device]['port'],
-            username='admin',
-            password='admin',
-            hostkey_verify=False,
-            timeout=10,
-            device_params={'name': 'default'}
-        )
+        # Connect to device (reuses a pooled session when available)
+        connect = lambda: pool.get(connections[device]['host'], connections[device]['port'])
+        state = (current or {}).get(device) if diff else None
+        conn = connect() if state is None else None
         
-        # Configure each interface
+        # Configure each interface that needs it
+        entries = None
+        if diff:
+            entries = diff_entries(interfaces, fetch_state(conn, interfaces) if state is None else state)
         for iface, ip_interface in interfaces.items():
-            ip = str(ip_interface.ip)
-            prefix = ip_interface.network.prefixlen
-            
-            xml = f'''
-<config xmlns="urn:ietf:params:xml:ns:netconf:base:1.0">
-  <interfaces xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">
-    <interface>
-      <name>{iface}</name>
-      <ipv4 xmlns="urn:ietf:params:xml:ns:yang:ietf-ip"
-            xmlns:nc="urn:ietf:params:xml:ns:netconf:base:1.0"
-            nc:operation="replace">
-        <enabled>true</enabled>
-        <address>
-          <ip>{ip}</ip>
-          <prefix-length>{prefix}</prefix-length>
-        </address>
-      </ipv4>
-    </interface>
-  </interfaces>
-</config>'''
+            if entries is not None and iface not in entries:
+                print(f"  ✔️  {iface}: {ip_interface} (already set)")
+                continue
+            xml = interfaces_payload({iface: ip_interface}) if entries is None else config_payload([entries[iface]])
+            problems = validator.validate(xml) if validator else []
+            if problems:
+                print(f"  ❌ {iface}: not sent, YANG validation failed: {'; '.join(problems)}")
+                rejected.append(f"{device}:{iface}")
+                continue
             
+            conn = conn or connect()
             conn.edit_config(target='running', config=xml)
             print(f"  ✅ {iface}: {ip_interface}")
-        
-        conn.close_session()
     
+    if own_pool:
+        pool.close_all()
+    
+    if rejected:
+        print(f"\n❌ {len(rejected)} interfaces not sent (YANG validation failed): {', '.join(rejected)}")
+        return False
     print("\nAll devices configured!")
+    return True
+
+# ============================================================================
+# STEP 3 (optional): Bulk mode - one payload per device, devices in parallel
+# ============================================================================
+
+@dataclass
+class DeviceResult:
+    """Outcome of pushing configuration to one device"""
+    device: str
+    ok: bool
+    interfaces: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    # Set when the device already matched and no edit-config was sent
+    in_sync: bool = False
+
+def build_device_config(interfaces):
+    """Merge all interface changes of a device into a single <config> payload"""
+    return interfaces_payload(interfaces)
+
+def device_payload(interfaces, entries, validator=None):
+    """The payload to send (full without diff entries) after YANG validation"""
+    xml = build_device_config(interfaces) if entries is None else config_payload(entries.values())
+    problems = validator.validate(xml) if validator else []
+    if problems:
+        raise ValueError(f"YANG validation failed: {'; '.join(problems)}")
+    return xml
+
+def configure_device(device, interfaces, pool, connections=CONNECTIONS, diff=True, current=None, validator=None):
+    """Push all interface changes of one device with a single edit-config
+    
+    With diff=True the running state is read first over the same session
+    (unless current has it) and only the differing leaves are sent; a
+    converged device gets no edit-config at all.
+    """
+    start = time.perf_counter()
+    entries = None
+    try:
+        state = (current or {}).get(device) if diff else None
+        if state is not None:
+            entries = diff_entries(interfaces, state)
+            if not entries:
+                return DeviceResult(device, True, [], time.perf_counter() - start, in_sync=True)
+        with pool.session(connections[device]['host'], connections[device]['port']) as conn:
+            if diff and entries is None:
+                entries = diff_entries(interfaces, fetch_state(conn, interfaces))
+                if not entries:
+                    return DeviceResult(device, True, [], time.perf_counter() - start, in_sync=True)
+            conn.edit_config(target='running', config=device_payload(interfaces, entries, validator))
+        return DeviceResult(device, True, list(entries or interfaces), time.perf_counter() - start)
+    except Exception as e:
+        return DeviceResult(device, False, list(entries or interfaces), time.perf_counter() - start, str(e))
+
+def apply_config_bulk(config=NETWORK_CONFIG, connections=CONNECTIONS, max_workers=16, pool=None, diff=True,
+                      current=None, validator=None):
+    """Apply configuration to all devices concurrently, one RPC per device"""
+    
+    own_pool = pool is None
+    if own_pool:
+        pool = SessionPool(timeout=10, device_params={'name': 'default'})
+    
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(config)))) as executor:
+            futures = [executor.submit(configure_device, device, interfaces, pool, connections, diff,
+                                       current, validator)
+                       for device, interfaces in config.items()]
+            results = [future.result() for future in futures]
+    finally:
+        if own_pool:
+            pool.close_all()
+    
+    return results
+
+async def configure_device_async(device, interfaces, pool, connections=CONNECTIONS, diff=True,
+                                 current=None, validator=None):
+    """configure_device() over an async session"""
+    start = time.perf_counter()
+    host, port = connections[device]['host'], connections[device]['port']
+    entries = None
+    try:
+        state = (current or {}).get(device) if diff else None
+        if state is not None:
+            entries = diff_entries(interfaces, state)
+            if not entries:
+                return DeviceResult(device, True, [], time.perf_counter() - start, in_sync=True)
+        conn = await pool.get(host, port)
+        if diff and entries is None:
+            reply = await conn.get_config(source='running', filter=state_filter(interfaces))
+            entries = diff_entries(interfaces, parse_state(reply.data_xml))
+            if not entries:
+                return DeviceResult(device, True, [], time.perf_counter() - start, in_sync=True)
+        await conn.edit_config(target='running', config=device_payload(interfaces, entries, validator))
+        return DeviceResult(device, True, list(entries or interfaces), time.perf_counter() - start)
+    except Exception as e:
+        await pool.invalidate(host, port)
+        return DeviceResult(device, False, list(entries or interfaces), time.perf_counter() - start, str(e))
+
+def apply_config_async(config=NETWORK_CONFIG, connections=CONNECTIONS, max_sessions=1000, pool=None, diff=True,
+                       current=None, validator=None):
+    """Apply configuration to all devices from one event loop, one RPC per device"""
+    import asyncio
+    from netconf_async import AsyncSessionPool, gather_limited
+    
+    async def run():
+        session_pool = pool or AsyncSessionPool(timeout=10)
+        try:
+            return await gather_limited(
+                (configure_device_async(device, interfaces, session_pool, connections, diff, current, validator)
+                 for device, interfaces in config.items()),
+                max_sessions)
+        finally:
+            if pool is None:
+                await session_pool.close_all()
+    
+    return asyncio.run(run())
+
+def print_results(results, wall_time=None):
+    """Print a per-device result table"""
+    print(f"\n{'Device':12} {'Status':10} {'Ifaces':>6} {'Time':>9}  Details")
+    print("-" * 70)
+    for result in sorted(results, key=lambda r: r.device):
+        status = "✅ OK" if result.ok else "❌ FAILED"
+        if not result.ok:
+            details = result.error
+        else:
+            details = "already in sync" if result.in_sync else ", ".join(result.interfaces)
+        print(f"{result.device:12} {status:10} {len(result.interfaces):>6} "
+              f"{result.elapsed * 1000:>6.0f} ms  {details}")
+    print("-" * 70)
+    
+    ok = sum(1 for r in results if r.ok)
+    summary = f"{ok}/{len(results)} devices configured"
+    in_sync = sum(1 for r in results if r.in_sync)
+    if in_sync:
+        summary += f" ({in_sync} already in sync, no edit-config sent)"
+    if wall_time is not None:
+        slowest = max((r.elapsed for r in results), default=0.0)
+        summary += f" in {wall_time:.2f}s (slowest device {slowest:.2f}s)"
+    print(summary)
+
+def validate_payloads(payloads, validator=None):
+    """Check every device payload against the YANG modules, before any push"""
+    start = time.perf_counter()
+    if validator is None:
+        from yang_schema import Validator
+        validator = Validator.load()
+    errors = {device: validator.validate(xml) for device, xml in payloads.items()}
+    errors = {device: problems for device, problems in errors.items() if problems}
+    elapsed = (time.perf_counter() - start) * 1000
+    if errors:
+        print(f"❌ YANG validation failed for {len(errors)}/{len(payloads)} devices:")
+        for device, problems in sorted(errors.items()):
+            for problem in problems:
+                print(f"   {device}: {problem}")
+        return False
+    print(f"✅ YANG validation passed for {len(payloads)} devices ({elapsed:.0f} ms)")
+    return True
+
+def validate_config(config=NETWORK_CONFIG, validator=None):
+    """validate_payloads() of the full payload of every device"""
+    return validate_payloads({device: build_device_config(interfaces)
+                              for device, interfaces in config.items()}, validator)
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply NETWORK_CONFIG to all devices")
+    parser.add_argument("--bulk", action="store_true",
+                        help="One edit-config per device, devices configured in parallel")
+    parser.add_argument("--candidate", action="store_true",
+                        help="Stage in candidate on all devices, then confirmed-commit fleet-wide")
+    parser.add_argument("--confirm-timeout", type=int, default=120,
+                        help="Confirmed-commit timeout in seconds for --candidate (default: 120)")
+    parser.add_argument("--workers", type=int, default=16,
+                        help="Maximum concurrent devices in bulk/candidate mode (default: 16)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Configure devices concurrently from one asyncio event loop (needs asyncssh)")
+    parser.add_argument("--max-sessions", type=int, default=1000,
+                        help="Maximum concurrent sessions in async mode (default: 1000)")
+    parser.add_argument("--full", action="store_true",
+                        help="Push every interface even when running already matches (no diff stage)")
+    parser.add_argument("--no-validate", action="store_true",
+                        help="Skip the YANG validation of the payloads before pushing")
+    parser.add_argument("--from-checker", nargs="?", const="", metavar="SOCKET",
+                        help="Diff against the state a running checker daemon (network_check.py --serve) "
+                             "last polled instead of reading every device; devices it has not polled "
+                             "are read live")
+    parser.add_argument("--topology",
+                        help="Allocate the addresses from this topology's links (see ip_allocator.py) "
+                             "instead of using NETWORK_CONFIG")
+    parser.add_argument("--pool", action="append", default=[], metavar="NETWORK:PREFIX",
+                        help="With --topology: allocate a /PREFIX to links whose expected_network "
+                             "is NETWORK, e.g. 10.0.0.0/16:30 (repeatable)")
+    parser.add_argument("--state",
+                        help="With --topology: keep allocated addresses stable across runs in this JSON file")
+    args = parser.parse_args()
+    
+    config, connections = NETWORK_CONFIG, CONNECTIONS
+    if args.topology:
+        from ip_allocator import (AllocationError, allocate_topology, connections as topology_connections,
+                                  parse_pool)
+        from topology import TopologyIndex
+        try:
+            topology = TopologyIndex.from_file(args.topology)
+            # A first run keeps the lab's NETWORK_CONFIG addresses rather than renumbering it
+            allocation = allocate_topology(topology, [parse_pool(p) for p in args.pool], args.state,
+                                           seed=NETWORK_CONFIG)
+        except (AllocationError, ValueError, OSError) as e:
+            print(f"❌ Address allocation failed: {e}")
+            sys.exit(1)
+        config, connections = allocation.config, topology_connections(topology)
+        print(f"📐 {len(topology.links)} links: {allocation.allocated} addresses allocated, "
+              f"{allocation.kept} kept")
+    
+    diff = not args.full
+    # With diff, the delta payloads are validated as they are built; without,
+    # every full payload is checked before the first push
+    validator = None
+    if not args.no_validate:
+        from yang_schema import Validator
+        validator = Validator.load()
+        if not diff and not validate_config(config, validator):
+            sys.exit(1)
+    
+    current = None
+    if diff and args.from_checker is not None:
+        from checker_daemon import default_socket_path
+        from config_diff import checker_state
+        path = args.from_checker or default_socket_path()
+        try:
+            current = checker_state(path, config)
+            print(f"📋 {len(current)}/{len(config)} devices diffed from the checker on {path}")
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Checker daemon on {path} unavailable ({e}), reading every device")
+    if args.candidate:
+        from candidate_deploy import CandidateDeployment
+        from config_diff import plan_fleet
+        start = time.perf_counter()
+        with SessionPool(timeout=10, device_params={'name': 'default'}) as pool:
+            if diff:
+                # Only devices that differ are staged, with their delta payloads
+                plans = plan_fleet(config, connections, pool, max_workers=args.workers, current=current)
+                payloads = {device: xml for device, xml in plans.items() if xml is not None}
+                print(f"🔍 {len(plans) - len(payloads)}/{len(plans)} devices already in sync")
+                if not payloads:
+                    print(f"✅ Nothing to deploy ({time.perf_counter() - start:.2f}s)")
+                    sys.exit(0)
+                if validator and not validate_payloads(payloads, validator):
+                    sys.exit(1)
+                deployment = CandidateDeployment(payloads, connections, lambda xml: xml, pool,
+                                                 max_workers=args.workers,
+                                                 confirm_timeout=args.confirm_timeout)
+            else:
+                deployment = CandidateDeployment(config, connections, build_device_config, pool,
+                                                 max_workers=args.workers,
+                                                 confirm_timeout=args.confirm_timeout)
+            ok = deployment.run()
+        deployment.print_summary()
+        print(f"{'✅ Fleet committed' if ok else '❌ Deploy aborted'} in {time.perf_counter() - start:.2f}s")
+        sys.exit(0 if ok else 1)
+    elif args.use_async:
+        start = time.perf_counter()
+        results = apply_config_async(config, connections, max_sessions=args.max_sessions, diff=diff,
+                                     current=current, validator=validator)
+        print_results(results, time.perf_counter() - start)
+        sys.exit(0 if all(r.ok for r in results) else 1)
+    elif args.bulk:
+        start = time.perf_counter()
+        results = apply_config_bulk(config, connections, max_workers=args.workers, diff=diff,
+                                    current=current, validator=validator)
+        print_results(results, time.perf_counter() - start)
+        sys.exit(0 if all(r.ok for r in results) else 1)
+    else:
+        ok = apply_config(config=config, connections=connections, diff=diff, current=current,
+                          validator=validator)
+        sys.exit(0 if ok else 1)
 
 if __name__ == "__main__":
-    apply_config()
+    main()
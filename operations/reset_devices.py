@@ -19,50 +19,32 @@ NETWORK_CONFIG = {
     }
 }
 
-from ncclient import manager
+import os
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 
-def reset_device(host, port, device_name):
-    """Reset a device to clean state"""
-        
-    # Connect to device
-    conn = manager.connect(
-        username='admin',
-        password='admin',
-        hostkey_verify=False,
-        timeout=10,
-        device_params={'name': 'default'}
-    )
-        
-    # Configure each interface
-    for iface in NETWORK_CONFIG[device_name]:
-        
-        cleanup_config = f'''
-<config xmlns="urn:ietf:params:xml:ns:netconf:base:1.0">
-  <interfaces xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">
-    <interface>
-      <name>{iface}</name>
-      <ipv4 xmlns="urn:ietf:params:xml:ns:yang:ietf-ip" xmlns:nc="urn:ietf:params:xml:ns:netconf:base:1.0" nc:operation="replace">
-      </ipv4>
-    </interface>
-  </interfaces>
-</config>'''
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from netconf_pool import SessionPool
+from netconf_payloads import RESET_TEMPLATES, reset_payload
+
+# Shared session pool: one session per device
+POOL = SessionPool(timeout=10, device_params={'name': 'default'})
+
+def reset_device(host, port, device_name, pool=None, mode='ip', interfaces=None):
+    """Reset a device to clean state with one session and one edit-config"""
+    pool = pool or POOL
+    interfaces = set(interfaces or NETWORK_CONFIG[device_name])
     
-        try:
-            with manager.connect(
-                host=host,
-                port=port,
-                username='admin',
-                password='admin',
-                hostkey_verify=False
-            ) as m:
-                print(f"Resetting {device_name}, {iface}...")
-            
-                # Remove all interfaces
-                result = m.edit_config(target='running', config=cleanup_config)
-            
-        except Exception as e:
-            print(f"❌ Failed to reset {device_name}: {e}")
-            return False
+    try:
+        # Entries are memoized in netconf_payloads, so this is a join
+        cleanup_config = reset_payload(interfaces, mode)
+        with pool.session(host, port) as m:
+            print(f"Resetting {device_name} ({', '.join(sorted(interfaces))})...")
+            m.edit_config(target='running', config=cleanup_config)
+    except Exception as e:
+        print(f"❌ Failed to reset {device_name}: {e}")
+        return False
     
     print(f"✅ {device_name} reset successfully")
     return True
@@ -74,13 +56,22 @@ def main():
         ('localhost', 832, 'Core')
     ]
     
+    parser = argparse.ArgumentParser(description="Reset all lab devices")
+    parser.add_argument("--mode", choices=sorted(RESET_TEMPLATES), default='ip',
+                        help="'ip' removes IPv4 config, 'interface' removes the interfaces (default: ip)")
+    parser.add_argument("--workers", type=int, default=16,
+                        help="Maximum devices reset concurrently (default: 16)")
+    args = parser.parse_args()
+    
     print("🧹 Resetting all lab devices...")
     print("=" * 40)
     
-    success_count = 0
-    for host, port, name in devices:
-        if reset_device(host, port, name):
-            success_count += 1
+    # All devices are reset concurrently
+    with ThreadPoolExecutor(max_workers=max(1, min(args.workers, len(devices)))) as executor:
+        results = list(executor.map(lambda d: reset_device(*d, mode=args.mode), devices))
+    success_count = sum(results)
+    
+    POOL.close_all()
     
     print("=" * 40)
     print(f"✅ {success_count}/{len(devices)} devices reset successfully")
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Drift-free Poll Scheduler
+Polls each device on its own fixed cadence instead of "sweep, then sleep".
+
+- Poll slots are phase + k * interval, so the period never stretches with
+  sweep time.
+- Each device gets a stable phase offset inside its interval plus a small
+  random jitter, so polls are spread out instead of hitting the whole
+  management network at once.
+- A device whose previous poll is still in flight is skipped for that slot
+  (never queued); if the scheduler falls behind, missed slots are coalesced
+  into the next future one.
+- set_interval() changes a device's cadence while running, e.g. when its
+  notification subscription drops or comes back.
+- With an event loop, polls are coroutines run as tasks on it (async
+  sessions): no thread per poll in flight, only one for result callbacks.
+"""
+
+import asyncio
+import heapq
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class PollStats:
+    """Per-device scheduling counters"""
+    polls: int = 0
+    skipped: int = 0
+    coalesced: int = 0
+    # Polls (or result callbacks) that raised
+    errors: int = 0
+    last_start: Optional[float] = None
+
+
+class PollScheduler:
+    """Run poll(name) for every device at its own fixed interval"""
+
+    def __init__(self, intervals: Dict[str, float], poll: Callable[[str], object],
+                 on_result: Optional[Callable[[str, object], None]] = None,
+                 max_workers: int = 16, jitter: float = 0.05, seed: Optional[int] = None,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        intervals: poll interval in seconds per device name
+        poll:      called in a worker thread with the device name; with loop,
+                   a coroutine function awaited on that loop instead
+        on_result: called in a worker thread with (name, poll result)
+        max_workers: polls running at once (threads, or tasks with loop)
+        jitter:    random offset applied to every slot, as a fraction of the interval
+        loop:      a running event loop (in another thread) to poll on
+        """
+        self.intervals = dict(intervals)
+        self.poll = poll
+        self.on_result = on_result
+        self.loop = loop
+        self.max_workers = max(1, max_workers)
+        self.jitter = jitter
+        self.stats: Dict[str, PollStats] = {name: PollStats() for name in intervals}
+        self._random = random.Random(seed)
+        self._stop = threading.Event()
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._slot: Dict[str, int] = {}
+        self._phase: Dict[str, float] = {}
+        # Due time of each device's live heap entry; others are stale
+        self._due: Dict[str, float] = {}
+        # Interval changes to apply from the scheduling thread
+        self._retune: Dict[str, float] = {}
+        self._wake = threading.Event()
+
+    @staticmethod
+    def phase_offset(name: str, interval: float) -> float:
+        """Stable offset in [0, interval) derived from the device name"""
+        return (zlib.crc32(name.encode()) / 2 ** 32) * interval
+
+    def _slot_time(self, name: str, slot: int) -> float:
+        interval = self.intervals[name]
+        offset = self._random.uniform(-self.jitter, self.jitter) * interval
+        return self._phase[name] + slot * interval + offset
+
+    def _schedule(self, name: str, now: float):
+        interval = self.intervals[name]
+        slot = self._slot[name] + 1
+        # Coalesce slots that are already in the past
+        behind = int((now - (self._phase[name] + slot * interval)) // interval)
+        if behind > 0:
+            slot += behind
+            self.stats[name].coalesced += behind
+        self._slot[name] = slot
+        self._push(name, slot)
+
+    def _push(self, name: str, slot: int):
+        due = self._slot_time(name, slot)
+        self._due[name] = due
+        heapq.heappush(self._heap, (due, slot, name))
+
+    def set_interval(self, name: str, interval: float):
+        """Poll a device every interval seconds from now on (thread-safe)"""
+        with self._lock:
+            if self.intervals.get(name) == interval and name not in self._retune:
+                return
+            self._retune[name] = interval
+        self._wake.set()
+
+    def _apply_retune(self, now: float):
+        with self._lock:
+            retune, self._retune = self._retune, {}
+        for name, interval in retune.items():
+            # Re-phase: the first poll at the new cadence is within one interval
+            self.intervals[name] = interval
+            self.stats.setdefault(name, PollStats())
+            self._phase[name] = now + self.phase_offset(name, interval)
+            self._slot[name] = 0
+            self._push(name, 0)
+
+    def _run_poll(self, name: str):
+        try:
+            result = self.poll(name)
+            if self.on_result:
+                self.on_result(name, result)
+        except Exception as e:
+            self._poll_failed(name, e)
+        finally:
+            with self._lock:
+                self._in_flight.discard(name)
+
+    async def _run_poll_async(self, name: str, limit: asyncio.Semaphore, results: ThreadPoolExecutor):
+        try:
+            async with limit:
+                result = await self.poll(name)
+            if self.on_result:
+                # Link evaluation is not for the loop thread
+                await asyncio.get_running_loop().run_in_executor(results, self.on_result, name, result)
+        except Exception as e:
+            self._poll_failed(name, e)
+        finally:
+            with self._lock:
+                self._in_flight.discard(name)
+
+    def _poll_failed(self, name: str, error: Exception):
+        # Nobody reads the future: report here or the error is lost
+        if self._stop.is_set():
+            return
+        self.stats[name].errors += 1
+        print(f"❌ Poll of {name} failed: {type(error).__name__}: {error}")
+
+    def run(self, start: Optional[float] = None):
+        """Run until stop() is called (blocks the calling thread)"""
+        start = time.monotonic() if start is None else start
+        for name, interval in self.intervals.items():
+            self._phase[name] = start + self.phase_offset(name, interval)
+            self._slot[name] = 0
+            self._push(name, 0)
+
+        if self.loop is None:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="poll")
+            dispatch = partial(executor.submit, self._run_poll)
+        else:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="poll-result")
+            limit = asyncio.Semaphore(self.max_workers)
+            dispatch = lambda name: asyncio.run_coroutine_threadsafe(
+                self._run_poll_async(name, limit, executor), self.loop)
+        try:
+            while not self._stop.is_set():
+                self._wake.clear()
+                self._apply_retune(time.monotonic())
+                if not self._heap:
+                    break
+                due, _, name = self._heap[0]
+                if due != self._due.get(name):
+                    heapq.heappop(self._heap)
+                    continue
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._wake.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+
+                with self._lock:
+                    busy = name in self._in_flight
+                    if not busy:
+                        self._in_flight.add(name)
+                stats = self.stats[name]
+                if busy:
+                    stats.skipped += 1
+                else:
+                    stats.polls += 1
+                    stats.last_start = time.monotonic()
+                    dispatch(name)
+
+                self._schedule(name, time.monotonic())
+        finally:
+            # Never block shutdown on a poll stuck in a dead session
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def in_flight(self) -> Iterable[str]:
+        with self._lock:
+            return set(self._in_flight)
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+State Journal
+Append-only history of interface states, device reachability and link
+status changes, kept in SQLite (WAL mode) so past sweeps can be queried.
+
+Only deltas are written: an interface row is appended when its address,
+enabled flag or description differs from the last journaled state, and a
+link row when its status or details change. Device and interface names
+are stored once in lookup tables and addresses as packed integers.
+
+Retention: prune() drops the rows older than a cutoff but keeps the last
+state of every interface, link and device as of the cutoff, so history
+still starts from a known state. With a retention age (--journal-retention)
+the journal prunes itself hourly and returns freed pages incrementally;
+"prune --vacuum" also compacts the file.
+
+Usage:
+    python network_check.py 30 --journal history.db
+    python state_journal.py history.db interface RAN-042 backhaul0 --since 30d
+    python state_journal.py history.db link "RAN-042 backhaul" --since 2026-01-01
+    python state_journal.py history.db changes --since 2h --until 1h
+    python state_journal.py history.db device RAN-042
+    python state_journal.py history.db prune 180d --vacuum
+"""
+
+import argparse
+import ipaddress
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS endpoints (
+    id INTEGER PRIMARY KEY,
+    device TEXT NOT NULL,
+    interface TEXT NOT NULL,
+    UNIQUE (device, interface)
+);
+CREATE TABLE IF NOT EXISTS links (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS interface_events (
+    ts REAL NOT NULL,
+    endpoint INTEGER NOT NULL REFERENCES endpoints (id),
+    present INTEGER NOT NULL,
+    ip INTEGER,
+    prefix INTEGER,
+    enabled INTEGER,
+    description TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS interface_events_endpoint ON interface_events (endpoint, ts);
+CREATE INDEX IF NOT EXISTS interface_events_ts ON interface_events (ts);
+CREATE TABLE IF NOT EXISTS link_events (
+    ts REAL NOT NULL,
+    link INTEGER NOT NULL REFERENCES links (id),
+    status TEXT NOT NULL,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS link_events_link ON link_events (link, ts);
+CREATE INDEX IF NOT EXISTS link_events_ts ON link_events (ts);
+CREATE TABLE IF NOT EXISTS device_events (
+    ts REAL NOT NULL,
+    device TEXT NOT NULL,
+    up INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS device_events_device ON device_events (device, ts);
+CREATE INDEX IF NOT EXISTS device_events_ts ON device_events (ts);
+"""
+
+# (present, ip, prefix, enabled, description, extra)
+InterfaceState = Tuple[int, Optional[int], Optional[int], Optional[int], Optional[str], Optional[str]]
+
+REMOVED: InterfaceState = (0, None, None, None, None, None)
+
+# Seconds between automatic prunes of a journal with a retention age
+PRUNE_EVERY = 3600.0
+
+AGE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def _pack_ip(ip: Optional[str]) -> Optional[int]:
+    try:
+        return int(ipaddress.IPv4Address(ip)) if ip else None
+    except ValueError:
+        return None
+
+
+def _format_ip(ip: Optional[int], prefix: Optional[int]) -> str:
+    if ip is None:
+        return "No IP"
+    return f"{ipaddress.IPv4Address(ip)}/{prefix}" if prefix else str(ipaddress.IPv4Address(ip))
+
+
+def interface_state(interface) -> InterfaceState:
+    """Journaled fields of an Interface (or InterfaceView)"""
+    extra = ",".join(f"{ip}/{prefix}" for ip, prefix in interface.addresses[1:]) or None
+    return (1, _pack_ip(interface.ip_address), interface.prefix_length,
+            int(bool(interface.enabled)), interface.description or None, extra)
+
+
+class StateJournal:
+    """Delta journal of checker state in an SQLite database"""
+
+    def __init__(self, path: str, retention: Optional[float] = None, read_only: bool = False):
+        """Open (or create) a journal; read_only opens an existing one for queries only
+
+        Only a writer loads the delta state, which scans every event table.
+        """
+        self.path = path
+        # Seconds of history to keep; None keeps everything
+        self.retention = retention
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, int]] = {}
+        self._links: Dict[str, int] = {}
+        self._interfaces: Dict[int, InterfaceState] = {}
+        self._link_states: Dict[int, Tuple[str, str]] = {}
+        self._device_up: Dict[str, int] = {}
+        if read_only:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No journal at {path}")
+            self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            return
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # Only takes effect on a new file: lets prunes return pages without a full VACUUM
+        self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._load_last_states()
+
+    def _load_last_states(self):
+        """Seed the delta state from the newest row of every key"""
+        db = self._db
+        for endpoint_id, device, interface in db.execute("SELECT id, device, interface FROM endpoints"):
+            self._endpoints.setdefault(device, {})[interface] = endpoint_id
+        for link_id, name in db.execute("SELECT id, name FROM links"):
+            self._links[name] = link_id
+        for row in db.execute(
+                "SELECT e.endpoint, e.present, e.ip, e.prefix, e.enabled, e.description, e.extra "
+                "FROM interface_events e JOIN (SELECT endpoint, MAX(rowid) AS last FROM interface_events "
+                "GROUP BY endpoint) m ON e.rowid = m.last"):
+            self._interfaces[row[0]] = tuple(row[1:])
+        for link_id, status, details in db.execute(
+                "SELECT l.link, l.status, l.details FROM link_events l JOIN (SELECT link, MAX(rowid) AS last "
+                "FROM link_events GROUP BY link) m ON l.rowid = m.last"):
+            self._link_states[link_id] = (status, details)
+        for device, up in db.execute(
+                "SELECT d.device, d.up FROM device_events d JOIN (SELECT device, MAX(rowid) AS last "
+                "FROM device_events GROUP BY device) m ON d.rowid = m.last"):
+            self._device_up[device] = up
+
+    def _endpoint_id(self, device: str, interface: str) -> int:
+        endpoints = self._endpoints.setdefault(device, {})
+        endpoint_id = endpoints.get(interface)
+        if endpoint_id is None:
+            cursor = self._db.execute("INSERT INTO endpoints (device, interface) VALUES (?, ?)",
+                                      (device, interface))
+            endpoint_id = endpoints[interface] = cursor.lastrowid
+        return endpoint_id
+
+    def _link_id(self, name: str) -> int:
+        link_id = self._links.get(name)
+        if link_id is None:
+            cursor = self._db.execute("INSERT INTO links (name) VALUES (?)", (name,))
+            link_id = self._links[name] = cursor.lastrowid
+        return link_id
+
+    def record_device(self, device: str, interfaces: Mapping, ts: Optional[float] = None) -> int:
+        """Journal the interfaces of a device that differ from the last snapshot
+
+        Interfaces journaled before but missing from this snapshot are
+        recorded as removed. Returns the number of rows written.
+        """
+        ts = time.time() if ts is None else ts
+        with self._lock, self._db:
+            rows = []
+            seen = set()
+            for name, interface in interfaces.items():
+                endpoint_id = self._endpoint_id(device, name)
+                seen.add(endpoint_id)
+                state = interface_state(interface)
+                if self._interfaces.get(endpoint_id) != state:
+                    self._interfaces[endpoint_id] = state
+                    rows.append((ts, endpoint_id) + state)
+            for endpoint_id in self._endpoints.get(device, {}).values():
+                if endpoint_id not in seen and self._interfaces.get(endpoint_id, REMOVED)[0]:
+                    self._interfaces[endpoint_id] = REMOVED
+                    rows.append((ts, endpoint_id) + REMOVED)
+            if rows:
+                self._db.executemany("INSERT INTO interface_events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            return len(rows)
+
+    def record_device_status(self, device: str, up: bool, ts: Optional[float] = None):
+        """Journal a device becoming reachable or unreachable"""
+        with self._lock:
+            if self._device_up.get(device) == int(up):
+                return
+            self._device_up[device] = int(up)
+            with self._db:
+                self._db.execute("INSERT INTO device_events VALUES (?, ?, ?)",
+                                 (time.time() if ts is None else ts, device, int(up)))
+
+    def prune_if_due(self, now: Optional[float] = None) -> int:
+        """Apply the retention age at most every PRUNE_EVERY seconds"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.retention is None or now < self._next_prune:
+                return 0
+            self._next_prune = now + PRUNE_EVERY
+        deleted = self.prune(now - self.retention)
+        if deleted:
+            with self._lock:
+                self._db.execute("PRAGMA incremental_vacuum")
+        return deleted
+
+    def prune(self, before: float) -> int:
+        """Delete history older than before, keeping each key's state as of then
+
+        The newest row of every interface, link and device before the
+        cutoff stays (except interfaces already removed), so queries of
+        the remaining range and the delta state start from it. Returns the
+        number of rows deleted.
+        """
+        with self._lock, self._db:
+            deleted = self._db.execute(
+                "DELETE FROM interface_events WHERE ts < ? AND (present = 0 OR rowid NOT IN "
+                "(SELECT MAX(rowid) FROM interface_events WHERE ts < ? GROUP BY endpoint))",
+                (before, before)).rowcount
+            deleted += self._db.execute(
+                "DELETE FROM link_events WHERE ts < ? AND rowid NOT IN "
+                "(SELECT MAX(rowid) FROM link_events WHERE ts < ? GROUP BY link)",
+                (before, before)).rowcount
+            deleted += self._db.execute(
+                "DELETE FROM device_events WHERE ts < ? AND rowid NOT IN "
+                "(SELECT MAX(rowid) FROM device_events WHERE ts < ? GROUP BY device)",
+                (before, before)).rowcount
+        return deleted
+
+    def vacuum(self):
+        """Rewrite the database file to its live size"""
+        with self._lock:
+            self._db.execute("VACUUM")
+
+    def record_link_changes(self, changes) -> int:
+        """Journal LinkChange objects whose status or details differ from the last row"""
+        with self._lock, self._db:
+            rows = []
+            for change in changes:
+                link_id = self._link_id(change.link.name)
+                state = (change.new_status, change.details)
+                if self._link_states.get(link_id) != state:
+                    self._link_states[link_id] = state
+                    rows.append((change.timestamp.timestamp(), link_id) + state)
+            if rows:
+                self._db.executemany("INSERT INTO link_events VALUES (?, ?, ?, ?)", rows)
+            return len(rows)
+
+    # ------------------------------------------------------------------
+    # Queries: all stream rows from an index range scan
+
+    def interface_history(self, device: str, interface: str, since: float = 0.0,
+                          until: float = float('inf')) -> Iterator[tuple]:
+        return self._db.execute(
+            "SELECT e.ts, e.present, e.ip, e.prefix, e.enabled, e.description, e.extra "
+            "FROM interface_events e JOIN endpoints p ON p.id = e.endpoint "
+            "WHERE p.device = ? AND p.interface = ? AND e.ts >= ? AND e.ts < ? ORDER BY e.ts",
+            (device, interface, since, until))
+
+    def link_history(self, link: str, since: float = 0.0, until: float = float('inf')) -> Iterator[tuple]:
+        return self._db.execute(
+            "SELECT e.ts, e.status, e.details FROM link_events e JOIN links l ON l.id = e.link "
+            "WHERE l.name = ? AND e.ts >= ? AND e.ts < ? ORDER BY e.ts",
+            (link, since, until))
+
+    def device_history(self, device: str, since: float = 0.0, until: float = float('inf')) -> Iterator[tuple]:
+        """Reachability changes and interface changes of one device, in time order"""
+        return self._db.execute(
+            "SELECT ts, 'device', up, NULL, NULL, NULL FROM device_events "
+            "WHERE device = ? AND ts >= ? AND ts < ? "
+            "UNION ALL "
+            "SELECT e.ts, p.interface, e.present, e.ip, e.prefix, e.enabled "
+            "FROM interface_events e JOIN endpoints p ON p.id = e.endpoint "
+            "WHERE p.device = ? AND e.ts >= ? AND e.ts < ? ORDER BY 1",
+            (device, since, until, device, since, until))
+
+    def changes(self, since: float = 0.0, until: float = float('inf')) -> Iterator[tuple]:
+        """Every journaled event in a time range: (ts, kind, subject, summary)"""
+        return self._db.execute(
+            "SELECT e.ts, 'interface', p.device || ':' || p.interface, e.present, e.ip, e.prefix, e.enabled "
+            "FROM interface_events e JOIN endpoints p ON p.id = e.endpoint WHERE e.ts >= ? AND e.ts < ? "
+            "UNION ALL "
+            "SELECT e.ts, 'link', l.name, e.status, e.details, NULL, NULL "
+            "FROM link_events e JOIN links l ON l.id = e.link WHERE e.ts >= ? AND e.ts < ? "
+            "UNION ALL "
+            "SELECT ts, 'device', device, up, NULL, NULL, NULL FROM device_events WHERE ts >= ? AND ts < ? "
+            "ORDER BY 1",
+            (since, until) * 3)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def parse_age(value: str) -> Optional[float]:
+    """Seconds in an age such as 90s, 15m, 2h, 30d or 26w; None if it is not one"""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhdw])', value.strip())
+    return float(match.group(1)) * AGE_UNITS[match.group(2)] if match else None
+
+
+def parse_time(value: Optional[str], default: float) -> float:
+    """Absolute ISO time, or a relative age such as 90s, 15m, 2h or 30d"""
+    if not value:
+        return default
+    age = parse_age(value)
+    if age is not None:
+        return (datetime.now() - timedelta(seconds=age)).timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _when(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _interface_summary(present, ip, prefix, enabled) -> str:
+    if not present:
+        return "❌ removed"
+    return f"{'🟢' if enabled else '🔴'} {_format_ip(ip, prefix)}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the network_check state journal")
+    parser.add_argument("journal", help="Journal database written by network_check.py --journal")
+    parser.add_argument("--since", help="Start of the time range (ISO time or age like 2h, 30d)")
+    parser.add_argument("--until", help="End of the time range (ISO time or age like 2h, 30d)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    interface = commands.add_parser("interface", help="History of one interface")
+    interface.add_argument("device")
+    interface.add_argument("interface")
+    link = commands.add_parser("link", help="Status history of one link")
+    link.add_argument("link")
+    device = commands.add_parser("device", help="Reachability and interface changes of one device")
+    device.add_argument("device")
+    commands.add_parser("changes", help="Every change in the time range")
+    prune = commands.add_parser("prune", help="Delete history older than an age or time")
+    prune.add_argument("before", help="ISO time or age like 180d (the state as of then is kept)")
+    prune.add_argument("--vacuum", action="store_true", help="Also shrink the database file")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.journal):
+        print(f"❌ No journal at {args.journal}", file=sys.stderr)
+        return 1
+    # Queries open it read-only, without loading the delta state; prune writes
+    journal = StateJournal(args.journal, read_only=args.command != "prune")
+    if args.command == "prune":
+        before = parse_time(args.before, 0.0)
+        deleted = journal.prune(before)
+        if args.vacuum:
+            journal.vacuum()
+        print(f"🧹 {deleted} rows before {_when(before)} deleted")
+        journal.close()
+        return 0
+    since = parse_time(args.since, 0.0)
+    until = parse_time(args.until, float('inf'))
+    count = 0
+
+    if args.command == "interface":
+        print(f"📋 {args.device}:{args.interface}")
+        for ts, present, ip, prefix, enabled, description, extra in journal.interface_history(
+                args.device, args.interface, since, until):
+            summary = _interface_summary(present, ip, prefix, enabled)
+            if extra:
+                summary += f" (+{extra})"
+            desc = f" ({description})" if description else ""
+            print(f"   {_when(ts)}  {summary}{desc}")
+            count += 1
+    elif args.command == "link":
+        print(f"🔗 {args.link}")
+        for ts, status, details in journal.link_history(args.link, since, until):
+            print(f"   {_when(ts)}  {status:12} {details}")
+            count += 1
+    elif args.command == "device":
+        print(f"📱 {args.device}")
+        for ts, subject, value, ip, prefix, enabled in journal.device_history(args.device, since, until):
+            if subject == 'device':
+                summary = "✅ reachable" if value else "❌ unreachable"
+            else:
+                summary = f"{subject:12} {_interface_summary(value, ip, prefix, enabled)}"
+            print(f"   {_when(ts)}  {summary}")
+            count += 1
+    else:
+        for ts, kind, subject, a, b, c, d in journal.changes(since, until):
+            if kind == 'interface':
+                summary = _interface_summary(a, b, c, d)
+            elif kind == 'link':
+                summary = f"{a} {b}"
+            else:
+                summary = "✅ reachable" if a else "❌ unreachable"
+            print(f"{_when(ts)}  {kind:9} {subject:40} {summary}")
+            count += 1
+
+    if not count:
+        print("   (no journaled changes in range)")
+    journal.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
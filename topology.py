@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Network Topology Index
+Loads devices and expected links from a YAML, JSON or CSV file and indexes
+them so that large fleets can be evaluated without linear scans.
+"""
+
+import csv
+import ipaddress
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_TOPOLOGY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'topology.yml')
+
+LINK_FIELDS = ('name', 'device1', 'interface1', 'device2', 'interface2',
+               'expected_network', 'description')
+
+
+@dataclass
+class NetworkLink:
+    """Represents a network link between two devices"""
+    name: str
+    device1: str
+    interface1: str
+    device2: str
+    interface2: str
+    expected_network: str
+    description: str
+    # Parsed once from expected_network
+    network: ipaddress.IPv4Network = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.network = ipaddress.IPv4Network(self.expected_network)
+
+
+@dataclass
+class DeviceSpec:
+    """Connection details of a device declared in the topology"""
+    name: str
+    host: str
+    port: int = 830
+    # Device class used for per-class poll intervals (e.g. ran, router, core)
+    role: str = ""
+    # Poll interval override in seconds for this device
+    poll_interval: Optional[float] = None
+
+    def __post_init__(self):
+        # Lowercase like the --poll-interval ROLE keys
+        self.role = (self.role or self.name.split('-')[0]).lower()
+
+
+class TopologyIndex:
+    """Links indexed by name, by device and by (device, interface)"""
+
+    def __init__(self, links: Iterable[NetworkLink], devices: Optional[Iterable[DeviceSpec]] = None):
+        self.links: List[NetworkLink] = []
+        self.devices: Dict[str, DeviceSpec] = {d.name: d for d in devices or []}
+        self.by_name: Dict[str, NetworkLink] = {}
+        self.by_device: Dict[str, List[NetworkLink]] = {}
+        self.by_endpoint: Dict[Tuple[str, str], List[NetworkLink]] = {}
+
+        for link in links:
+            if link.name in self.by_name:
+                raise ValueError(f"Duplicate link name in topology: {link.name}")
+            self.links.append(link)
+            self.by_name[link.name] = link
+
+            self.by_device.setdefault(link.device1, []).append(link)
+            if link.device2 != link.device1:
+                self.by_device.setdefault(link.device2, []).append(link)
+
+            self.by_endpoint.setdefault((link.device1, link.interface1), []).append(link)
+            if (link.device2, link.interface2) != (link.device1, link.interface1):
+                self.by_endpoint.setdefault((link.device2, link.interface2), []).append(link)
+
+    def __len__(self) -> int:
+        return len(self.links)
+
+    def links_for_device(self, device_name: str) -> List[NetworkLink]:
+        """Links with an endpoint on the given device"""
+        return self.by_device.get(device_name, [])
+
+    def links_for_interface(self, device_name: str, interface_name: str) -> List[NetworkLink]:
+        """Links terminating on the given device interface"""
+        return self.by_endpoint.get((device_name, interface_name), [])
+
+    def interfaces_for_device(self, device_name: str) -> List[str]:
+        """Sorted names of the device's interfaces referenced by any link"""
+        names = set()
+        for link in self.links_for_device(device_name):
+            if link.device1 == device_name:
+                names.add(link.interface1)
+            if link.device2 == device_name:
+                names.add(link.interface2)
+        return sorted(names)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_TOPOLOGY_FILE) -> 'TopologyIndex':
+        """Load a topology from a .yml/.yaml, .json or .csv file
+
+        YAML and JSON files hold a `devices` mapping (name -> host/port and
+        optional role/poll_interval) and a
+        `links` list. CSV files hold one link per row, with a header row
+        naming the NetworkLink fields and optional host1/port1/host2/port2
+        columns for the endpoint devices.
+
+        Raises ValueError if the file declares no devices or a link ends on
+        a device it does not declare.
+        """
+        return _checked(cls._load(path), path)
+
+    @classmethod
+    def _load(cls, path: str) -> 'TopologyIndex':
+        ext = os.path.splitext(path)[1].lower()
+
+        if ext == '.csv':
+            with open(path, newline='') as f:
+                rows = [row for row in csv.DictReader(f) if row.get('name')]
+            devices = {}
+            for row in rows:
+                for side in ('1', '2'):
+                    name, host = row[f'device{side}'], row.get(f'host{side}')
+                    if host and name not in devices:
+                        devices[name] = DeviceSpec(name=name, host=host, port=int(row.get(f'port{side}') or 830))
+            return cls((_link_from_dict(row) for row in rows), devices.values())
+
+        with open(path) as f:
+            if ext in ('.yml', '.yaml'):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ImportError("PyYAML is required for YAML topologies: pip3 install pyyaml")
+                data = yaml.safe_load(f) or {}
+            elif ext == '.json':
+                data = json.load(f)
+            else:
+                raise ValueError(f"Unsupported topology format: {path}")
+
+        devices = [DeviceSpec(name=name, host=spec.get('host', 'localhost'), port=int(spec.get('port', 830)),
+                              role=spec.get('role', ''), poll_interval=spec.get('poll_interval'))
+                   for name, spec in (data.get('devices') or {}).items()]
+        return cls((_link_from_dict(item) for item in data.get('links') or []), devices)
+
+
+def _checked(index: TopologyIndex, path: str) -> TopologyIndex:
+    """A loaded topology, if every link endpoint is a declared device"""
+    if not index.devices:
+        raise ValueError(f"No devices in topology {path} (CSV files need host1/host2 columns)")
+    for link in index.links:
+        unknown = [d for d in dict.fromkeys((link.device1, link.device2)) if d not in index.devices]
+        if unknown:
+            raise ValueError(f"Link {link.name} in {path} ends on undeclared device(s): {', '.join(unknown)}")
+    return index
+
+
+def _link_from_dict(item: dict) -> NetworkLink:
+    missing = [f for f in LINK_FIELDS[:-1] if not item.get(f)]
+    if missing:
+        raise ValueError(f"Link {item.get('name', '?')} is missing: {', '.join(missing)}")
+    return NetworkLink(**{f: str(item.get(f) or '').strip() for f in LINK_FIELDS})
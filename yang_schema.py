@@ -0,0 +1,654 @@
+#!/usr/bin/env python3
+"""
+YANG Schema Validation
+Validates edit-config payloads locally against the YANG modules in
+yang-models/common and enable-features.csv, the same set the notconf
+containers load, so a bad change fails before any RPC is sent.
+
+The modules are compiled by a small built-in YANG compiler into a compact
+JSON schema (data nodes, resolved types and identities) and cached on disk,
+keyed by the module revisions and the enabled features, so only the first
+run pays for parsing.
+
+Covered: containers, lists (keys), leaves and leaf-lists with their resolved
+types (integer ranges, string length/patterns, enumerations, identityrefs,
+unions, booleans, decimal64), config false, if-feature, uses/grouping,
+augment and choice/case. Not covered: when/must expressions, leafref
+targets and mandatory nodes (edit-config fragments are partial by design).
+
+Usage:
+    python yang_schema.py misc/*.xml
+    python yang_schema.py --rebuild
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Tuple
+
+from lxml import etree
+
+YANG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'yang-models', 'common')
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'network-automation')
+NC_NS = 'urn:ietf:params:xml:ns:netconf:base:1.0'
+NC_OPERATION = f'{{{NC_NS}}}operation'
+EDIT_OPERATIONS = {'merge', 'replace', 'create', 'delete', 'remove'}
+
+# Bumped whenever the compiled format changes, to invalidate old caches
+SCHEMA_FORMAT = 1
+
+INTEGER_BOUNDS = {
+    'int8': (-2 ** 7, 2 ** 7 - 1), 'int16': (-2 ** 15, 2 ** 15 - 1),
+    'int32': (-2 ** 31, 2 ** 31 - 1), 'int64': (-2 ** 63, 2 ** 63 - 1),
+    'uint8': (0, 2 ** 8 - 1), 'uint16': (0, 2 ** 16 - 1),
+    'uint32': (0, 2 ** 32 - 1), 'uint64': (0, 2 ** 64 - 1),
+}
+BUILTIN_TYPES = set(INTEGER_BOUNDS) | {
+    'string', 'boolean', 'enumeration', 'identityref', 'union', 'leafref', 'empty',
+    'bits', 'binary', 'decimal64', 'instance-identifier',
+}
+DATA_KEYWORDS = {'container', 'list', 'leaf', 'leaf-list', 'anydata', 'anyxml'}
+
+
+class YangError(Exception):
+    """A YANG module could not be parsed or compiled"""
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+
+class Statement:
+    __slots__ = ('keyword', 'arg', 'subs')
+
+    def __init__(self, keyword: str, arg: Optional[str], subs: List['Statement']):
+        self.keyword = keyword
+        self.arg = arg
+        self.subs = subs
+
+    def find(self, keyword: str) -> Optional['Statement']:
+        return next((s for s in self.subs if s.keyword == keyword), None)
+
+    def find_all(self, keyword: str) -> List['Statement']:
+        return [s for s in self.subs if s.keyword == keyword]
+
+    def value(self, keyword: str, default=None):
+        statement = self.find(keyword)
+        return statement.arg if statement is not None else default
+
+
+TOKEN_RE = re.compile(r'''
+    (?P<space>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<punct>[;{}])
+  | "(?P<dq>(?:[^"\\]|\\.)*)"
+  | '(?P<sq>[^']*)'
+  | (?P<plus>\+)
+  | (?P<word>[^\s;{}"']+)
+''', re.S | re.X)
+
+ESCAPES = {'n': '\n', 't': '\t', '"': '"', '\\': '\\'}
+
+
+def tokenize(text: str):
+    """Yield ';', '{', '}' or (string,) tokens; quoted strings joined by '+' are merged"""
+    pending = None
+    for match in TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == 'space':
+            continue
+        if kind in ('dq', 'sq'):
+            value = match.group(kind)
+            if kind == 'dq':
+                value = re.sub(r'\\(.)', lambda m: ESCAPES.get(m.group(1), m.group(0)), value)
+            pending = value if pending is None else pending + value
+            continue
+        if kind == 'plus' and pending is not None:
+            continue
+        if pending is not None:
+            yield (pending,)
+            pending = None
+        yield match.group(kind) if kind == 'punct' else (match.group(kind),)
+    if pending is not None:
+        yield (pending,)
+
+
+def parse_module(text: str) -> Statement:
+    stack: List[List[Statement]] = [[]]
+    keyword = arg = None
+    for token in tokenize(text):
+        if isinstance(token, tuple):
+            if keyword is None:
+                keyword = token[0]
+            else:
+                arg = token[0]
+        elif token == ';':
+            stack[-1].append(Statement(keyword, arg, []))
+            keyword = arg = None
+        elif token == '{':
+            statement = Statement(keyword, arg, [])
+            stack[-1].append(statement)
+            stack.append(statement.subs)
+            keyword = arg = None
+        else:
+            stack.pop()
+    if len(stack) != 1 or not stack[0]:
+        raise YangError("unbalanced braces")
+    return stack[0][0]
+
+
+# ---------------------------------------------------------------------------
+# Compilation
+
+class Module:
+    def __init__(self, stmt: Statement, path: str):
+        self.stmt = stmt
+        self.path = path
+        self.name = stmt.arg
+        self.namespace = stmt.value('namespace')
+        self.prefix = stmt.value('prefix')
+        self.revision = stmt.value('revision', '')
+        self.imports = {i.value('prefix'): i.arg for i in stmt.find_all('import')}
+        self.imports[self.prefix] = self.name
+        self.typedefs = {s.arg: s for s in stmt.find_all('typedef')}
+        self.groupings = {s.arg: s for s in stmt.find_all('grouping')}
+
+
+def module_header(path: str) -> Tuple[str, str]:
+    """(module name, newest revision) without parsing the whole module"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    name = re.search(r'\bmodule\s+([\w.-]+)', text)
+    revision = re.search(r'\brevision\s+"?(\d{4}-\d{2}-\d{2})', text)
+    return (name.group(1) if name else os.path.basename(path),
+            revision.group(1) if revision else '')
+
+
+def load_features(path: str) -> Dict[str, set]:
+    """enable-features.csv: 'module,feature' lines, '*' enabling every feature"""
+    features: Dict[str, set] = {}
+    if not os.path.exists(path):
+        return features
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            module, _, feature = line.partition(',')
+            features.setdefault(module.strip(), set()).add(feature.strip() or '*')
+    return features
+
+
+def xsd_to_python(pattern: str) -> Optional[str]:
+    """Approximate an XSD regular expression with Python's re syntax"""
+    converted = pattern.replace(r'\p{N}', r'\d').replace(r'\p{L}', r'\w')
+    converted = converted.replace(r'\i', r'[\w:]').replace(r'\c', r'[\w:.-]')
+    try:
+        re.compile(converted)
+    except re.error:
+        return None
+    return converted
+
+
+def parse_ranges(text: str, low, high, number=int) -> List[List]:
+    ranges = []
+    for part in text.split('|'):
+        bounds = [b.strip() for b in part.split('..')]
+        values = []
+        for b in bounds:
+            values.append(low if b == 'min' else high if b == 'max' else number(b))
+        ranges.append([values[0], values[-1]])
+    return ranges
+
+
+class Compiler:
+    """Compile a set of parsed modules into the JSON schema used by Validator"""
+
+    def __init__(self, modules: Dict[str, Module], features: Dict[str, set]):
+        self.modules = modules
+        self.features = features
+        self.identities: Dict[str, List[str]] = {}
+        self.root: Dict[str, dict] = {}
+        # choice and case names, skipped in augment paths (not data nodes)
+        self.schema_only: set = set()
+
+    def compile(self) -> dict:
+        for module in self.modules.values():
+            for identity in module.stmt.find_all('identity'):
+                bases = [self.qualify(module, b.arg) for b in identity.find_all('base')]
+                self.identities[f"{module.namespace}|{identity.arg}"] = bases
+        for module in self.modules.values():
+            self.compile_body(module.stmt.subs, self.root, module, module.namespace, True, [])
+
+        pending = [(m, a) for m in self.modules.values() for a in m.stmt.find_all('augment')]
+        while pending:
+            remaining = []
+            for module, augment in pending:
+                target = self.resolve_path(module, augment.arg)
+                if target is None:
+                    remaining.append((module, augment))
+                elif self.enabled(module, augment):
+                    self.compile_body(augment.subs, target.setdefault('children', {}), module,
+                                      module.namespace, target.get('config', True), [])
+            if len(remaining) == len(pending):
+                break  # targets in modules that are not loaded
+            pending = remaining
+
+        return {'format': SCHEMA_FORMAT, 'root': self.root, 'identities': self.identities}
+
+    # -- name resolution ----------------------------------------------------
+
+    def qualify(self, module: Module, name: str) -> str:
+        prefix, _, local = name.rpartition(':')
+        target = self.modules.get(module.imports.get(prefix, module.name)) if prefix else module
+        return f"{target.namespace if target else prefix}|{local}"
+
+    def lookup(self, module: Module, name: str, kind: str, scopes: List[dict]):
+        """Find a typedef or grouping: lexical scopes first, then modules"""
+        prefix, _, local = name.rpartition(':')
+        if not prefix or prefix == module.prefix:
+            for scope in reversed(scopes):
+                if local in scope.get(kind, {}):
+                    return scope[kind][local], module
+        target = self.modules.get(module.imports.get(prefix, module.name)) if prefix else module
+        if target is None:
+            return None, None
+        table = target.typedefs if kind == 'typedef' else target.groupings
+        return table.get(local), target
+
+    def resolve_path(self, module: Module, path: str, node: Optional[dict] = None,
+                     namespace: Optional[str] = None) -> Optional[dict]:
+        """Data node at an augment path; relative paths (in uses) stay in namespace"""
+        node = node if node is not None else {'children': self.root}
+        for segment in path.strip().strip('/').split('/'):
+            prefix, _, local = segment.rpartition(':')
+            if namespace is None:
+                target = self.modules.get(module.imports.get(prefix, module.name))
+                if target is None:
+                    return None
+                key = f"{target.namespace}|{local}"
+            else:
+                key = f"{namespace}|{local}"
+            child = node.get('children', {}).get(key)
+            if child is None:
+                if local in self.schema_only:
+                    continue
+                return None
+            node = child
+        return node
+
+    def enabled(self, module: Module, stmt: Statement) -> bool:
+        for feature in stmt.find_all('if-feature'):
+            if not self.feature_expr(module, feature.arg):
+                return False
+        return True
+
+    def feature_expr(self, module: Module, expr: str) -> bool:
+        tokens = re.findall(r'\(|\)|[^\s()]+', expr)
+        python = []
+        for token in tokens:
+            if token in ('and', 'or', 'not', '(', ')'):
+                python.append(token)
+            else:
+                prefix, _, name = token.rpartition(':')
+                owner = module.imports.get(prefix, module.name) if prefix else module.name
+                enabled = self.features.get(owner, set())
+                python.append(str('*' in enabled or name in enabled))
+        return bool(eval(' '.join(python), {'__builtins__': {}}))
+
+    # -- data nodes -------------------------------------------------------------
+
+    def compile_body(self, statements, children: dict, module: Module,
+                     namespace: str, config: bool, scopes: List[dict]):
+        """Add the data nodes of statements to children
+
+        module resolves names (typedefs, groupings, prefixes); namespace is
+        the one of the module instantiating the nodes (differs inside uses).
+        """
+        scope = {
+            'typedef': {s.arg: s for s in statements if s.keyword == 'typedef'},
+            'grouping': {s.arg: s for s in statements if s.keyword == 'grouping'},
+        }
+        scopes = scopes + [scope]
+        for stmt in statements:
+            keyword = stmt.keyword
+            if keyword not in DATA_KEYWORDS and keyword not in ('uses', 'choice', 'case'):
+                continue
+            if not self.enabled(module, stmt):
+                continue
+
+            if keyword == 'uses':
+                grouping, owner = self.lookup(module, stmt.arg, 'grouping', scopes)
+                if grouping is None:
+                    raise YangError(f"{module.name}: unknown grouping {stmt.arg}")
+                owner_scopes = scopes if owner is module else []
+                self.compile_body(grouping.subs, children, owner, namespace, config,
+                                  owner_scopes)
+                for augment in stmt.find_all('augment'):
+                    target = self.resolve_path(module, augment.arg, {'children': children}, namespace)
+                    if target is None:
+                        raise YangError(f"{module.name}: bad augment {augment.arg} in uses {stmt.arg}")
+                    self.compile_body(augment.subs, target.setdefault('children', {}), module,
+                                      namespace, target.get('config', config), scopes)
+                continue
+
+            if keyword in ('choice', 'case'):
+                self.schema_only.add(stmt.arg)
+                if keyword == 'choice':
+                    for short in (s for s in stmt.subs if s.keyword in DATA_KEYWORDS):
+                        # shorthand case: a data node directly under the choice
+                        self.compile_body([short], children, module, namespace, config, scopes)
+                    self.compile_body([s for s in stmt.subs if s.keyword == 'case'], children,
+                                      module, namespace, config, scopes)
+                else:
+                    self.compile_body(stmt.subs, children, module, namespace, config, scopes)
+                continue
+
+            node_config = config and stmt.value('config', 'true') != 'false'
+            node = {'kind': keyword, 'config': node_config}
+            if keyword in ('leaf', 'leaf-list'):
+                type_stmt = stmt.find('type')
+                node['type'] = self.compile_type(type_stmt, module, scopes) if type_stmt else {'base': 'string'}
+            elif keyword in ('container', 'list'):
+                if keyword == 'list' and stmt.value('key'):
+                    node['keys'] = stmt.value('key').split()
+                node['children'] = {}
+                self.compile_body(stmt.subs, node['children'], module, namespace,
+                                  node_config, scopes)
+            children[f"{namespace}|{stmt.arg}"] = node
+
+    # -- types ------------------------------------------------------------------
+
+    def compile_type(self, type_stmt: Statement, module: Module, scopes: List[dict]) -> dict:
+        name = type_stmt.arg
+        local = name.rpartition(':')[2]
+        if ':' not in name and name in BUILTIN_TYPES:
+            spec = {'base': name}
+            if name in INTEGER_BOUNDS:
+                spec['ranges'] = []
+        else:
+            typedef, owner = self.lookup(module, name, 'typedef', scopes)
+            if typedef is None:
+                raise YangError(f"{module.name}: unknown type {name}")
+            owner_scopes = scopes if owner is module else []
+            spec = self.compile_type(typedef.find('type'), owner, owner_scopes)
+            spec = json.loads(json.dumps(spec))  # restrictions below must not leak into the typedef
+            spec.setdefault('typedefs', []).append(f"{owner.name}:{local}")
+        self.restrict(spec, type_stmt, module, scopes)
+        return spec
+
+    def restrict(self, spec: dict, type_stmt: Statement, module: Module, scopes: List[dict]):
+        base = spec['base']
+        for stmt in type_stmt.subs:
+            keyword = stmt.keyword
+            if keyword == 'range':
+                if base in INTEGER_BOUNDS:
+                    low, high = INTEGER_BOUNDS[base]
+                    spec.setdefault('ranges', []).append(parse_ranges(stmt.arg, low, high))
+                elif base == 'decimal64':
+                    spec.setdefault('ranges', []).append(
+                        [[str(lo), str(hi)] for lo, hi in parse_ranges(stmt.arg, None, None, Decimal)])
+            elif keyword == 'length':
+                spec.setdefault('lengths', []).append(parse_ranges(stmt.arg, 0, 2 ** 64))
+            elif keyword == 'pattern':
+                regex = xsd_to_python(stmt.arg)
+                if regex is not None:
+                    invert = stmt.value('modifier') == 'invert-match'
+                    spec.setdefault('patterns', []).append([regex, invert])
+            elif keyword == 'enum' and self.enabled(module, stmt):
+                spec.setdefault('new_enums', []).append(stmt.arg)
+            elif keyword == 'bit' and self.enabled(module, stmt):
+                spec.setdefault('bits', []).append(stmt.arg)
+            elif keyword == 'base':
+                spec.setdefault('bases', []).append(self.qualify(module, stmt.arg))
+            elif keyword == 'fraction-digits':
+                spec['fraction_digits'] = int(stmt.arg)
+            elif keyword == 'type' and base == 'union':
+                spec.setdefault('members', []).append(self.compile_type(stmt, module, scopes))
+        if 'new_enums' in spec:
+            spec['enums'] = spec.pop('new_enums')
+
+
+def compile_schema(yang_dir: str = YANG_DIR) -> dict:
+    modules = {}
+    for filename in sorted(os.listdir(yang_dir)):
+        if filename.endswith('.yang'):
+            path = os.path.join(yang_dir, filename)
+            with open(path, encoding='utf-8') as f:
+                stmt = parse_module(f.read())
+            if stmt.keyword == 'module':
+                module = Module(stmt, path)
+                modules[module.name] = module
+    features = load_features(os.path.join(yang_dir, 'enable-features.csv'))
+    return Compiler(modules, features).compile()
+
+
+def schema_key(yang_dir: str = YANG_DIR) -> str:
+    """Cache key: every module's newest revision plus the enabled features"""
+    parts = [f"format={SCHEMA_FORMAT}"]
+    for filename in sorted(os.listdir(yang_dir)):
+        if filename.endswith('.yang'):
+            parts.append("%s@%s" % module_header(os.path.join(yang_dir, filename)))
+    features = os.path.join(yang_dir, 'enable-features.csv')
+    if os.path.exists(features):
+        with open(features, encoding='utf-8') as f:
+            parts.append(f.read())
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+def load_schema(yang_dir: str = YANG_DIR, cache_dir: Optional[str] = CACHE_DIR, rebuild: bool = False) -> dict:
+    """The compiled schema, from the on-disk cache when the revisions match"""
+    path = os.path.join(cache_dir, f"yang-schema-{schema_key(yang_dir)}.json") if cache_dir else None
+    if path and not rebuild and os.path.exists(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    schema = compile_schema(yang_dir)
+    if path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(schema, f, separators=(',', ':'))
+            os.replace(tmp, path)
+        except OSError:
+            pass  # a read-only cache only costs speed
+    return schema
+
+
+# ---------------------------------------------------------------------------
+# Validation
+
+def _qname(elem) -> str:
+    ns, _, local = elem.tag[1:].partition('}') if elem.tag.startswith('{') else ('', '', elem.tag)
+    return f"{ns}|{local}"
+
+
+def _local(elem) -> str:
+    return etree.QName(elem).localname
+
+
+class Validator:
+    """Validate edit-config payloads against a compiled schema"""
+
+    def __init__(self, schema: dict):
+        self.root = schema['root']
+        self.identities = schema['identities']
+        self._patterns: Dict[str, re.Pattern] = {}
+
+    @classmethod
+    def load(cls, yang_dir: str = YANG_DIR, cache_dir: Optional[str] = CACHE_DIR) -> 'Validator':
+        return cls(load_schema(yang_dir, cache_dir))
+
+    def validate(self, payload) -> List[str]:
+        """Return the problems found in a <config> payload (empty if valid)"""
+        try:
+            root = payload if isinstance(payload, etree._Element) else etree.fromstring(
+                payload.encode() if isinstance(payload, str) else payload)
+        except etree.XMLSyntaxError as e:
+            return [f"malformed XML: {e}"]
+        tops = list(root) if _local(root) == 'config' else [root]
+        errors: List[str] = []
+        for elem in tops:
+            if isinstance(elem.tag, str):
+                self._check(elem, self.root, "", errors)
+        return errors
+
+    def _check(self, elem, siblings: dict, parent_path: str, errors: List[str]):
+        node = siblings.get(_qname(elem))
+        path = f"{parent_path}/{_local(elem)}"
+        if node is None:
+            errors.append(f"{path}: unknown element ({etree.QName(elem).namespace})")
+            return
+
+        operation = elem.get(NC_OPERATION)
+        if operation is not None and operation not in EDIT_OPERATIONS:
+            errors.append(f"{path}: invalid operation '{operation}'")
+        if not node['config']:
+            errors.append(f"{path}: is state data (config false)")
+            return
+
+        kind = node['kind']
+        if kind in ('leaf', 'leaf-list'):
+            if len(elem):
+                errors.append(f"{path}: leaf cannot have child elements")
+            elif operation not in ('delete', 'remove') or (elem.text or '').strip():
+                problem = self.check_value((elem.text or '').strip(), node['type'], elem)
+                if problem:
+                    errors.append(f"{path}: {problem}")
+            return
+        if kind not in ('container', 'list'):
+            return
+
+        children = node.get('children', {})
+        if kind == 'list':
+            keys = {}
+            for key in node.get('keys', []):
+                value = next((c.text for c in elem if isinstance(c.tag, str) and _local(c) == key), None)
+                if value is None:
+                    errors.append(f"{path}: missing list key '{key}'")
+                keys[key] = (value or '').strip()
+            if keys:
+                path += "[" + ",".join(f"{k}='{v}'" for k, v in keys.items()) + "]"
+        for child in elem:
+            if isinstance(child.tag, str):
+                self._check(child, children, path, errors)
+
+    def check_value(self, value: str, spec: dict, elem) -> Optional[str]:
+        """Problem with a leaf value, or None if it is valid"""
+        base = spec['base']
+        if base in INTEGER_BOUNDS:
+            try:
+                number = int(value)
+            except ValueError:
+                return f"'{value}' is not a valid {base}"
+            low, high = INTEGER_BOUNDS[base]
+            if not low <= number <= high:
+                return f"{number} is out of range for {base}"
+            for ranges in spec.get('ranges', []):
+                if not any(lo <= number <= hi for lo, hi in ranges):
+                    return f"{number} is out of range {self._describe(ranges)}"
+        elif base == 'decimal64':
+            try:
+                number = Decimal(value)
+            except InvalidOperation:
+                return f"'{value}' is not a valid decimal64"
+            for ranges in spec.get('ranges', []):
+                if not any(Decimal(lo) <= number <= Decimal(hi) for lo, hi in ranges):
+                    return f"{value} is out of range {self._describe(ranges)}"
+        elif base == 'string':
+            for lengths in spec.get('lengths', []):
+                if not any(lo <= len(value) <= hi for lo, hi in lengths):
+                    return f"length of '{value}' is out of range {self._describe(lengths)}"
+            for regex, invert in spec.get('patterns', []):
+                if bool(self._pattern(regex).fullmatch(value)) == invert:
+                    name = spec.get('typedefs', ['string'])[-1]
+                    return f"'{value}' is not a valid {name}"
+        elif base == 'boolean':
+            if value not in ('true', 'false'):
+                return f"'{value}' is not a boolean"
+        elif base == 'enumeration':
+            if value not in spec.get('enums', []):
+                return f"'{value}' is not one of {', '.join(spec.get('enums', []))}"
+        elif base == 'identityref':
+            prefix, _, local = value.rpartition(':')
+            namespace = elem.nsmap.get(prefix or None)
+            identity = f"{namespace}|{local}"
+            if identity not in self.identities:
+                return f"unknown identity '{value}'"
+            if not all(self._derived(identity, b) for b in spec.get('bases', [])):
+                return f"identity '{value}' is not derived from {', '.join(spec.get('bases', []))}"
+        elif base == 'union':
+            members = spec.get('members', [])
+            if members and all(self.check_value(value, m, elem) for m in members):
+                return f"'{value}' matches no member of the union {spec.get('typedefs', ['union'])[-1]}"
+        elif base == 'empty':
+            if value:
+                return "empty leaf cannot have a value"
+        elif base == 'bits':
+            unknown = [b for b in value.split() if b not in spec.get('bits', [])]
+            if unknown:
+                return f"unknown bits {', '.join(unknown)}"
+        elif base == 'binary':
+            try:
+                base64.b64decode(value, validate=True)
+            except ValueError:
+                return "not valid base64"
+        return None
+
+    def _pattern(self, regex: str) -> re.Pattern:
+        compiled = self._patterns.get(regex)
+        if compiled is None:
+            compiled = self._patterns[regex] = re.compile(regex)
+        return compiled
+
+    def _derived(self, identity: str, base: str) -> bool:
+        seen = set()
+        stack = [identity]
+        while stack:
+            current = stack.pop()
+            if current == base:
+                return True
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self.identities.get(current, []))
+        return False
+
+    @staticmethod
+    def _describe(ranges) -> str:
+        return " | ".join(f"{lo}..{hi}" if lo != hi else f"{lo}" for lo, hi in ranges)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate edit-config payloads against yang-models/common")
+    parser.add_argument("files", nargs="*", help="XML payload files to validate")
+    parser.add_argument("--rebuild", action="store_true", help="Recompile the schema cache")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    validator = Validator(load_schema(rebuild=args.rebuild))
+    print(f"📚 Schema loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    failed = 0
+    for path in args.files:
+        with open(path, 'rb') as f:
+            errors = validator.validate(f.read())
+        if errors:
+            failed += 1
+            print(f"❌ {path}")
+            for error in errors:
+                print(f"   {error}")
+        else:
+            print(f"✅ {path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())